@@ -0,0 +1,164 @@
+import math
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class Waiter:
+    __slots__ = ("tenant", "granted", "event", "loop")
+
+    def __init__(self, tenant: str, loop=None):
+        self.tenant = tenant
+        self.granted = False
+        self.loop = loop
+        self.event = asyncio.Event() if loop else threading.Event()
+
+    def wake(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.event.set)
+        else:
+            self.event.set()
+
+
+class AdmissionControl:
+    def __init__(self, rate: float, burst: int, max_concurrent: int, tenant_concurrent: int, queue_size: int,
+                 queue_timeout: float, max_tenants: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.tenant_concurrent = tenant_concurrent
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.max_tenants = max_tenants
+        self.buckets = OrderedDict()
+        self.tenant_running = {}
+        self.running = 0
+        self.waiters = deque()
+        self.hold_seconds = 1.0
+        self.lock = threading.Lock()
+        self.counters = {"admitted": 0, "queued": 0, "rate_limited": 0, "tenant_busy": 0, "queue_full": 0,
+                         "queue_timeout": 0}
+
+    def take_token(self, tenant: str, now: float) -> float:
+        bucket = self.buckets.get(tenant)
+        if bucket is None:
+            bucket = self.buckets[tenant] = TokenBucket(self.burst, now)
+            while len(self.buckets) > self.max_tenants:
+                self.buckets.popitem(last=False)
+        self.buckets.move_to_end(tenant)
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+        bucket.updated = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.rate
+
+    def has_slot(self, tenant: str) -> bool:
+        if self.tenant_concurrent and self.tenant_running.get(tenant, 0) >= self.tenant_concurrent:
+            return False
+        return not self.max_concurrent or self.running < self.max_concurrent
+
+    def occupy(self, tenant: str):
+        self.running += 1
+        self.tenant_running[tenant] = self.tenant_running.get(tenant, 0) + 1
+        self.counters["admitted"] += 1
+
+    def reject(self, reason: str, retry_after: float) -> tuple[None, dict]:
+        self.counters[reason] += 1
+        return None, {"reason": reason, "retry_after": max(1, math.ceil(retry_after))}
+
+    def queue_wait(self) -> float:
+        return self.hold_seconds * (len(self.waiters) + 1) / max(1, self.max_concurrent)
+
+    def enter(self, tenant: str, loop=None) -> tuple[Waiter | None, tuple | None, dict | None]:
+        with self.lock:
+            wait = self.take_token(tenant, time.monotonic()) if self.rate else 0.0
+            if wait:
+                return None, *self.reject("rate_limited", wait)
+            if self.has_slot(tenant) and not self.waiters:
+                self.occupy(tenant)
+                return None, (tenant, time.monotonic()), None
+            if self.tenant_concurrent and self.tenant_running.get(tenant, 0) >= self.tenant_concurrent:
+                return None, *self.reject("tenant_busy", self.hold_seconds)
+            if len(self.waiters) >= self.queue_size:
+                return None, *self.reject("queue_full", self.queue_wait())
+            waiter = Waiter(tenant, loop)
+            self.waiters.append(waiter)
+            self.counters["queued"] += 1
+            return waiter, None, None
+
+    def settle(self, waiter: Waiter) -> tuple[tuple | None, dict | None]:
+        with self.lock:
+            if waiter.granted:
+                return (waiter.tenant, time.monotonic()), None
+            self.waiters.remove(waiter)
+            return self.reject("queue_timeout", self.queue_wait())
+
+    def admit(self, tenant: str) -> tuple[tuple | None, dict | None]:
+        waiter, ticket, rejection = self.enter(tenant)
+        if waiter is None:
+            return ticket, rejection
+        waiter.event.wait(self.queue_timeout)
+        return self.settle(waiter)
+
+    async def aadmit(self, tenant: str) -> tuple[tuple | None, dict | None]:
+        waiter, ticket, rejection = self.enter(tenant, asyncio.get_running_loop())
+        if waiter is None:
+            return ticket, rejection
+        try:
+            await asyncio.wait_for(waiter.event.wait(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.settle(waiter)
+
+    def release(self, ticket: tuple):
+        tenant, started = ticket
+        with self.lock:
+            self.hold_seconds = 0.9 * self.hold_seconds + 0.1 * (time.monotonic() - started)
+            self.running -= 1
+            if self.tenant_running[tenant] > 1:
+                self.tenant_running[tenant] -= 1
+            else:
+                del self.tenant_running[tenant]
+            for waiter in list(self.waiters):
+                if not self.has_slot(waiter.tenant):
+                    if self.max_concurrent and self.running >= self.max_concurrent:
+                        break
+                    continue
+                self.waiters.remove(waiter)
+                self.occupy(waiter.tenant)
+                waiter.granted = True
+                waiter.wake()
+
+    def hold(self, ticket: tuple, events):
+        try:
+            yield from events
+        finally:
+            self.release(ticket)
+
+    async def ahold(self, ticket: tuple, events):
+        try:
+            async for event in events:
+                yield event
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "enabled": True,
+                "running": self.running,
+                "waiting": len(self.waiters),
+                "tenants": len(self.buckets),
+                "avg_hold_seconds": round(self.hold_seconds, 3),
+                **self.counters
+            }
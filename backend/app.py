@@ -1,81 +1,224 @@
 import os
 import json
 import time
-from flask import Flask, request, Response, stream_with_context, jsonify
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, request, Response, jsonify
 from flask_cors import CORS
-from openai import OpenAI
 from dotenv import load_dotenv
 
 from prompts import LEGAL_ASSISTANT_SYSTEM_PROMPT
 from tools import TOOLS, get_template
+from document_model import apply_edit, document_text
+from document_versions import (
+    DocumentSync, available_versions, diff_versions, get_version, patch_since, record_version, start_history
+)
+from session_store import create_session_store
+from context_window import ContextWindow
+from completion_request import MODEL, PromptCacheStats, build_completion_request, encode_completion_request
+from tool_loop import ToolLoop
+from stream_hub import StreamHub, parse_event_id
+from sse import ContentCoalescer, content_event, sse_event
+from response_cache import ResponseCache, replay_chunks
+from metrics import GAP_BUCKETS, CompletionMeter, Registry
+from profiler import ProfileStore
+from model_client import (
+    LazyClient, ModelBusy, RetryPolicy, asend_completion, build_client, pool_limits, pool_timeout, retry_reason,
+    send_completion
+)
+from admission import AdmissionControl
+from model_router import ModelRouter, parse_pairs
+from edit_fast_path import EditFastPath
+from tool_arguments import compile_tools, validate
+from extracted_data import generation_data, merge_extracted, merge_values
+from batch_jobs import BatchJobs
+from warmup import Warmup
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-conversations = {}
-documents = {}
+MODEL_POOL_LIMITS = pool_limits(
+    max_connections=int(os.getenv("MODEL_MAX_CONNECTIONS", 1000)),
+    max_keepalive=int(os.getenv("MODEL_MAX_KEEPALIVE", 100)),
+    keepalive_seconds=float(os.getenv("MODEL_KEEPALIVE_SECONDS", 30))
+)
+MODEL_TIMEOUT = pool_timeout(
+    connect=float(os.getenv("MODEL_CONNECT_TIMEOUT", 5)),
+    read=float(os.getenv("MODEL_READ_TIMEOUT", 60)),
+    pool=float(os.getenv("MODEL_POOL_TIMEOUT", 10))
+)
+model_client = LazyClient(lambda: build_client(os.getenv("OPENAI_API_KEY"), MODEL_POOL_LIMITS, MODEL_TIMEOUT))
+async_model_client = LazyClient(
+    lambda: build_client(os.getenv("OPENAI_API_KEY"), MODEL_POOL_LIMITS, MODEL_TIMEOUT, asynchronous=True)
+)
+client = None
+async_client = None
+model_retries = RetryPolicy(
+    retries=int(os.getenv("MODEL_RETRIES", 3)),
+    base_delay=float(os.getenv("MODEL_RETRY_BASE_MS", 250)) / 1000,
+    max_delay=float(os.getenv("MODEL_RETRY_MAX_MS", 8000)) / 1000
+)
+
+store = create_session_store()
+context_window = ContextWindow(
+    max_tokens=int(os.getenv("CONTEXT_MAX_TOKENS", 8000)),
+    full_tool_turns=int(os.getenv("CONTEXT_FULL_TOOL_TURNS", 2))
+)
+prompt_cache = PromptCacheStats()
+
+TOOL_MAX_ROUNDS = int(os.getenv("TOOL_MAX_ROUNDS", 5))
+DOCUMENT_CHECKPOINT_INTERVAL = int(os.getenv("DOCUMENT_CHECKPOINT_INTERVAL", 50))
+DOCUMENT_MAX_CHECKPOINTS = int(os.getenv("DOCUMENT_MAX_CHECKPOINTS", 20))
+DOCUMENT_TOOLS = ("generate_document", "apply_edits")
+TOOL_SCHEMAS = compile_tools(TOOLS)
+TOOL_ARGUMENT_RETRIES = int(os.getenv("TOOL_ARGUMENT_RETRIES", 1))
+SSE_COALESCE_MS = float(os.getenv("SSE_COALESCE_MS", 0))
+SSE_COALESCE_CHARS = int(os.getenv("SSE_COALESCE_CHARS", 512))
+streams = StreamHub(
+    capacity=int(os.getenv("STREAM_BUFFER_EVENTS", 1024)),
+    retention_seconds=float(os.getenv("STREAM_RETENTION_SECONDS", 300)),
+    max_sessions=int(os.getenv("STREAM_MAX_SESSIONS", 1000)),
+    guard=store,
+    lease_seconds=float(os.getenv("STREAM_LEASE_SECONDS", 600))
+)
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1000)),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 3600)),
+    similarity=float(os.getenv("RESPONSE_CACHE_SIMILARITY", 0.8))
+) if os.getenv("RESPONSE_CACHE", "off").lower() in ("1", "true", "on") else None
+tool_executor = ThreadPoolExecutor(max_workers=int(os.getenv("TOOL_WORKERS", 8)), thread_name_prefix="tool")
+profiles = ProfileStore(
+    interval=float(os.getenv("PROFILE_INTERVAL_MS", 5)) / 1000,
+    keep=int(os.getenv("PROFILE_KEEP", 20))
+) if os.getenv("PROFILE_REQUESTS", "off").lower() in ("1", "true", "on") else None
+
+model_router = ModelRouter(
+    tiers=parse_pairs(os.getenv("MODEL_TIERS", f"small=gpt-4o-mini,large={MODEL}")),
+    routes=parse_pairs(os.getenv("MODEL_ROUTES", "gather=small,reply=small,generate=large,edit=large"))
+    if os.getenv("MODEL_ROUTING", "off").lower() in ("1", "true", "on") else {},
+    escalate=os.getenv("MODEL_ESCALATE", "on").lower() in ("1", "true", "on")
+)
+edit_fast_path = EditFastPath(os.getenv("EDIT_FAST_PATH", "on").lower() in ("1", "true", "on"))
+admission = AdmissionControl(
+    rate=float(os.getenv("CHAT_RATE_PER_SECOND", 0)),
+    burst=int(os.getenv("CHAT_BURST", 5)),
+    max_concurrent=int(os.getenv("CHAT_MAX_CONCURRENT", 0)),
+    tenant_concurrent=int(os.getenv("CHAT_TENANT_MAX_CONCURRENT", 0)),
+    queue_size=int(os.getenv("CHAT_QUEUE_SIZE", 100)),
+    queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT_MS", 2000)) / 1000
+) if os.getenv("CHAT_RATE_PER_SECOND") or os.getenv("CHAT_MAX_CONCURRENT") or os.getenv("CHAT_TENANT_MAX_CONCURRENT") else None
+
+batch_jobs = BatchJobs(
+    workers=int(os.getenv("BATCH_WORKERS", 4)),
+    max_records=int(os.getenv("BATCH_MAX_RECORDS", 1000)),
+    keep=int(os.getenv("BATCH_KEEP_JOBS", 100))
+)
+warmup = Warmup({"model_client": model_client.get, "async_model_client": async_model_client.get})
+
+metrics = Registry()
+model_ttft = metrics.histogram("lexiden_model_ttft_seconds", "Time from sending a completion request to its first chunk",
+                               labels=("source", "document_type", "tier"))
+model_token_gaps = metrics.histogram("lexiden_model_token_gap_seconds", "Time between consecutive streamed chunks",
+                                     GAP_BUCKETS, ("source", "document_type"))
+model_rounds = metrics.histogram("lexiden_model_round_seconds", "Time spent streaming one completion round",
+                                 labels=("source", "document_type", "function", "tier"))
+model_tokens = metrics.counter("lexiden_model_tokens_total", "Prompt (in) and completion (out) tokens by round",
+                               ("direction", "function", "document_type", "tier"))
+model_escalations = metrics.counter("lexiden_model_escalations_total", "Rounds retried on a larger model tier",
+                                    ("from_tier", "to_tier", "reason"))
+argument_retries = metrics.counter("lexiden_tool_argument_retries_total",
+                                   "Rounds retried on the same tier after malformed tool arguments", ("tier", "function"))
+tool_seconds = metrics.histogram("lexiden_tool_seconds", "Tool execution time",
+                                 labels=("function", "document_type", "status"))
+turn_seconds = metrics.histogram("lexiden_turn_seconds", "Time to stream a whole chat turn", labels=("outcome",))
+model_retry_count = metrics.counter("lexiden_model_retries_total", "Completion requests retried before the first token",
+                                    ("reason",))
+admission_rejections = metrics.counter("lexiden_chat_rejected_total", "Chat requests answered with 429", ("reason",))
+edit_fast_path_rounds = metrics.counter("lexiden_edit_fast_path_total",
+                                        "apply_edits rounds confirmed locally (taken) or sent back to the model",
+                                        ("outcome", "reason"))
+edit_fast_path_saved = metrics.counter("lexiden_edit_fast_path_saved_seconds_total",
+                                       "Estimated follow-up model time skipped by the edit fast path")
+batch_documents = metrics.counter("lexiden_batch_documents_total", "Batch records by outcome", ("status",))
+metrics.gauge("lexiden_streams_running", "Chat turns currently generating", lambda: streams.stats()["running"])
+metrics.gauge("lexiden_sessions", "Sessions held by the session store", lambda: store.stats()["sessions"])
 
 
 def get_or_create_conversation(session_id: str) -> list:
-    if session_id not in conversations:
-        conversations[session_id] = [
+    messages = store.get_conversation(session_id)
+    if messages is None:
+        messages = [
             {"role": "system", "content": LEGAL_ASSISTANT_SYSTEM_PROMPT}
         ]
-    return conversations[session_id]
+        store.save_conversation(session_id, messages)
+    return messages
+
+
+def save_conversation(session_id: str, messages: list):
+    store.save_conversation(session_id, messages)
 
 
 def get_current_document(session_id: str) -> dict | None:
-    return documents.get(session_id)
+    return store.get_document(session_id)
 
 
 def save_document(session_id: str, document: dict):
-    documents[session_id] = document
+    store.save_document(session_id, document)
+
+
+def render_document(arguments: dict, session_id: str) -> tuple[dict, dict]:
+    previous = get_current_document(session_id)
+    document_data = generation_data((previous or {}).get("extracted_data") or {}, arguments.get("document_data") or {})
+    return document_data, get_template(arguments.get("document_type", "nda")).build(document_data)
 
 
 def execute_function_call(function_name: str, arguments: dict, session_id: str) -> dict:
     if function_name == "extract_information":
-        result = {
+        problems = validate(TOOL_SCHEMAS[function_name][0], arguments)
+        if problems:
+            return {"status": "error", "message": f"Invalid extract_information arguments: {'; '.join(problems)}"}
+
+        with store.session_lock(session_id):
+            document = get_current_document(session_id) or {"extracted_data": {}, "document_type": None, "content": None}
+            extracted = merge_extracted(document.get("extracted_data") or {}, arguments.get("extracted_data") or {})
+            document_type = arguments.get("document_type") or document.get("document_type")
+            missing = get_template(document_type).missing_fields(extracted)
+            document["extracted_data"] = extracted
+            document["document_type"] = document_type
+            document["ready_to_generate"] = not missing
+            document["missing_fields"] = missing
+            save_document(session_id, document)
+
+        return {
             "status": "success",
-            "message": "Information extracted and stored",
-            "extracted_data": arguments.get("extracted_data", {}),
-            "document_type": arguments.get("document_type"),
-            "ready_to_generate": arguments.get("ready_to_generate", False),
-            "missing_fields": arguments.get("missing_fields", [])
+            "message": "Information merged with earlier details",
+            "extracted_data": extracted,
+            "document_type": document_type,
+            "ready_to_generate": not missing,
+            "missing_fields": missing
         }
 
-        if session_id not in documents:
-            documents[session_id] = {"extracted_data": {}, "document_type": None, "content": None}
-
-        documents[session_id]["extracted_data"] = arguments.get("extracted_data", {})
-        documents[session_id]["document_type"] = arguments.get("document_type")
-
-        return result
-
     elif function_name == "generate_document":
         document_type = arguments.get("document_type", "nda")
-        document_data = arguments.get("document_data", {})
-
-        template = get_template(document_type)
-
-        doc_info = {
-            "type": document_type,
-            "data": document_data,
-            "content": template,
-            "version": 1,
-            "history": []
-        }
-        save_document(session_id, doc_info)
+        document_data, doc_info = render_document(arguments, session_id)
+        with store.session_lock(session_id):
+            previous = get_current_document(session_id)
+            if previous and previous.get("extracted_data"):
+                doc_info["extracted_data"] = previous["extracted_data"]
+            doc_info["version"] = previous.get("version", 0) + 1 if previous else 1
+            start_history(doc_info)
+            save_document(session_id, doc_info)
 
         return {
             "status": "success",
             "message": f"Generating {document_type.replace('_', ' ').title()}",
             "document_type": document_type,
             "document_data": document_data,
-            "template_available": True
+            "template_available": True,
+            "sections": [doc_info["sections"][section_id]["heading"] for section_id in doc_info["order"]]
         }
 
     elif function_name == "apply_edits":
@@ -84,197 +227,478 @@ def execute_function_call(function_name: str, arguments: dict, session_id: str)
         original_value = arguments.get("original_value", "")
         new_value = arguments.get("new_value")
         reason = arguments.get("reason", "")
-
-        current_doc = get_current_document(session_id)
-
-        if current_doc:
-            if "history" not in current_doc:
-                current_doc["history"] = []
-            current_doc["history"].append({
-                "edit_type": edit_type,
-                "target_section": target_section,
-                "original_value": original_value,
-                "new_value": new_value,
-                "reason": reason,
-                "timestamp": time.time()
-            })
-            current_doc["version"] = current_doc.get("version", 1) + 1
-            save_document(session_id, current_doc)
+        outcome = {"section_id": None, "applied": False, "affected_clauses": []}
+        structured = False
+
+        with store.session_lock(session_id):
+            current_doc = get_current_document(session_id)
+
+            if current_doc:
+                structured = bool(current_doc.get("sections"))
+                if structured:
+                    outcome = apply_edit(current_doc, edit_type, target_section, original_value, new_value,
+                                         arguments.get("affected_clauses"))
+                if outcome["applied"] or not structured:
+                    edit = {"edit_type": edit_type, "target_section": target_section,
+                            "section_id": outcome["section_id"], "reason": reason}
+                    if not structured:
+                        edit.update(original_value=original_value, new_value=new_value)
+                    record_version(current_doc, edit, outcome.get("delta"),
+                                   DOCUMENT_CHECKPOINT_INTERVAL, DOCUMENT_MAX_CHECKPOINTS)
+                    save_document(session_id, current_doc)
+
+        if outcome.get("rewrite"):
+            message = (f"Replaced the whole {target_section} section with new_value; "
+                       f"pass original_value to change only part of it")
+        elif outcome["applied"] or not structured:
+            message = f"Applied {edit_type} to {target_section}"
+        elif outcome.get("missing"):
+            message = f"Text \"{outcome['missing']}\" not found in {target_section}; section left unchanged"
+        else:
+            message = f"No section matching {target_section}"
 
         return {
-            "status": "success",
-            "message": f"Applied {edit_type} to {target_section}",
+            "status": "success" if outcome["applied"] or not structured else "error",
+            "message": message,
             "edit_type": edit_type,
             "target_section": target_section,
+            "section_id": outcome["section_id"],
             "original_value": original_value,
             "new_value": new_value,
-            "reason": reason
+            "reason": reason,
+            "affected_clauses": outcome["affected_clauses"],
+            "exact_match": outcome.get("exact", False),
+            "rewrite": outcome.get("rewrite", False)
         }
 
     return {"status": "error", "message": f"Unknown function: {function_name}"}
 
 
-def generate_sse_stream(session_id: str, user_message: str):
+def retry_delay(error: Exception, attempt: int) -> float:
+    delay = model_retries.delay(error, attempt)
+    if delay is None:
+        busy = model_retries.busy(error)
+        if busy:
+            raise busy from error
+        raise error
+    model_retry_count.inc(1, retry_reason(error))
+    return delay
+
+
+def iter_completion_chunks(params: dict):
+    body = encode_completion_request(params)
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        ttft = None
+        yielded = False
+        try:
+            response = send_completion(client or model_client.get(), body)
+        except Exception as e:
+            time.sleep(retry_delay(e, attempt))
+            attempt += 1
+            continue
+
+        try:
+            for line in response.iter_lines():
+                if line.startswith("data: ") and line != "data: [DONE]":
+                    chunk = decode_chunk(line)
+                    if ttft is None and chunk.get("choices"):
+                        ttft = time.perf_counter() - started
+                    if chunk.get("usage"):
+                        prompt_cache.record(chunk["usage"], ttft)
+                    yielded = True
+                    yield chunk
+            return
+        except Exception as e:
+            if yielded:
+                raise
+            delay = retry_delay(e, attempt)
+        finally:
+            response.close()
+        time.sleep(delay)
+        attempt += 1
+
+
+async def aiter_completion_chunks(params: dict):
+    body = encode_completion_request(params)
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        ttft = None
+        yielded = False
+        try:
+            response = await asend_completion(async_client or async_model_client.get(), body)
+        except Exception as e:
+            await asyncio.sleep(retry_delay(e, attempt))
+            attempt += 1
+            continue
+
+        try:
+            async for line in response.aiter_lines():
+                if line.startswith("data: ") and line != "data: [DONE]":
+                    chunk = decode_chunk(line)
+                    if ttft is None and chunk.get("choices"):
+                        ttft = time.perf_counter() - started
+                    if chunk.get("usage"):
+                        prompt_cache.record(chunk["usage"], ttft)
+                    yielded = True
+                    yield chunk
+            return
+        except Exception as e:
+            if yielded:
+                raise
+            delay = retry_delay(e, attempt)
+        finally:
+            await response.aclose()
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def response_cache_scope(session_id: str) -> tuple[bool, str | None]:
+    document = get_current_document(session_id)
+    if document and (document.get("sections") or document.get("content")):
+        return False, None
+    return True, document.get("document_type") if document else None
+
+
+def cached_completion_chunks(session_id: str, params: dict, completion_chunks, meter: CompletionMeter, loop: ToolLoop):
+    cacheable, scope = response_cache_scope(session_id) if response_cache and not loop.argument_retries else (False, None)
+    lookup, cached = response_cache.lookup(scope, params) if cacheable else (None, None)
+    if cached:
+        meter.source = "cache"
+        yield from replay_chunks(cached)
+        return
+
+    chunks = []
+    for chunk in completion_chunks(params):
+        if lookup:
+            chunks.append(chunk)
+        yield chunk
+    if lookup and not loop.check_arguments():
+        response_cache.store(lookup, chunks)
+
+
+async def acached_completion_chunks(session_id: str, params: dict, completion_chunks, meter: CompletionMeter,
+                                    loop: ToolLoop):
+    cacheable, scope = response_cache_scope(session_id) if response_cache and not loop.argument_retries else (False, None)
+    lookup, cached = response_cache.lookup(scope, params) if cacheable else (None, None)
+    if cached:
+        meter.source = "cache"
+        for chunk in replay_chunks(cached):
+            yield chunk
+        return
+
+    chunks = []
+    async for chunk in completion_chunks(params):
+        if lookup:
+            chunks.append(chunk)
+        yield chunk
+    if lookup and not loop.check_arguments():
+        response_cache.store(lookup, chunks)
+
+
+def document_label(document: dict | None) -> str:
+    return (document or {}).get("type") or (document or {}).get("document_type") or "none"
+
+
+def record_round(meter: CompletionMeter, calls: list, document_type: str, tier: str):
+    function = "+".join(sorted({call["function"]["name"] for call in calls})) or "none"
+    seconds = time.perf_counter() - meter.started
+    if meter.stamps:
+        model_ttft.observe(meter.ttft, meter.source, document_type, tier)
+        model_token_gaps.observe_many(meter.gaps, meter.source, document_type)
+    model_rounds.observe(seconds, meter.source, document_type, function, tier)
+    if meter.usage:
+        model_tokens.inc(meter.usage.get("prompt_tokens", 0), "in", function, document_type, tier)
+        model_tokens.inc(meter.usage.get("completion_tokens", 0), "out", function, document_type, tier)
+    if meter.source == "model":
+        model_router.record(tier, seconds, meter.usage)
+    return seconds
+
+
+def edits_only(results: list) -> bool:
+    return bool(results) and all(call["function"]["name"] == "apply_edits" for call, _ in results)
+
+
+def edit_fast_path_event(session_id: str, loop: ToolLoop, results: list) -> str | None:
+    if not edit_fast_path.enabled or not edits_only(results):
+        return None
+    if loop.round > 1:
+        confirmation, reason = None, "later_round"
+    else:
+        with store.session_lock(session_id):
+            confirmation, reason = edit_fast_path.confirmation(get_current_document(session_id), results)
+    saved = edit_fast_path.record(confirmation is not None)
+    edit_fast_path_rounds.inc(1, "taken" if confirmation else "fallback", reason)
+    if confirmation is None:
+        return None
+    edit_fast_path_saved.inc(saved)
+    loop.finish_locally(confirmation)
+    return content_event(confirmation)
+
+
+def round_escalation(loop: ToolLoop, meter: CompletionMeter, tier: str, document_type: str) -> str | None:
+    if loop.content:
+        return None
+    malformed = loop.check_arguments()
+    escalation = model_router.escalation(tier, loop.tool_calls, malformed)
+    if escalation is not None:
+        model_escalations.inc(1, tier, *escalation)
+    elif malformed and loop.argument_retries < TOOL_ARGUMENT_RETRIES:
+        loop.argument_retries += 1
+        argument_retries.inc(1, tier, malformed.split(":", 1)[0] or "unknown")
+        escalation = tier, "invalid_arguments"
+    else:
+        return None
+    record_round(meter, [], document_type, tier)
+    loop.reset_round()
+    return escalation[0]
+
+
+def progress_frames(loop: ToolLoop, coalescer: ContentCoalescer) -> list:
+    frame = coalescer.flush()
+    frames = [frame] if frame else []
+    frames.extend(sse_event(event) for event in loop.progress)
+    loop.progress = []
+    return frames
+
+
+def error_event(message: str, error: Exception) -> dict:
+    if isinstance(error, ModelBusy):
+        return {"type": "error", "error": message, "retry_after": round(error.retry_after, 3)}
+    return {"type": "error", "error": message}
+
+
+def decode_chunk(line: str) -> dict:
+    chunk = json.loads(line[6:])
+    if chunk.get("error"):
+        raise RuntimeError(chunk["error"].get("message", "Upstream stream error"))
+    return chunk
+
+
+def execute_tool_call(call: dict, session_id: str, document_type: str = "none") -> dict:
+    if call.get("error"):
+        return {"status": "error", "message": f"Invalid arguments for {call['function']['name']}: {call['error']}"}
+    started = time.perf_counter()
+    try:
+        result = execute_function_call(call["function"]["name"], call["arguments"], session_id)
+    except Exception as e:
+        result = {"status": "error", "message": f"{call['function']['name']} failed: {e}"}
+    tool_seconds.observe(time.perf_counter() - started, call["function"]["name"],
+                         call["arguments"].get("document_type") or document_type, result.get("status", "success"))
+    return result
+
+
+def document_patch_event(session_id: str, sync: DocumentSync, call: dict, result: dict) -> str | None:
+    if call["function"]["name"] not in DOCUMENT_TOOLS or result.get("status") != "success":
+        return None
+    with store.session_lock(session_id):
+        patch = sync.patch(get_current_document(session_id))
+    return sse_event(patch) if patch else None
+
+
+def run_tool_calls(session_id: str, loop: ToolLoop, calls: list, sync: DocumentSync, document_type: str = "none",
+                   finished: list | None = None):
+    for call in calls:
+        yield sse_event(loop.tool_call_event(call))
+
+    for call in calls:
+        result = execute_tool_call(call, session_id, document_type)
+        if finished is not None:
+            finished.append((call, result))
+        yield sse_event(loop.record_result(call, result))
+        patch = document_patch_event(session_id, sync, call, result)
+        if patch:
+            yield patch
+
+
+async def arun_tool_calls(session_id: str, loop: ToolLoop, calls: list, sync: DocumentSync,
+                          document_type: str = "none", finished: list | None = None):
+    for call in calls:
+        yield sse_event(loop.tool_call_event(call))
+
+    event_loop = asyncio.get_running_loop()
+    for call in calls:
+        result = await event_loop.run_in_executor(tool_executor, execute_tool_call, call, session_id, document_type)
+        if finished is not None:
+            finished.append((call, result))
+        yield sse_event(loop.record_result(call, result))
+        patch = await event_loop.run_in_executor(tool_executor, document_patch_event, session_id, sync, call, result)
+        if patch:
+            yield patch
+
+
+def parse_document_version(value) -> int | None:
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if value is not None and (type(value) is not int or value < 0):
+        raise ValueError("document_version must be a non-negative integer")
+    return value
+
+
+def start_document_sync(session_id: str, document_version: int | None) -> tuple[DocumentSync, str | None]:
+    document = get_current_document(session_id)
+    if document_version is None:
+        return DocumentSync(document.get("version") if document else None), None
+    sync = DocumentSync(document_version)
+    with store.session_lock(session_id):
+        patch = sync.patch(get_current_document(session_id))
+    return sync, sse_event(patch) if patch else None
+
+
+def generate_sse_stream(session_id: str, user_message: str, completion_chunks=iter_completion_chunks,
+                        document_version: int | None = None):
     messages = get_or_create_conversation(session_id)
     messages.append({"role": "user", "content": user_message})
+    loop = ToolLoop(messages, max_rounds=TOOL_MAX_ROUNDS, schemas=TOOL_SCHEMAS,
+                    max_argument_retries=TOOL_ARGUMENT_RETRIES)
+    coalescer = ContentCoalescer(SSE_COALESCE_MS / 1000, SSE_COALESCE_CHARS)
+    started = time.perf_counter()
+    outcome = "cancelled"
+    floor = None
+    results = []
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            tools=TOOLS,
-            tool_choice="auto",
-            stream=True
-        )
-
-        full_response = ""
-        tool_calls = {}
-        current_tool_id = None
-
-        for chunk in response:
-            if not chunk.choices:
-                continue
-
-            delta = chunk.choices[0].delta
-            finish_reason = chunk.choices[0].finish_reason
-
-            if delta.content:
-                full_response += delta.content
-                yield f"data: {json.dumps({'type': 'content', 'content': delta.content})}\n\n"
-
-            if delta.tool_calls:
-                for tool_call in delta.tool_calls:
-                    tool_id = tool_call.id or current_tool_id
-
-                    if tool_call.id:
-                        current_tool_id = tool_call.id
-                        tool_calls[tool_id] = {
-                            "id": tool_id,
-                            "function": {
-                                "name": tool_call.function.name if tool_call.function else "",
-                                "arguments": ""
-                            }
-                        }
-
-                    if tool_call.function:
-                        if tool_call.function.name:
-                            tool_calls[tool_id]["function"]["name"] = tool_call.function.name
-                        if tool_call.function.arguments:
-                            tool_calls[tool_id]["function"]["arguments"] += tool_call.function.arguments
-
-            if finish_reason == "tool_calls":
-                for tool_id, tool_call_data in tool_calls.items():
-                    function_name = tool_call_data["function"]["name"]
-
-                    try:
-                        arguments = json.loads(tool_call_data["function"]["arguments"])
-                    except json.JSONDecodeError:
-                        arguments = {}
-
-                    yield f"data: {json.dumps({'type': 'tool_call', 'function': function_name, 'arguments': arguments})}\n\n"
-
-                    result = execute_function_call(function_name, arguments, session_id)
-
-                    yield f"data: {json.dumps({'type': 'tool_result', 'function': function_name, 'result': result})}\n\n"
-
-                    messages.append({
-                        "role": "assistant",
-                        "content": full_response if full_response else None,
-                        "tool_calls": [{
-                            "id": tool_id,
-                            "type": "function",
-                            "function": {
-                                "name": function_name,
-                                "arguments": tool_call_data["function"]["arguments"]
-                            }
-                        }]
-                    })
-
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_id,
-                        "content": json.dumps(result)
-                    })
-
-                full_response = ""
-
-                follow_up = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=messages,
-                    tools=TOOLS,
-                    tool_choice="auto",
-                    stream=True
-                )
-
-                for follow_chunk in follow_up:
-                    if not follow_chunk.choices:
-                        continue
-
-                    follow_delta = follow_chunk.choices[0].delta
-
-                    if follow_delta.content:
-                        full_response += follow_delta.content
-                        yield f"data: {json.dumps({'type': 'content', 'content': follow_delta.content})}\n\n"
-
-                    if follow_delta.tool_calls:
-                        for tool_call in follow_delta.tool_calls:
-                            tool_id = tool_call.id or current_tool_id
-
-                            if tool_call.id:
-                                current_tool_id = tool_call.id
-                                tool_calls[tool_id] = {
-                                    "id": tool_id,
-                                    "function": {
-                                        "name": tool_call.function.name if tool_call.function else "",
-                                        "arguments": ""
-                                    }
-                                }
-
-                            if tool_call.function:
-                                if tool_call.function.name:
-                                    tool_calls[tool_id]["function"]["name"] = tool_call.function.name
-                                if tool_call.function.arguments:
-                                    tool_calls[tool_id]["function"]["arguments"] += tool_call.function.arguments
-
-                    if follow_chunk.choices[0].finish_reason == "tool_calls":
-                        for tool_id, tool_call_data in tool_calls.items():
-                            if tool_id in [m.get("tool_call_id") for m in messages if m.get("role") == "tool"]:
-                                continue
-
-                            function_name = tool_call_data["function"]["name"]
-
-                            try:
-                                arguments = json.loads(tool_call_data["function"]["arguments"])
-                            except json.JSONDecodeError:
-                                arguments = {}
-
-                            yield f"data: {json.dumps({'type': 'tool_call', 'function': function_name, 'arguments': arguments})}\n\n"
-
-                            result = execute_function_call(function_name, arguments, session_id)
-
-                            yield f"data: {json.dumps({'type': 'tool_result', 'function': function_name, 'result': result})}\n\n"
-
-        if full_response:
-            messages.append({"role": "assistant", "content": full_response})
-
-        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        sync, resync = start_document_sync(session_id, document_version)
+        if resync:
+            yield resync
+        while loop.start_round():
+            document = get_current_document(session_id)
+            document_type = document_label(document)
+            _, tier = model_router.route(document, messages, floor)
+            context = context_window.build(session_id, messages, document)
+
+            while True:
+                params = build_completion_request(context, model=model_router.model(tier), tool_choice=loop.tool_choice)
+                meter = CompletionMeter()
+                chunks = cached_completion_chunks(session_id, params, completion_chunks, meter, loop)
+                for chunk in chunks:
+                    meter.add(chunk)
+                    content = loop.feed(chunk)
+                    frame = coalescer.add(content) if content else coalescer.poll()
+                    if frame:
+                        yield frame
+                    if loop.progress:
+                        yield from progress_frames(loop, coalescer)
+                    if loop.malformed:
+                        break
+                chunks.close()
+
+                escalated = round_escalation(loop, meter, tier, document_type)
+                if escalated is None:
+                    break
+                tier = floor = escalated
+
+            frame = coalescer.flush()
+            if frame:
+                yield frame
+
+            calls = loop.finish_round()
+            seconds = record_round(meter, calls, document_type, tier)
+            if results:
+                edit_fast_path.observe_follow_up(seconds)
+            results = []
+            yield from run_tool_calls(session_id, loop, calls, sync, document_type, results)
+            frame = edit_fast_path_event(session_id, loop, results)
+            if frame:
+                yield frame
+
+        outcome = "done"
+        yield sse_event({"type": "done"})
 
     except Exception as e:
+        outcome = "error"
         error_msg = str(e)
-        yield f"data: {json.dumps({'type': 'error', 'error': error_msg})}\n\n"
+        frame = coalescer.flush()
+        if frame:
+            yield frame
+        yield sse_event(error_event(error_msg, e))
 
+    finally:
+        save_conversation(session_id, messages)
+        turn_seconds.observe(time.perf_counter() - started, outcome)
 
-@app.route("/api/chat", methods=["POST"])
-def chat():
-    data = request.json
-    user_message = data.get("message", "")
-    session_id = data.get("session_id", "default")
 
-    if not user_message:
-        return jsonify({"error": "Message is required"}), 400
+async def agenerate_sse_stream(session_id: str, user_message: str, completion_chunks=aiter_completion_chunks,
+                               document_version: int | None = None):
+    messages = get_or_create_conversation(session_id)
+    messages.append({"role": "user", "content": user_message})
+    loop = ToolLoop(messages, max_rounds=TOOL_MAX_ROUNDS, schemas=TOOL_SCHEMAS,
+                    max_argument_retries=TOOL_ARGUMENT_RETRIES)
+    event_loop = asyncio.get_running_loop()
+    coalescer = ContentCoalescer(SSE_COALESCE_MS / 1000, SSE_COALESCE_CHARS)
+    started = time.perf_counter()
+    outcome = "cancelled"
+    floor = None
+    results = []
+
+    try:
+        sync, resync = await event_loop.run_in_executor(tool_executor, start_document_sync, session_id, document_version)
+        if resync:
+            yield resync
+        while loop.start_round():
+            document = get_current_document(session_id)
+            document_type = document_label(document)
+            _, tier = model_router.route(document, messages, floor)
+            context = context_window.build(session_id, messages, document)
+
+            while True:
+                params = build_completion_request(context, model=model_router.model(tier), tool_choice=loop.tool_choice)
+                meter = CompletionMeter()
+                chunks = acached_completion_chunks(session_id, params, completion_chunks, meter, loop)
+                async for chunk in chunks:
+                    meter.add(chunk)
+                    content = loop.feed(chunk)
+                    frame = coalescer.add(content) if content else coalescer.poll()
+                    if frame:
+                        yield frame
+                    if loop.progress:
+                        for frame in progress_frames(loop, coalescer):
+                            yield frame
+                    if loop.malformed:
+                        break
+                await chunks.aclose()
+
+                escalated = round_escalation(loop, meter, tier, document_type)
+                if escalated is None:
+                    break
+                tier = floor = escalated
+
+            frame = coalescer.flush()
+            if frame:
+                yield frame
+
+            calls = loop.finish_round()
+            seconds = record_round(meter, calls, document_type, tier)
+            if results:
+                edit_fast_path.observe_follow_up(seconds)
+            results = []
+            async for event in arun_tool_calls(session_id, loop, calls, sync, document_type, results):
+                yield event
+            frame = await event_loop.run_in_executor(tool_executor, edit_fast_path_event, session_id, loop, results)
+            if frame:
+                yield frame
+
+        outcome = "done"
+        yield sse_event({"type": "done"})
+
+    except Exception as e:
+        outcome = "error"
+        error_msg = str(e)
+        frame = coalescer.flush()
+        if frame:
+            yield frame
+        yield sse_event(error_event(error_msg, e))
+
+    finally:
+        save_conversation(session_id, messages)
+        turn_seconds.observe(time.perf_counter() - started, outcome)
+
 
+def sse_response(frames) -> Response:
     return Response(
-        stream_with_context(generate_sse_stream(session_id, user_message)),
+        frames,
         mimetype="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -284,42 +708,247 @@ def chat():
     )
 
 
+def admission_tenant(headers, session_id: str) -> str:
+    api_key = headers.get("X-API-Key")
+    return f"key:{api_key}" if api_key else f"session:{session_id}"
+
+
+def rejection_body(rejection: dict) -> dict:
+    return {"error": "Too many requests, retry later", **rejection}
+
+
+def rejected_response(rejection: dict) -> Response:
+    admission_rejections.inc(1, rejection["reason"])
+    response = jsonify(rejection_body(rejection))
+    response.status_code = 429
+    response.headers["Retry-After"] = str(rejection["retry_after"])
+    return response
+
+
+@app.route("/api/chat", methods=["POST"])
+def chat():
+    data = request.json
+    user_message = data.get("message", "")
+    session_id = data.get("session_id", "default")
+
+    if "Last-Event-ID" in request.headers:
+        last_event_id = parse_event_id(request.headers["Last-Event-ID"])
+        stream = streams.resumable(session_id, last_event_id)
+        if stream:
+            return sse_response(stream.iter(last_event_id))
+
+    if not user_message:
+        return jsonify({"error": "Message is required"}), 400
+    try:
+        document_version = parse_document_version(data.get("document_version"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    ticket, rejection = admission.admit(admission_tenant(request.headers, session_id)) if admission else (None, None)
+    if rejection:
+        return rejected_response(rejection)
+
+    profile_id = profiles.new_id() if profiles and request.headers.get("X-Profile") else None
+
+    def events():
+        frames = generate_sse_stream(session_id, user_message, document_version=document_version)
+        frames = profiles.profile(profile_id, session_id, frames) if profile_id else frames
+        return admission.hold(ticket, frames) if ticket else frames
+
+    stream = streams.start(session_id, events)
+    if stream is None:
+        if ticket:
+            admission.release(ticket)
+        return jsonify({"error": "A response is already streaming for this session"}), 409
+    response = sse_response(stream.iter(None))
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+@app.route("/api/chat/<session_id>/events", methods=["GET"])
+def resume_chat(session_id):
+    last_event_id = parse_event_id(request.headers.get("Last-Event-ID", request.args.get("last_event_id")))
+    stream = streams.get(session_id)
+    if stream is None:
+        return jsonify({"error": "No stream for this session"}), 404
+    return sse_response(stream.iter(last_event_id))
+
+
 @app.route("/api/conversation/<session_id>", methods=["GET"])
 def get_conversation(session_id):
-    messages = conversations.get(session_id, [])
+    messages = store.get_conversation(session_id) or []
     display_messages = [m for m in messages if m.get("role") != "system"]
     return jsonify({"messages": display_messages})
 
 
 @app.route("/api/conversation/<session_id>", methods=["DELETE"])
 def clear_conversation(session_id):
-    if session_id in conversations:
-        conversations[session_id] = [
+    if store.get_conversation(session_id) is not None:
+        save_conversation(session_id, [
             {"role": "system", "content": LEGAL_ASSISTANT_SYSTEM_PROMPT}
-        ]
-    if session_id in documents:
-        del documents[session_id]
+        ])
+    store.delete_document(session_id)
     return jsonify({"status": "cleared"})
 
 
 @app.route("/api/document/<session_id>", methods=["GET"])
 def get_document(session_id):
-    doc = documents.get(session_id)
+    doc = get_current_document(session_id)
     if doc:
-        return jsonify(doc)
+        return jsonify({**{key: value for key, value in doc.items() if key != "versions"}, "content": document_text(doc)})
     return jsonify({"error": "No document found"}), 404
 
 
+@app.route("/api/document/<session_id>/versions", methods=["GET"])
+def list_document_versions(session_id):
+    doc = get_current_document(session_id)
+    bounds = available_versions(doc) if doc else None
+    if bounds is None:
+        return jsonify({"error": "No version history found"}), 404
+    return jsonify({
+        "current": doc["version"],
+        "oldest_available": bounds[0],
+        "checkpoints": [version for version, _ in doc["versions"]["checkpoints"]],
+        "history": doc.get("history", [])
+    })
+
+
+@app.route("/api/document/<session_id>/versions/<int:version>", methods=["GET"])
+def get_document_version(session_id, version):
+    doc = get_current_document(session_id)
+    result = get_version(doc, version) if doc else None
+    if result is None:
+        return jsonify({"error": f"Version {version} not available"}), 404
+    return jsonify(result)
+
+
+@app.route("/api/document/<session_id>/patch", methods=["GET"])
+def get_document_patch(session_id):
+    doc = get_current_document(session_id)
+    if doc is None:
+        return jsonify({"error": "No document found"}), 404
+    return jsonify(patch_since(doc, request.args.get("since", type=int)))
+
+
+@app.route("/api/document/<session_id>/diff", methods=["GET"])
+def diff_document_versions(session_id):
+    doc = get_current_document(session_id)
+    from_version = request.args.get("from", type=int)
+    to_version = request.args.get("to", type=int) or (doc or {}).get("version")
+    if doc is None or from_version is None:
+        return jsonify({"error": "from and an existing document are required"}), 400
+    result = diff_versions(doc, from_version, to_version)
+    if result is None:
+        return jsonify({"error": f"Versions {from_version}..{to_version} not available"}), 404
+    return jsonify(result)
+
+
+def render_batch_record(document_type: str, record: dict, include_text: bool) -> dict:
+    problems = validate(TOOL_SCHEMAS["generate_document"][0], {"document_type": document_type, "document_data": record})
+    if problems:
+        result = {"status": "error", "message": "; ".join(problems)}
+    else:
+        document = get_template(document_type).build(generation_data({}, record))
+        result = {"status": "success", "title": document["title"], "version": document["version"]}
+        if include_text:
+            result["content"] = document_text(document)
+    batch_documents.inc(1, result["status"])
+    return result
+
+
+@app.route("/api/batch", methods=["POST"])
+def batch():
+    data = request.json or {}
+    document_type = data.get("document_type")
+    records = data.get("records")
+    defaults = data.get("defaults") or {}
+    if validate(TOOL_SCHEMAS["generate_document"][0], {"document_type": document_type}):
+        return jsonify({"error": "A supported document_type is required"}), 400
+    if not isinstance(records, list) or not records or not all(isinstance(record, dict) for record in records):
+        return jsonify({"error": "records must be a non-empty list of document_data objects"}), 400
+    if len(records) > batch_jobs.max_records:
+        return jsonify({"error": f"At most {batch_jobs.max_records} records per batch"}), 413
+    if not isinstance(defaults, dict):
+        return jsonify({"error": "defaults must be a document_data object"}), 400
+
+    job = batch_jobs.create(document_type, [merge_values(defaults, record) for record in records])
+    include_text = data.get("include_text", True)
+
+    def render(index: int, record: dict) -> dict:
+        return render_batch_record(document_type, record, include_text)
+
+    def lines():
+        yield json.dumps({"type": "job", **job.stats()}) + "\n"
+        for result in batch_jobs.run(job, render):
+            yield json.dumps({"type": "document", **result}) + "\n"
+        yield json.dumps({"type": "done", **job.stats()}) + "\n"
+
+    return Response(lines(), mimetype="application/x-ndjson",
+                    headers={"X-Batch-Id": job.id, "Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/api/batch/<job_id>", methods=["GET"])
+def batch_status(job_id):
+    job = batch_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "No batch job with this id"}), 404
+    return jsonify(job.stats())
+
+
+@app.route("/api/batch/<job_id>", methods=["DELETE"])
+def cancel_batch(job_id):
+    job = batch_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "No batch job with this id"}), 404
+    return jsonify(job.stats())
+
+
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    profile = profiles.get(profile_id) if profiles else None
+    if profile is None:
+        return jsonify({"error": "No finished profile with this id"}), 404
+    if request.args.get("format") == "folded":
+        return Response(profile["folded"], mimetype="text/plain")
+    return jsonify(profile)
+
+
 @app.route("/api/health", methods=["GET"])
 def health():
     return jsonify({
         "status": "healthy",
-        "openai_configured": bool(os.getenv("OPENAI_API_KEY"))
+        "openai_configured": bool(os.getenv("OPENAI_API_KEY")),
+        "session_store": store.stats(),
+        "context_window": context_window.stats(),
+        "prompt_cache": prompt_cache.stats(),
+        "streams": streams.stats(),
+        "response_cache": response_cache.stats() if response_cache else {"enabled": False},
+        "model_client": model_retries.stats(),
+        "model_router": model_router.stats(),
+        "edit_fast_path": edit_fast_path.stats(),
+        "batch": batch_jobs.stats(),
+        "startup": {**warmup.stats(), "model_client": model_client.stats(),
+                    "async_model_client": async_model_client.stats()},
+        "admission": admission.stats() if admission else {"enabled": False}
     })
 
 
+@app.route("/api/ready", methods=["GET"])
+def ready():
+    stats = warmup.start().stats()
+    return jsonify(stats), 200 if stats["ready"] else 503
+
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5001))
+    debug = os.getenv("FLASK_DEBUG", "off").lower() in ("1", "true", "on")
     print(f"Starting Legal Document Assistant API on port {port}")
     print(f"OpenAI API Key configured: {bool(os.getenv('OPENAI_API_KEY'))}")
-    app.run(host="0.0.0.0", port=port, debug=True)
+    warmup.start()
+    app.run(host="0.0.0.0", port=port, debug=debug, threaded=True)
@@ -0,0 +1,179 @@
+import re
+import json
+import asyncio
+from urllib.parse import parse_qsl
+from asgiref.wsgi import WsgiToAsgi
+
+from app import (
+    app, admission, admission_rejections, admission_tenant, agenerate_sse_stream, parse_document_version, profiles,
+    rejection_body, streams, warmup
+)
+from stream_hub import parse_event_id
+
+wsgi_app = WsgiToAsgi(app)
+
+RESUME_PATH = re.compile(r"/api/chat/([^/]+)/events")
+
+SSE_HEADERS = [
+    (b"content-type", b"text/event-stream"),
+    (b"cache-control", b"no-cache"),
+    (b"connection", b"keep-alive"),
+    (b"x-accel-buffering", b"no"),
+    (b"access-control-allow-origin", b"*"),
+]
+
+
+async def read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return b""
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
+
+
+async def send_json(send, status: int, payload: dict, headers: list | None = None):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"access-control-allow-origin", b"*"),
+            *(headers or []),
+        ],
+    })
+    await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+
+def header(scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode()
+    return None
+
+
+class ScopeHeaders:
+    def __init__(self, scope):
+        self.scope = scope
+
+    def get(self, name: str) -> str | None:
+        return header(self.scope, name.lower().encode())
+
+
+async def stream_frames(send, receive, frames, headers: list | None = None):
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+                return
+
+    watcher = asyncio.create_task(watch_disconnect())
+
+    try:
+        await send({"type": "http.response.start", "status": 200, "headers": SSE_HEADERS + (headers or [])})
+        async for frame in frames:
+            if disconnected.is_set():
+                break
+            await send({"type": "http.response.body", "body": frame.encode(), "more_body": True})
+        if not disconnected.is_set():
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        watcher.cancel()
+        await frames.aclose()
+
+
+async def chat(scope, receive, send):
+    try:
+        data = json.loads(await read_body(receive) or b"{}")
+    except json.JSONDecodeError:
+        data = {}
+
+    user_message = data.get("message", "")
+    session_id = data.get("session_id", "default")
+
+    last_event_id = header(scope, b"last-event-id")
+    if last_event_id is not None:
+        stream = streams.resumable(session_id, parse_event_id(last_event_id))
+        if stream:
+            await stream_frames(send, receive, stream.aiter(parse_event_id(last_event_id)))
+            return
+
+    if not user_message:
+        await send_json(send, 400, {"error": "Message is required"})
+        return
+    try:
+        document_version = parse_document_version(data.get("document_version"))
+    except ValueError as e:
+        await send_json(send, 400, {"error": str(e)})
+        return
+
+    if admission:
+        ticket, rejection = await admission.aadmit(admission_tenant(ScopeHeaders(scope), session_id))
+    else:
+        ticket, rejection = None, None
+    if rejection:
+        admission_rejections.inc(1, rejection["reason"])
+        await send_json(send, 429, rejection_body(rejection), [(b"retry-after", str(rejection["retry_after"]).encode())])
+        return
+
+    profile_id = profiles.new_id() if profiles and header(scope, b"x-profile") else None
+
+    def events():
+        frames = agenerate_sse_stream(session_id, user_message, document_version=document_version)
+        frames = profiles.aprofile(profile_id, session_id, frames) if profile_id else frames
+        return admission.ahold(ticket, frames) if ticket else frames
+
+    stream = streams.start_async(session_id, events)
+    if stream is None:
+        if ticket:
+            admission.release(ticket)
+        await send_json(send, 409, {"error": "A response is already streaming for this session"})
+        return
+
+    headers = [(b"x-profile-id", profile_id.encode())] if profile_id else []
+    await stream_frames(send, receive, stream.aiter(None), headers)
+
+
+async def resume_chat(scope, receive, send, session_id: str):
+    stream = streams.get(session_id)
+    if stream is None:
+        await send_json(send, 404, {"error": "No stream for this session"})
+        return
+
+    query = dict(parse_qsl(scope.get("query_string", b"").decode()))
+    last_event_id = parse_event_id(header(scope, b"last-event-id") or query.get("last_event_id"))
+    await stream_frames(send, receive, stream.aiter(last_event_id))
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            warmup.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+
+    if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/api/chat":
+        await chat(scope, receive, send)
+        return
+
+    if scope["type"] == "http" and scope["method"] == "GET":
+        match = RESUME_PATH.fullmatch(scope["path"])
+        if match:
+            await resume_chat(scope, receive, send, match.group(1))
+            return
+
+    await wsgi_app(scope, receive, send)
@@ -0,0 +1,143 @@
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def record_key(document_type: str, record: dict) -> str:
+    return json.dumps([document_type, record], sort_keys=True, separators=(",", ":"))
+
+
+class BatchJob:
+    def __init__(self, job_id: str, document_type: str, records: list):
+        self.id = job_id
+        self.document_type = document_type
+        self.records = records
+        self.total = len(records)
+        self.pending, self.copies = [], {}
+        originals = {}
+        for index, record in enumerate(records):
+            key = record_key(document_type, record)
+            if key in originals:
+                self.copies.setdefault(originals[key], []).append(index)
+            else:
+                originals[key] = index
+                self.pending.append(index)
+        self.unique = len(self.pending)
+        self.status = "running"
+        self.counts = {"success": 0, "error": 0, "cancelled": 0}
+        self.duplicates = 0
+        self.started = time.time()
+        self.finished_at = None
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+
+    def record(self, result: dict):
+        with self.lock:
+            self.counts[result["status"]] = self.counts.get(result["status"], 0) + 1
+            self.duplicates += "duplicate_of" in result
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def finish(self):
+        with self.lock:
+            self.status = "cancelled" if self.cancelled.is_set() else "done"
+            self.finished_at = time.time()
+            self.records = []
+
+    def stats(self) -> dict:
+        with self.lock:
+            completed = sum(self.counts.values())
+            elapsed = (self.finished_at or time.time()) - self.started
+            return {
+                "job_id": self.id,
+                "document_type": self.document_type,
+                "status": "cancelling" if self.status == "running" and self.cancelled.is_set() else self.status,
+                "total": self.total,
+                "unique": self.unique,
+                "completed": completed,
+                "duplicates": self.duplicates,
+                **self.counts,
+                "seconds": round(elapsed, 3),
+                "documents_per_minute": round(completed / elapsed * 60, 1) if elapsed > 0 else 0.0
+            }
+
+
+class BatchJobs:
+    def __init__(self, workers: int, max_records: int, keep: int):
+        self.workers = workers
+        self.max_records = max_records
+        self.keep = keep
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def create(self, document_type: str, records: list) -> BatchJob:
+        job = BatchJob(uuid.uuid4().hex[:12], document_type, records)
+        with self.lock:
+            self.jobs[job.id] = job
+            finished = [job_id for job_id, existing in self.jobs.items() if existing.finished_at is not None]
+            for job_id in finished[:max(0, len(self.jobs) - self.keep)]:
+                del self.jobs[job_id]
+        return job
+
+    def get(self, job_id: str) -> BatchJob | None:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> BatchJob | None:
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def run(self, job: BatchJob, render):
+        pending = job.pending
+
+        def settle(index: int, result: dict) -> list:
+            results = [{"index": index, **result}]
+            results += [{"index": copy, **result, "duplicate_of": index} for copy in job.copies.get(index, ())]
+            for item in results:
+                job.record(item)
+            return results
+
+        running, position = {}, 0
+        try:
+            while position < len(pending) or running:
+                while position < len(pending) and len(running) < self.workers * 2 and not job.cancelled.is_set():
+                    index = pending[position]
+                    running[self.executor.submit(render, index, job.records[index])] = index
+                    position += 1
+                if job.cancelled.is_set() and position < len(pending):
+                    for index in pending[position:]:
+                        yield from settle(index, {"status": "cancelled"})
+                    position = len(pending)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"status": "error", "message": str(e)}
+                    yield from settle(index, result)
+        finally:
+            if running or position < len(pending):
+                job.cancel()
+                for future in running:
+                    future.cancel()
+            job.finish()
+
+    def stats(self) -> dict:
+        with self.lock:
+            jobs = list(self.jobs.values())
+        return {
+            "workers": self.workers,
+            "max_records": self.max_records,
+            "running": sum(job.finished_at is None for job in jobs),
+            "jobs": len(jobs)
+        }
@@ -0,0 +1,86 @@
+import json
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.common import backend_server, mock_server, cpu_seconds, percentile, rss_mb
+
+
+async def open_stream(client: httpx.AsyncClient, url: str, index: int) -> dict:
+    started = time.perf_counter()
+    first_byte = None
+    events = 0
+    try:
+        async with client.stream("POST", f"{url}/api/chat", json={
+            "message": "I need an NDA",
+            "session_id": f"bench_{index}"
+        }) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                events += 1
+                event = json.loads(line[6:])
+                if event["type"] == "done":
+                    return {"ok": True, "ttfb": first_byte, "total": time.perf_counter() - started, "events": events}
+                if event["type"] == "error":
+                    return {"ok": False, "error": event["error"]}
+    except httpx.HTTPError as e:
+        return {"ok": False, "error": type(e).__name__}
+    return {"ok": False, "error": "stream ended without done"}
+
+
+async def run_level(url: str, pid: int, concurrency: int, timeout: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=0)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        cpu_before = cpu_seconds(pid)
+        results = await asyncio.gather(*(open_stream(client, url, i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        cpu = cpu_seconds(pid) - cpu_before
+
+    ok = [r for r in results if r["ok"]]
+    return {
+        "concurrency": concurrency,
+        "completed": len(ok),
+        "failed": len(results) - len(ok),
+        "ttfb_p50": percentile([r["ttfb"] for r in ok], 50),
+        "ttfb_p99": percentile([r["ttfb"] for r in ok], 99),
+        "total_p99": percentile([r["total"] for r in ok], 99),
+        "wall": elapsed,
+        "cpu_ms_per_stream": cpu * 1000 / max(1, len(ok)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent SSE stream capacity of a single backend process")
+    parser.add_argument("--mode", choices=["asgi", "wsgi"], default="asgi")
+    parser.add_argument("--levels", default="100,200,400,800")
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    parser.add_argument("--first-token-delay", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    with mock_server(
+        "--tokens", str(args.tokens),
+        "--token-delay", str(args.token_delay),
+        "--first-token-delay", str(args.first_token_delay),
+    ) as base_url:
+        with backend_server(args.mode, base_url) as (url, process):
+            print(f"mode={args.mode} tokens={args.tokens} token_delay={args.token_delay}s first_token_delay={args.first_token_delay}s")
+            print(f"{'streams':>8} {'ok':>6} {'failed':>7} {'ttfb p50':>10} {'ttfb p99':>10} {'total p99':>10} {'wall':>8} {'rss MB':>8} {'cpu/stream':>11}")
+            for level in [int(n) for n in args.levels.split(",")]:
+                row = asyncio.run(run_level(url, process.pid, level, args.timeout))
+                print(
+                    f"{row['concurrency']:>8} {row['completed']:>6} {row['failed']:>7} "
+                    f"{row['ttfb_p50'] * 1000:>8.1f}ms {row['ttfb_p99'] * 1000:>8.1f}ms "
+                    f"{row['total_p99']:>9.2f}s {row['wall']:>7.2f}s {rss_mb(process.pid):>8.1f} {row['cpu_ms_per_stream']:>9.2f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.common import backend_server, percentile, start_mock
+
+CONFIGS = {
+    "unguarded": {"MODEL_RETRIES": "0"},
+    "guarded": {
+        "MODEL_RETRIES": "3",
+        "MODEL_RETRY_BASE_MS": "100",
+        "CHAT_MAX_CONCURRENT": "24",
+        "CHAT_QUEUE_SIZE": "48",
+        "CHAT_QUEUE_TIMEOUT_MS": "1500",
+        "CHAT_RATE_PER_SECOND": "2",
+        "CHAT_BURST": "10",
+    },
+}
+
+
+async def chat(client: httpx.AsyncClient, url: str, session_id: str, api_key: str) -> dict:
+    started = time.perf_counter()
+    first = None
+    try:
+        async with client.stream("POST", f"{url}/api/chat", headers={"X-API-Key": api_key},
+                                 json={"message": "I need an NDA", "session_id": session_id}) as response:
+            if response.status_code == 429:
+                await response.aread()
+                return {"status": "429", "seconds": time.perf_counter() - started,
+                        "retry_after": response.headers.get("retry-after"), "reason": response.json().get("reason")}
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[6:])
+                if first is None and event["type"] in ("content", "tool_call"):
+                    first = time.perf_counter() - started
+                if event["type"] == "done":
+                    return {"status": "done", "ttft": first or 0.0, "seconds": time.perf_counter() - started}
+                if event["type"] == "error":
+                    return {"status": "error", "error": event["error"], "retry_after": event.get("retry_after")}
+    except httpx.HTTPError as e:
+        return {"status": "error", "error": type(e).__name__}
+    return {"status": "error", "error": "stream ended without done"}
+
+
+async def burst(url: str, requests: int, tenants: int, noisy_share: float, timeout: float) -> tuple[list, float]:
+    limits = httpx.Limits(max_connections=requests, max_keepalive_connections=0)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            chat(client, url, f"burst_{index}",
+                 "tenant-noisy" if index < requests * noisy_share else f"tenant-{index % tenants}")
+            for index in range(requests)
+        ))
+        return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Burst /api/chat against a mock that injects 429s and latency spikes")
+    parser.add_argument("--modes", default="asgi,wsgi")
+    parser.add_argument("--requests", type=int, default=150)
+    parser.add_argument("--tenants", type=int, default=8)
+    parser.add_argument("--noisy-share", type=float, default=0.4)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--concurrency-limit", type=int, default=32)
+    parser.add_argument("--spike-rate", type=float, default=0.05)
+    parser.add_argument("--spike-delay", type=float, default=1.5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    mock = start_mock(tokens=30, token_delay=0.01, first_token_delay=0.1, error_rate=args.error_rate, retry_after=0.2,
+                      concurrency_limit=args.concurrency_limit, spike_rate=args.spike_rate, spike_delay=args.spike_delay)
+    print(f"{args.requests} concurrent requests, {args.noisy_share:.0%} from one tenant; mock rejects "
+          f"{args.error_rate:.0%} of completions and everything past {args.concurrency_limit} open streams")
+    print(f"{'mode':<5} {'config':<10} {'done':>5} {'errors':>7} {'429':>5} {'429 p99':>9} {'ttft p50':>9} "
+          f"{'ttft p99':>9} {'wall':>7} {'retries':>8} {'upstream 429':>13}")
+
+    failures = []
+    for mode in args.modes.split(","):
+        for config, env in CONFIGS.items():
+            rejected = mock.rejected
+            with backend_server(mode, mock.base_url, env) as (url, _):
+                results, wall = asyncio.run(burst(url, args.requests, args.tenants, args.noisy_share, args.timeout))
+                health = httpx.get(f"{url}/api/health").json()
+
+            done = [r for r in results if r["status"] == "done"]
+            errors = [r for r in results if r["status"] == "error"]
+            throttled = [r for r in results if r["status"] == "429"]
+            print(
+                f"{mode:<5} {config:<10} {len(done):>5} {len(errors):>7} {len(throttled):>5} "
+                f"{percentile([r['seconds'] for r in throttled], 99) * 1000:>7.0f}ms "
+                f"{percentile([r['ttft'] for r in done], 50) * 1000:>7.0f}ms "
+                f"{percentile([r['ttft'] for r in done], 99) * 1000:>7.0f}ms {wall:>6.2f}s "
+                f"{health['model_client']['retries']:>8} {mock.rejected - rejected:>13}"
+            )
+            if config == "guarded":
+                reasons = {}
+                for result in throttled:
+                    reasons[result["reason"]] = reasons.get(result["reason"], 0) + 1
+                print(f"{'':<16} 429 reasons {reasons}")
+                failures += [f"{mode} error event: {r['error']}" for r in errors]
+                failures += [f"{mode} 429 without Retry-After" for r in throttled if not r["retry_after"]]
+                failures += [f"{mode} 429 took {r['seconds']:.2f}s" for r in throttled if r["seconds"] > 2.0]
+
+    for failure in sorted(set(failures)):
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
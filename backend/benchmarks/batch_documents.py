@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from model_client import build_client
+from batch_jobs import BatchJobs
+from document_model import document_text
+from benchmarks.common import start_mock
+
+COMPANIES = ["Acme Corp", "Globex LLC", "Initech Inc", "Umbrella Partners", "Stark Industries", "Wayne Enterprises"]
+PEOPLE = ["Jane Doe", "John Smith", "Sam Rivera", "Alex Chen", "Priya Patel", "Maria Garcia", "Tom Baker"]
+
+
+def nda_records(count: int, duplicate_rate: float, rng: random.Random) -> list:
+    records = []
+    for index in range(count):
+        if records and rng.random() < duplicate_rate:
+            records.append(dict(rng.choice(records)))
+            continue
+        records.append({
+            "parties": [
+                {"name": rng.choice(COMPANIES), "role": "disclosing_party", "entity_type": "corporation"},
+                {"name": f"{rng.choice(PEOPLE)} {index}", "role": "receiving_party", "entity_type": "individual"}
+            ],
+            "terms": {"purpose": "evaluating a potential business relationship", "duration": f"{1 + index % 4} years"},
+            "jurisdiction": "Delaware"
+        })
+    return records
+
+
+def interactive_script(records: list) -> dict:
+    return {
+        f"Draft NDA {index}": {
+            "user": f"Draft NDA {index}",
+            "reply": "The NDA is ready in the preview.",
+            "tool_calls": [{"name": "generate_document", "arguments": {"document_type": "nda", "document_data": record}}]
+        }
+        for index, record in enumerate(records)
+    }
+
+
+def run_interactive(records: list, sessions: int, label: str) -> tuple[float, list, int]:
+    def draft(index: int) -> str:
+        session_id = f"batch_bench_{label}_{index}"
+        events = [json.loads(frame[6:]) for frame in app.generate_sse_stream(session_id, f"Draft NDA {index}")]
+        if events[-1]["type"] != "done":
+            return ""
+        return document_text(app.get_current_document(session_id))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        texts = list(executor.map(draft, range(len(records))))
+    return time.perf_counter() - started, texts, sum(not text for text in texts)
+
+
+def run_batch(records: list, workers: int) -> tuple[float, float, list, dict]:
+    app.batch_jobs = BatchJobs(workers=workers, max_records=len(records), keep=10)
+    client = app.app.test_client()
+    started = time.perf_counter()
+    response = client.post("/api/batch", json={"document_type": "nda", "records": records}, buffered=False)
+    first, texts, summary = None, [None] * len(records), {}
+    for line in response.response:
+        event = json.loads(line)
+        if event["type"] == "document":
+            first = first or time.perf_counter() - started
+            texts[event["index"]] = event.get("content") if event["status"] == "success" else ""
+        elif event["type"] == "done":
+            summary = event
+    response.close()
+    return time.perf_counter() - started, first or 0.0, texts, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Documents per minute through /api/batch against one chat turn per document")
+    parser.add_argument("--documents", type=int, default=120)
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    records = nda_records(args.documents, args.duplicate_rate, random.Random(args.seed))
+    mock = start_mock(script=interactive_script(records), tokens=20, first_token_delay=args.first_token_delay,
+                      token_delay=args.token_delay)
+    app.client = build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT, base_url=mock.base_url)
+
+    print(f"{args.documents} NDAs, {args.duplicate_rate:.0%} duplicates, mock first token {args.first_token_delay * 1000:.0f}ms")
+    print(f"{'path':<28} {'seconds':>8} {'docs/min':>10} {'first doc':>10} {'model reqs':>10} {'failed':>7}")
+    requests = mock.requests
+    elapsed, expected, failed = run_interactive(records, args.sessions, f"{time.time()}")
+    print(f"{f'chat, {args.sessions} sessions':<28} {elapsed:>8.2f} {len(records) / elapsed * 60:>10.0f} {'':>10} "
+          f"{mock.requests - requests:>10} {failed:>7}")
+
+    failures = [f"{failed} chat turns failed"] if failed else []
+    for workers in (1, 4, 8):
+        requests = mock.requests
+        sessions = app.store.stats()["sessions"]
+        elapsed, first, texts, summary = run_batch(records, workers)
+        mismatched = sum(text != reference for text, reference in zip(texts, expected))
+        print(f"{f'batch, {workers} workers':<28} {elapsed:>8.2f} {len(records) / elapsed * 60:>10.0f} "
+              f"{first * 1000:>8.1f}ms {mock.requests - requests:>10} {summary.get('error', 0):>7}")
+        if summary.get("completed") != len(records) or summary.get("success") != len(records):
+            failures.append(f"batch with {workers} workers finished as {summary}")
+        if summary.get("unique", 0) + summary.get("duplicates", 0) != len(records):
+            failures.append(f"batch with {workers} workers: unique and duplicate counts do not add up")
+        if mismatched:
+            failures.append(f"batch with {workers} workers: {mismatched} documents differ from the chat path")
+        if app.store.stats()["sessions"] != sessions:
+            failures.append(f"batch with {workers} workers stored {app.store.stats()['sessions'] - sessions} sessions")
+    print(f"unique records rendered per batch: {summary.get('unique')} of {len(records)}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
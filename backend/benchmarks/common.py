@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import socket
+import asyncio
+import threading
+import subprocess
+from contextlib import contextmanager
+
+import httpx
+
+from benchmarks.mock_openai import MockCompletionServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def cpu_seconds(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rpartition(")")[2].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except OSError:
+        return 0.0
+
+
+def wait_until_ready(url: str, timeout: float = 20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+@contextmanager
+def background_process(args: list, env: dict | None = None, ready_url: str | None = None):
+    process = subprocess.Popen(
+        [sys.executable, *args],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        if ready_url:
+            wait_until_ready(ready_url)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def start_mock(**options) -> MockCompletionServer:
+    loop = asyncio.new_event_loop()
+    server = MockCompletionServer(**options)
+    threading.Thread(target=loop.run_forever, name="mock", daemon=True).start()
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+    return server
+
+
+@contextmanager
+def mock_server(*extra_args: str):
+    port = free_port()
+    with background_process(
+        ["-m", "benchmarks.mock_openai", "--port", str(port), *extra_args],
+        ready_url=f"http://127.0.0.1:{port}/health",
+    ):
+        yield f"http://127.0.0.1:{port}/v1"
+
+
+@contextmanager
+def backend_server(mode: str, base_url: str, env: dict | None = None):
+    port = free_port()
+    env = {"OPENAI_API_KEY": "mock", "OPENAI_BASE_URL": base_url, **(env or {})}
+
+    if mode == "asgi":
+        args = ["-m", "uvicorn", "asgi:application", "--port", str(port), "--log-level", "warning",
+                "--backlog", "4096", "--limit-concurrency", "100000"]
+    else:
+        args = ["-c", f"from app import app; app.run(port={port}, threaded=True)"]
+
+    with background_process(args, env=env, ready_url=f"http://127.0.0.1:{port}/api/ready") as process:
+        yield f"http://127.0.0.1:{port}", process
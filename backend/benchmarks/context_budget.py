@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import random
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from context_window import ContextWindow, estimate_tokens
+
+PARTY_NAMES = ["Acme Corp", "Globex LLC", "Initech Inc", "Umbrella Partners", "Jane Doe", "John Smith"]
+SECTIONS = ["duration", "jurisdiction", "effective_date", "purpose", "termination", "confidentiality"]
+
+
+def extract_arguments(turn: int, rng: random.Random) -> dict:
+    return {
+        "document_type": "nda",
+        "extracted_data": {
+            "parties": [
+                {"name": name, "role": "party", "address": f"{rng.randint(1, 999)} Market St", "entity_type": "corporation"}
+                for name in PARTY_NAMES[:2 + turn % 4]
+            ],
+            "dates": {"effective_date": "2026-01-01", "duration": f"{1 + turn % 5} years"},
+            "terms": {f"term_{i}": f"Clause text for term {i} agreed on turn {turn}" for i in range(turn % 8)},
+            "additional_provisions": [f"Provision {i} requested by the client" for i in range(turn % 6)]
+        }
+    }
+
+
+def scripted_turn(turn: int, rng: random.Random) -> tuple[str, list]:
+    if turn < 9:
+        return f"Here are more details for turn {turn}.", [("extract_information", extract_arguments(turn, rng))]
+    if turn == 9:
+        data = extract_arguments(turn, rng)["extracted_data"]
+        return "Please generate the NDA now.", [("generate_document", {
+            "document_type": "nda",
+            "document_data": {
+                "title": "Mutual Non-Disclosure Agreement",
+                "parties": data["parties"],
+                "effective_date": "2026-01-01",
+                "terms": data["terms"],
+                "provisions": data["additional_provisions"],
+                "jurisdiction": "Delaware"
+            }
+        })]
+    if turn % 3 == 0:
+        return "Thanks, that looks good so far.", []
+    section = SECTIONS[turn % len(SECTIONS)]
+    return f"Change the {section} please.", [("apply_edits", {
+        "edit_type": "modify",
+        "target_section": section,
+        "original_value": f"old {section} wording " * 8,
+        "new_value": f"new {section} wording agreed on turn {turn} " * 8,
+        "reason": "Client requested revision"
+    })]
+
+
+def run_session(session_id: str, turns: int, window: ContextWindow, rng: random.Random) -> tuple[list, list, float]:
+    messages = app.get_or_create_conversation(session_id)
+    full, sent = [], []
+    build_seconds = 0.0
+
+    for turn in range(turns):
+        user_message, calls = scripted_turn(turn, rng)
+        messages.append({"role": "user", "content": user_message})
+
+        started = time.perf_counter()
+        request_messages = window.build(session_id, messages, app.get_current_document(session_id))
+        build_seconds += time.perf_counter() - started
+        full.append(sum(estimate_tokens(m) for m in messages))
+        sent.append(sum(estimate_tokens(m) for m in request_messages))
+
+        for index, (name, arguments) in enumerate(calls):
+            call_id = f"call_{turn}_{index}"
+            result = app.execute_function_call(name, arguments, session_id)
+            messages.append({
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}]
+            })
+            messages.append({"role": "tool", "tool_call_id": call_id, "content": json.dumps(result)})
+
+        messages.append({"role": "assistant", "content": "Understood. " * rng.randint(10, 40)})
+
+    app.save_conversation(session_id, messages)
+    return full, sent, build_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt-token reduction of the bounded context window")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--max-tokens", type=int, default=8000)
+    parser.add_argument("--full-tool-turns", type=int, default=2)
+    args = parser.parse_args()
+
+    window = ContextWindow(max_tokens=args.max_tokens, full_tool_turns=args.full_tool_turns)
+    rng = random.Random(0)
+    full_total, sent_total, build_total = 0, 0, 0.0
+    full_last, sent_last = [], []
+
+    for index in range(args.sessions):
+        full, sent, build_seconds = run_session(f"bench_context_{index}", args.turns, window, rng)
+        full_total += sum(full)
+        sent_total += sum(sent)
+        build_total += build_seconds
+        full_last.append(full[-1])
+        sent_last.append(sent[-1])
+
+    calls = args.sessions * args.turns
+    print(f"{args.sessions} sessions x {args.turns} turns, max_tokens={args.max_tokens}, full_tool_turns={args.full_tool_turns}")
+    print(f"prompt tokens, full history:   {full_total:>12,}")
+    print(f"prompt tokens, bounded window: {sent_total:>12,}")
+    print(f"reduction:                     {100 * (1 - sent_total / full_total):>11.1f}%")
+    print(f"final-turn prompt (mean):      {sum(full_last) / len(full_last):>12,.0f} -> {sum(sent_last) / len(sent_last):,.0f}")
+    print(f"window build time per call:    {build_total / calls * 1e6:>10.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import random
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from benchmarks.common import percentile
+from document_model import build_document, apply_edit, normalize, reindex
+from document_versions import start_history
+
+
+def synthetic_clauses(count: int, rng: random.Random) -> list:
+    clauses = []
+    for number in range(1, count + 1):
+        text = (
+            f"The \"Term {number}\" obligations apply to each party for the period set out in this clause. "
+            f"Each party shall comply with Section {rng.randint(1, count)} and the Term {rng.randint(1, number)} "
+            f"obligations when performing its duties under this Agreement."
+        )
+        clauses.append({"id": f"clause_{number}", "heading": f"Clause Heading {number}", "text": text})
+    return clauses
+
+
+def linear_edit(document: dict, target_section: str, new_value: str):
+    name = normalize(target_section)
+    for section in document["sections"].values():
+        if normalize(section["heading"]) == name:
+            section["text"] = new_value
+            reindex(document)
+            return section["id"]
+    return None
+
+
+def measure(count: int, edit) -> list:
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        edit()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="apply_edits latency on large structured documents")
+    parser.add_argument("--sections", type=int, default=200)
+    parser.add_argument("--edits", type=int, default=500)
+    parser.add_argument("--prior-edits", type=int, default=1000, help="Edits a stored document takes before it is timed")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    clauses = synthetic_clauses(args.sections, rng)
+    started = time.perf_counter()
+    document = build_document("service_agreement", {}, "Master Services Agreement", clauses)
+    print(f"built {args.sections}-section document in {(time.perf_counter() - started) * 1000:.2f}ms, "
+          f"{sum(len(section['references']) for section in document['sections'].values())} cross references")
+
+    def targets():
+        number = rng.randint(1, args.sections)
+        return rng.choice([f"Clause Heading {number}", f"Section {number}", f"clause_{number}"]), number
+
+    def indexed_edit():
+        target, number = targets()
+        apply_edit(document, "modify", target, "", f"Revised text for Section {number} referencing the Term {number} obligations.")
+
+    def linear():
+        number = rng.randint(1, args.sections)
+        linear_edit(linear_document, f"Clause Heading {number}", f"Revised text for Section {number}.")
+
+    def stored_document() -> str:
+        session_id = f"bench_edits_{time.time()}"
+        document = build_document("service_agreement", {}, "Master Services Agreement", clauses)
+        start_history(document)
+        app.save_document(session_id, document)
+        return session_id
+
+    def tool_call(session_id: str):
+        target, number = targets()
+        app.execute_function_call("apply_edits", {
+            "edit_type": "modify", "target_section": target, "new_value": f"Revised text for Section {number}."
+        }, session_id)
+
+    fresh = stored_document()
+    edited = stored_document()
+    for _ in range(args.prior_edits):
+        tool_call(edited)
+
+    linear_document = build_document("service_agreement", {}, "Master Services Agreement", clauses)
+    print(f"{'edit path':<28} {'p50':>9} {'p99':>9}")
+    for name, edit in (
+        ("indexed apply_edit", indexed_edit),
+        ("linear scan + reindex", linear),
+        ("apply_edits tool call", lambda: tool_call(fresh)),
+        (f"  after {args.prior_edits} edits", lambda: tool_call(edited)),
+    ):
+        timings = measure(args.edits, edit)
+        print(f"{name:<28} {percentile(timings, 50) * 1e6:>7.1f}us {percentile(timings, 99) * 1e6:>7.1f}us")
+    print(f"stored document after {args.prior_edits + args.edits} edits: "
+          f"{len(json.dumps(app.get_current_document(edited))) / 1024:,.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import json
+import time
+import random
+import argparse
+
+from benchmarks.common import percentile
+from benchmarks.document_edits import synthetic_clauses
+from document_model import build_document, apply_edit
+from document_versions import start_history, record_version, get_version, diff_versions, snapshot
+
+
+def edit_document(document: dict, rng: random.Random, sections: int, interval: int, max_checkpoints: int,
+                  full_copies: list):
+    number = rng.randint(1, sections)
+    outcome = apply_edit(document, "modify", f"Section {number}", "",
+                         f"Revised obligations for Section {number}, revision {document['version']}.")
+    record_version(document, {"edit_type": "modify", "target_section": f"Section {number}",
+                              "section_id": outcome["section_id"], "reason": ""},
+                   outcome.get("delta"), interval, max_checkpoints)
+    full_copies.append(snapshot(document))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Version history size and retrieval latency after many edits")
+    parser.add_argument("--sections", type=int, default=50)
+    parser.add_argument("--edits", type=int, default=1000)
+    parser.add_argument("--checkpoint-interval", type=int, default=50)
+    parser.add_argument("--max-checkpoints", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    document = build_document("service_agreement", {}, "Master Services Agreement", synthetic_clauses(args.sections, rng))
+    start_history(document)
+    full_copies = [snapshot(document)]
+
+    started = time.perf_counter()
+    for _ in range(args.edits):
+        edit_document(document, rng, args.sections, args.checkpoint_interval, args.max_checkpoints, full_copies)
+    elapsed = time.perf_counter() - started
+
+    oldest = document["versions"]["checkpoints"][0][0]
+    latest = document["version"]
+    history_bytes = len(json.dumps(document["versions"]))
+    full_bytes = sum(len(json.dumps(copy)) for copy in full_copies[oldest - 1:])
+    print(f"{args.edits} edits on {args.sections} sections in {elapsed * 1000:.1f}ms, versions {oldest}..{latest} retained")
+    print(f"delta history {history_bytes / 1024:,.1f} KiB  vs  full copy per version {full_bytes / 1024:,.1f} KiB")
+
+    for name, lookup in (
+        ("get_version", lambda: get_version(document, rng.randint(oldest, latest))),
+        ("diff_versions", lambda: diff_versions(document, rng.randint(oldest, latest), latest)),
+    ):
+        timings = []
+        for _ in range(args.lookups):
+            started = time.perf_counter()
+            lookup()
+            timings.append(time.perf_counter() - started)
+        print(f"{name:<14} p50 {percentile(timings, 50) * 1e6:>8.1f}us  p99 {percentile(timings, 99) * 1e6:>8.1f}us")
+
+    version = rng.randint(oldest, latest)
+    assert get_version(document, version)["sections"] == {
+        section_id: {**section} for section_id, section in full_copies[version - 1]["sections"].items()
+    }
+
+
+if __name__ == "__main__":
+    main()
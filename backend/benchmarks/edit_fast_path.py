@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from model_client import build_client
+from document_model import document_text
+from edit_fast_path import EditFastPath
+from benchmarks.common import percentile, start_mock
+from benchmarks.mock_openai import load_script
+
+SESSIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sessions", "legal_sessions.json")
+
+
+def edit_turn(turn: dict) -> bool:
+    return bool(turn.get("tool_calls")) and all(call["name"] == "apply_edits" for call in turn["tool_calls"])
+
+
+def run_session(mock, fast_path: EditFastPath, session_id: str, session: dict, result: dict) -> str:
+    app.edit_fast_path = fast_path
+    for turn in session["turns"]:
+        requests = mock.requests
+        started = time.perf_counter()
+        events = [json.loads(frame[6:]) for frame in app.generate_sse_stream(session_id, turn["user"])]
+        elapsed = time.perf_counter() - started
+        if events[-1]["type"] != "done" or not any(event["type"] == "content" for event in events):
+            result["failed"] += 1
+        if edit_turn(turn):
+            result["edit_turns"].append(elapsed)
+            result["edit_requests"] += mock.requests - requests
+        else:
+            result["other_turns"].append(elapsed)
+    return document_text(app.get_current_document(session_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Revision turns with and without the local apply_edits confirmation")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    with open(SESSIONS) as f:
+        sessions = json.load(f)
+    mock = start_mock(script=load_script(SESSIONS), tokens=30, first_token_delay=args.first_token_delay,
+                      token_delay=args.token_delay)
+    app.client = build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT, base_url=mock.base_url)
+
+    modes = {"model follow-up": EditFastPath(False), "fast path": EditFastPath(True)}
+    results = {label: {"edit_turns": [], "other_turns": [], "edit_requests": 0, "failed": 0} for label in modes}
+    mismatches = 0
+    for index in range(args.repeat):
+        for session in sessions:
+            documents = [run_session(mock, fast_path, f"edits_{index}_{session['id']}_{position}", session, results[label])
+                         for position, (label, fast_path) in enumerate(modes.items())]
+            mismatches += documents[0] != documents[1]
+
+    edit_turns = args.repeat * sum(edit_turn(turn) for session in sessions for turn in session["turns"])
+    print(f"{edit_turns} revision turns, first token delay {args.first_token_delay * 1000:.0f}ms, modes interleaved")
+    print(f"{'mode':<16} {'model reqs/edit':>15} {'edit p50':>9} {'edit p95':>9} {'other p50':>10} {'taken':>6} "
+          f"{'fallback':>9} {'saved':>8}")
+    for label, fast_path in modes.items():
+        result = results[label]
+        stats = fast_path.stats()
+        print(
+            f"{label:<16} {result['edit_requests'] / max(1, len(result['edit_turns'])):>15.2f} "
+            f"{percentile(result['edit_turns'], 50) * 1000:>7.0f}ms {percentile(result['edit_turns'], 95) * 1000:>7.0f}ms "
+            f"{percentile(result['other_turns'], 50) * 1000:>8.0f}ms {stats['taken']:>6} {stats['fallback']:>9} "
+            f"{stats['saved_seconds']:>7.2f}s"
+        )
+
+    failed = sum(result["failed"] for result in results.values())
+    if mismatches:
+        print(f"FAIL {mismatches} sessions ended with different documents")
+    if failed:
+        print(f"FAIL {failed} turns ended without content and done")
+    sys.exit(1 if mismatches or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from tools import TOOLS
+from document_model import document_text
+from extracted_data import merge_extracted
+from tool_arguments import compile_tools, validate
+from benchmarks.common import percentile
+
+INTAKES = {
+    "nda": [
+        {"parties": [{"name": "Acme Corp", "role": "disclosing_party"}], "terms": {"purpose": "evaluating an acquisition"}},
+        {"parties": [{"name": "Jane Doe", "role": "receiving_party"}], "dates": {"duration": "2 years"}},
+        {"parties": [{"name": "Acme Corp", "address": "12 Market St, San Francisco, CA", "entity_type": "corporation"},
+                     {"name": "Jane Doe", "address": "48 Elm Ave, Oakland, CA", "entity_type": "individual"}]},
+        {"jurisdiction": "California", "additional_provisions": ["No solicitation of employees for 12 months."]},
+        {"dates": {"effective_date": "March 1, 2026"}, "terms": {"return_period": "30 days"}},
+    ],
+    "employment_agreement": [
+        {"parties": [{"name": "Northwind Labs LLC", "role": "employer", "entity_type": "llc"}]},
+        {"parties": [{"name": "Sam Rivera", "role": "employee", "entity_type": "individual"}],
+         "terms": {"position": "Senior Engineer"}},
+        {"terms": {"start_date": "March 1, 2026", "salary": "$165,000 per year"}},
+        {"terms": {"benefits": "health, dental and 401(k) matching", "notice_period": "four weeks"}},
+        {"jurisdiction": "Washington", "parties": [{"name": "Sam Rivera", "address": "77 Lake Rd, Bellevue, WA"}]},
+    ],
+    "service_agreement": [
+        {"parties": [{"name": "Brightline Studio", "role": "service_provider"}, {"name": "Contoso Ltd", "role": "client"}]},
+        {"terms": {"scope": "website redesign and six months of maintenance"}},
+        {"terms": {"payment_terms": "$12,000 in three milestones"}, "dates": {"duration": "nine months"}},
+        {"jurisdiction": "New York", "additional_provisions": ["Client owns all delivered designs."]},
+    ],
+}
+
+
+def run_intake(session_id: str, document_type: str, deltas: list, full_state: bool) -> dict:
+    sent, state, missing_by_turn = [], {}, []
+    for delta in deltas:
+        state = merge_extracted(state, delta)
+        arguments = {"document_type": document_type, "extracted_data": state if full_state else delta}
+        sent.append(len(json.dumps(arguments)))
+        result = app.execute_function_call("extract_information", arguments, session_id)
+        if result["status"] != "success":
+            raise RuntimeError(result["message"])
+        missing_by_turn.append(result["missing_fields"])
+    extracted = app.get_current_document(session_id)["extracted_data"]
+    app.execute_function_call("generate_document", {"document_type": document_type, "document_data": {}}, session_id)
+    return {"sent": sent, "missing": missing_by_turn, "extracted": extracted,
+            "text": document_text(app.get_current_document(session_id))}
+
+
+def validator_us(compiled: dict, arguments: dict, rounds: int, precompiled: bool) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        specs = compiled["extract_information"][0] if precompiled else compile_tools(TOOLS)["extract_information"][0]
+        validate(specs, arguments)
+        timings.append(time.perf_counter() - started)
+    return percentile(timings, 50) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="extract_information deltas merged server-side against resending the full state")
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'document':<22} {'turns':>5} {'full bytes':>10} {'delta bytes':>11} {'saved':>6}  missing after each turn")
+    for document_type, deltas in INTAKES.items():
+        full = run_intake(f"merge_full_{document_type}_{time.time()}", document_type, deltas, True)
+        delta = run_intake(f"merge_delta_{document_type}_{time.time()}", document_type, deltas, False)
+        saved = 1 - sum(delta["sent"]) / sum(full["sent"])
+        print(f"{document_type:<22} {len(deltas):>5} {sum(full['sent']):>10} {sum(delta['sent']):>11} {saved:>6.0%}  "
+              f"{[len(missing) for missing in delta['missing']]}")
+        if delta["extracted"] != full["extracted"]:
+            failures.append(f"{document_type}: merged deltas differ from the full state")
+        if delta["text"] != full["text"]:
+            failures.append(f"{document_type}: generated documents differ")
+        if delta["missing"][-1]:
+            failures.append(f"{document_type}: still missing {delta['missing'][-1]} after the full intake")
+
+    state = {}
+    for delta in INTAKES["nda"]:
+        state = merge_extracted(state, delta)
+    arguments = {"document_type": "nda", "extracted_data": state}
+    compiled = compile_tools(TOOLS)
+    print(f"validate extract_information: {validator_us(compiled, arguments, args.rounds, True):.1f}us precompiled, "
+          f"{validator_us(compiled, arguments, args.rounds, False):.1f}us compiling per call")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
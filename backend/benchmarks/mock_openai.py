@@ -0,0 +1,305 @@
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from collections import OrderedDict
+
+WORDS = ["The", "agreement", "will", "cover", "the", "parties,", "the", "purpose", "of", "disclosure,", "and", "the", "term."]
+
+PREFIX_BLOCK_CHARS = 512
+MIN_CACHED_CHARS = 4096
+PREFIX_CACHE_SIZE = 100000
+
+EXTRACT_ARGUMENTS = json.dumps({
+    "document_type": "nda",
+    "extracted_data": {
+        "parties": [{"name": "Acme Corp", "role": "disclosing_party", "entity_type": "corporation"}],
+        "dates": {"duration": "2 years"}
+    }
+})
+
+
+def parse_pairs(value: str) -> dict:
+    return dict(item.split("=", 1) for item in value.split(",") if "=" in item)
+
+
+def load_script(path: str | None) -> dict:
+    if not path:
+        return {}
+    with open(path) as f:
+        sessions = json.load(f)
+    return {turn["user"]: turn for session in sessions for turn in session["turns"]}
+
+
+class MockCompletionServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, tokens: int = 40, token_delay: float = 0.01,
+                 first_token_delay: float = 0.05, tool_call_rate: float = 0.0, seed: int = 0,
+                 prompt_cache: bool = False, prefill_delay_per_1k: float = 0.0, script: dict | None = None,
+                 latency_distribution: str = "fixed", latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 retry_after: float = 1.0, concurrency_limit: int = 0, spike_rate: float = 0.0, spike_delay: float = 0.0,
+                 model_speed: dict | None = None, malformed_rate: dict | None = None):
+        self.host = host
+        self.port = port
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.tool_call_rate = tool_call_rate
+        self.random = random.Random(seed)
+        self.latency_random = random.Random(seed + 1)
+        self.script = script or {}
+        self.latency_distribution = latency_distribution
+        self.latency_jitter = latency_jitter
+        self.fault_random = random.Random(seed + 2)
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.concurrency_limit = concurrency_limit
+        self.spike_rate = spike_rate
+        self.spike_delay = spike_delay
+        self.model_speed = model_speed or {}
+        self.malformed_rate = malformed_rate or {}
+        self.active = 0
+        self.rejected = 0
+        self.prompt_cache = prompt_cache
+        self.prefill_delay_per_1k = prefill_delay_per_1k
+        self.prefixes = OrderedDict()
+        self.server = None
+        self.requests = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                path, body = request
+                if path.endswith("/chat/completions") and self.rate_limited():
+                    self.rejected += 1
+                    await self.write_response(writer, 429, b'{"error": {"message": "Rate limit reached", "type": "requests"}}',
+                                              f"retry-after-ms: {int(self.retry_after * 1000)}\r\n")
+                elif path.endswith("/chat/completions"):
+                    self.active += 1
+                    try:
+                        await self.stream_completion(writer, json.loads(body or b"{}"))
+                    finally:
+                        self.active -= 1
+                else:
+                    await self.write_response(writer, 404, b'{"error": {"message": "not found"}}')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader: asyncio.StreamReader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        _, path, _ = request_line.decode().split(" ", 2)
+        content_length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.strip().lower() == "content-length":
+                content_length = int(value.strip())
+        body = await reader.readexactly(content_length) if content_length else b""
+        return path, body
+
+    async def write_response(self, writer: asyncio.StreamWriter, status: int, body: bytes, headers: str = ""):
+        writer.write(
+            f"HTTP/1.1 {status} Mock\r\ncontent-type: application/json\r\ncontent-length: {len(body)}\r\n{headers}\r\n".encode()
+            + body
+        )
+        await writer.drain()
+
+    def rate_limited(self) -> bool:
+        if self.concurrency_limit and self.active >= self.concurrency_limit:
+            return True
+        return bool(self.error_rate) and self.fault_random.random() < self.error_rate
+
+    def chunk(self, delta: dict, finish_reason: str | None = None) -> dict:
+        return {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+
+    def prompt_usage(self, payload: dict) -> tuple[int, int]:
+        text = json.dumps(payload.get("tools") or [], separators=(",", ":")) + "".join(
+            json.dumps(message, separators=(",", ":")) for message in payload.get("messages", [])
+        )
+        cached_chars = 0
+
+        if self.prompt_cache:
+            digest = hashlib.sha256()
+            for end in range(PREFIX_BLOCK_CHARS, len(text) + 1, PREFIX_BLOCK_CHARS):
+                digest.update(text[end - PREFIX_BLOCK_CHARS:end].encode())
+                key = digest.hexdigest()
+                if key in self.prefixes:
+                    self.prefixes.move_to_end(key)
+                    if end >= MIN_CACHED_CHARS:
+                        cached_chars = end
+                else:
+                    self.prefixes[key] = True
+            while len(self.prefixes) > PREFIX_CACHE_SIZE:
+                self.prefixes.popitem(last=False)
+
+        return len(text) // 4, cached_chars // 4
+
+    def delay(self, seconds: float) -> float:
+        if not seconds or self.latency_distribution == "fixed" or not self.latency_jitter:
+            return seconds
+        if self.latency_distribution == "uniform":
+            return seconds * self.latency_random.uniform(1 - self.latency_jitter, 1 + self.latency_jitter)
+        return seconds * self.latency_random.lognormvariate(0, self.latency_jitter)
+
+    def malformed(self, payload: dict) -> bool:
+        rate = self.malformed_rate.get(payload.get("model"), 0.0)
+        return bool(rate) and self.fault_random.random() < rate
+
+    def tool_call_chunks(self, calls: list, malformed: bool = False) -> list:
+        chunks = []
+        for index, (name, arguments) in enumerate(calls):
+            if malformed and index == 0:
+                arguments = arguments[:len(arguments) // 2]
+            call_id = f"call_mock_{self.requests}_{index}"
+            chunks.append(self.chunk({"role": "assistant", "tool_calls": [{
+                "index": index, "id": call_id, "type": "function", "function": {"name": name, "arguments": ""}
+            }]}))
+            chunks += [self.chunk({"tool_calls": [{"index": index, "function": {"arguments": arguments[i:i + 16]}}]})
+                       for i in range(0, len(arguments), 16)]
+        chunks.append(self.chunk({}, "tool_calls"))
+        return chunks
+
+    def content_chunks(self, text: str | None = None) -> list:
+        pieces = [WORDS[i % len(WORDS)] + " " for i in range(self.tokens)] if text is None else [
+            word + " " for word in text.split(" ")
+        ]
+        chunks = [self.chunk({"role": "assistant", "content": ""})]
+        chunks += [self.chunk({"content": piece}) for piece in pieces]
+        chunks.append(self.chunk({}, "stop"))
+        return chunks
+
+    def scripted(self, payload: dict, messages: list) -> list | None:
+        user = next((message for message in reversed(messages) if message["role"] == "user"), None)
+        turn = self.script.get(user["content"]) if user else None
+        if turn is None:
+            return None
+        if messages[-1]["role"] == "user" and turn.get("tool_calls"):
+            return self.tool_call_chunks([(call["name"], json.dumps(call["arguments"])) for call in turn["tool_calls"]],
+                                         self.malformed(payload))
+        return self.content_chunks(turn.get("reply"))
+
+    def script_chunks(self, payload: dict) -> list:
+        messages = payload.get("messages", [])
+        last_role = messages[-1]["role"] if messages else "user"
+
+        scripted = self.scripted(payload, messages) if self.script and messages else None
+        if scripted:
+            return scripted
+
+        if last_role == "user" and payload.get("tools") and self.random.random() < self.tool_call_rate:
+            return self.tool_call_chunks([("extract_information", EXTRACT_ARGUMENTS)], self.malformed(payload))
+        return self.content_chunks()
+
+    async def stream_completion(self, writer: asyncio.StreamWriter, payload: dict):
+        self.requests += 1
+        chunks = self.script_chunks(payload)
+        prompt_tokens, cached_tokens = self.prompt_usage(payload)
+        speed = self.model_speed.get(payload.get("model"), 1.0)
+
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            usage_chunk = self.chunk({})
+            usage_chunk["choices"] = []
+            usage_chunk["usage"] = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(chunks) - 2,
+                "total_tokens": prompt_tokens + len(chunks) - 2,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }
+            chunks.append(usage_chunk)
+
+        writer.write(b"HTTP/1.1 200 OK\r\ncontent-type: text/event-stream\r\ntransfer-encoding: chunked\r\n\r\n")
+        spike = self.spike_delay if self.spike_rate and self.fault_random.random() < self.spike_rate else 0.0
+        await asyncio.sleep(speed * (self.delay(self.first_token_delay) + self.prefill_delay_per_1k * (prompt_tokens - cached_tokens) / 1000)
+                            + spike)
+
+        for index, chunk in enumerate(chunks):
+            if index and self.token_delay:
+                await asyncio.sleep(speed * self.delay(self.token_delay))
+            data = f"data: {json.dumps(chunk)}\n\n".encode()
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()
+
+        data = b"data: [DONE]\n\n"
+        writer.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(data), data))
+        await writer.drain()
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--tool-call-rate", type=float, default=0.0)
+    parser.add_argument("--prompt-cache", action="store_true")
+    parser.add_argument("--prefill-delay-per-1k", type=float, default=0.0)
+    parser.add_argument("--script", help="Session fixture whose turns decide tool calls and replies")
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "lognormal"], default="fixed")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of completions rejected with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--concurrency-limit", type=int, default=0, help="Reject with 429 beyond this many open streams")
+    parser.add_argument("--spike-rate", type=float, default=0.0, help="Fraction of completions with an extra first-token delay")
+    parser.add_argument("--spike-delay", type=float, default=0.0)
+    parser.add_argument("--model-speed", default="", help="Delay multipliers by model, e.g. gpt-4o-mini=0.4")
+    parser.add_argument("--malformed-rate", default="", help="Share of truncated tool arguments by model, e.g. gpt-4o-mini=0.2")
+
+
+async def serve(args):
+    server = MockCompletionServer(
+        port=args.port,
+        tokens=args.tokens,
+        token_delay=args.token_delay,
+        first_token_delay=args.first_token_delay,
+        tool_call_rate=args.tool_call_rate,
+        prompt_cache=args.prompt_cache,
+        prefill_delay_per_1k=args.prefill_delay_per_1k,
+        script=load_script(args.script),
+        latency_distribution=args.latency_distribution,
+        latency_jitter=args.latency_jitter,
+        seed=args.seed,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        concurrency_limit=args.concurrency_limit,
+        spike_rate=args.spike_rate,
+        spike_delay=args.spike_delay,
+        model_speed={model: float(value) for model, value in parse_pairs(args.model_speed).items()},
+        malformed_rate={model: float(value) for model, value in parse_pairs(args.malformed_rate).items()},
+    )
+    await server.start()
+    print(f"Mock completion server listening on {server.base_url}", flush=True)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake OpenAI streaming chat-completions server")
+    parser.add_argument("--port", type=int, default=8900)
+    add_arguments(parser)
+    asyncio.run(serve(parser.parse_args()))
@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from model_client import build_client
+from model_router import ModelRouter
+from tool_arguments import check_arguments, compile_tools
+from tools import TOOLS
+from benchmarks.common import percentile, start_mock
+from benchmarks.mock_openai import load_script
+
+SESSIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sessions", "legal_sessions.json")
+TIERS = {"small": "gpt-4o-mini", "large": "gpt-4o"}
+SCHEMAS = compile_tools(TOOLS)
+ROUTES = {"gather": "small", "reply": "small", "generate": "large", "edit": "large"}
+CONFIGS = [
+    ("single tier", {}, True),
+    ("routed", ROUTES, False),
+    ("routed+escalate", ROUTES, True),
+]
+
+
+def run_session(session_id: str, session: dict) -> dict:
+    turns, bad_calls, failed = [], 0, 0
+    for turn in session["turns"]:
+        started = time.perf_counter()
+        events = [json.loads(frame[6:]) for frame in app.generate_sse_stream(session_id, turn["user"])]
+        turns.append(time.perf_counter() - started)
+        bad_calls += sum(event["type"] == "tool_call" and bool(check_arguments(
+            SCHEMAS.get(event["function"]), json.dumps(event["arguments"])
+        )) for event in events)
+        failed += events[-1]["type"] != "done"
+    return {"turns": turns, "bad_calls": bad_calls, "failed": failed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model tiers per round on scripted legal sessions")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--small-speed", type=float, default=0.4)
+    parser.add_argument("--malformed-rate", type=float, default=0.2)
+    parser.add_argument("--first-token-delay", type=float, default=0.15)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    with open(SESSIONS) as f:
+        sessions = json.load(f)
+    mock = start_mock(script=load_script(SESSIONS), tokens=30, first_token_delay=args.first_token_delay,
+                      token_delay=args.token_delay, model_speed={TIERS["small"]: args.small_speed},
+                      malformed_rate={TIERS["small"]: args.malformed_rate})
+    app.client = build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT, base_url=mock.base_url)
+
+    turns = args.repeat * sum(len(session["turns"]) for session in sessions)
+    print(f"{turns} turns, small tier {args.small_speed:g}x latency with {args.malformed_rate:.0%} truncated tool arguments")
+    print(f"{'config':<16} {'small rounds':>12} {'large rounds':>12} {'small tok':>10} {'large tok':>10} "
+          f"{'escalated':>9} {'turn p50':>9} {'turn p95':>9} {'bad calls':>9}")
+
+    failures = []
+    for label, routes, escalate in CONFIGS:
+        app.model_router = ModelRouter(TIERS, routes, escalate)
+        results = [run_session(f"routing_{label}_{index}_{session['id']}", session)
+                   for index in range(args.repeat) for session in sessions]
+        stats = app.model_router.stats()
+        usage = stats["usage"]
+        times = [seconds for result in results for seconds in result["turns"]]
+        bad_calls = sum(result["bad_calls"] for result in results)
+        failed = sum(result["failed"] for result in results)
+        print(
+            f"{label:<16} {usage['small']['rounds']:>12} {usage['large']['rounds']:>12} "
+            f"{usage['small']['prompt_tokens'] + usage['small']['completion_tokens']:>10} "
+            f"{usage['large']['prompt_tokens'] + usage['large']['completion_tokens']:>10} "
+            f"{sum(stats['escalations'].values()):>9} {percentile(times, 50) * 1000:>7.0f}ms "
+            f"{percentile(times, 95) * 1000:>7.0f}ms {bad_calls:>9}"
+        )
+        if stats["escalations"]:
+            print(f"{'':<16} {stats['escalations']}")
+        if failed:
+            failures.append(f"{label}: {failed} turns ended without done")
+        if escalate and bad_calls:
+            failures.append(f"{label}: {bad_calls} tool calls ran with invalid arguments despite escalation")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
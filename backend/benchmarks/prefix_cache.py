@@ -0,0 +1,60 @@
+import os
+import time
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from model_client import build_client
+import completion_request
+from benchmarks.common import mock_server
+
+
+def volatile_first_request(messages: list, model: str = completion_request.MODEL, tool_choice: str = "auto") -> dict:
+    params = completion_request.build_completion_request(messages, model, tool_choice)
+    stamp = {"role": "system", "content": f"Request time: {time.time()}"}
+    params["messages"] = [params["messages"][0], stamp, *params["messages"][1:]]
+    return params
+
+
+def run(base_url: str, sessions: int, turns: int, layout) -> dict:
+    app.client = build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT, base_url=base_url)
+    app.prompt_cache = completion_request.PromptCacheStats()
+    app.build_completion_request = layout
+
+    for session in range(sessions):
+        session_id = f"bench_prefix_{layout.__name__}_{session}_{time.time()}"
+        for turn in range(turns):
+            for _ in app.generate_sse_stream(session_id, f"Turn {turn}: here is more information about the NDA."):
+                pass
+
+    return app.prompt_cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached prompt tokens and TTFT against a mock with prefix caching")
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--prefill-delay-per-1k", type=float, default=0.08)
+    args = parser.parse_args()
+
+    mock_args = ["--tokens", "20", "--token-delay", "0", "--first-token-delay", "0.02",
+                 "--tool-call-rate", "0.5", "--prefill-delay-per-1k", str(args.prefill_delay_per_1k)]
+    scenarios = [
+        ("no provider cache", mock_args, completion_request.build_completion_request),
+        ("stable prefix", [*mock_args, "--prompt-cache"], completion_request.build_completion_request),
+        ("volatile data first", [*mock_args, "--prompt-cache"], volatile_first_request),
+    ]
+
+    print(f"{'scenario':<22} {'requests':>9} {'prompt tok':>11} {'cached':>8} {'mean ttft':>10}")
+    for name, scenario_args, layout in scenarios:
+        with mock_server(*scenario_args) as base_url:
+            stats = run(base_url, args.sessions, args.turns, layout)
+        print(
+            f"{name:<22} {stats['requests']:>9} {stats['prompt_tokens']:>11,} "
+            f"{stats['cached_token_ratio'] * 100:>7.1f}% {stats['mean_ttft'] * 1000:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
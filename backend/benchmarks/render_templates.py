@@ -0,0 +1,50 @@
+import time
+import argparse
+
+from document_templates import TEMPLATE_SOURCES, CompiledTemplate, get_compiled_template
+
+DOCUMENT_DATA = {
+    "parties": [
+        {"name": "Acme Corp", "role": "disclosing_party", "entity_type": "corporation", "address": "1 Market St, San Francisco"},
+        {"name": "Jane Doe", "role": "receiving_party", "entity_type": "individual"}
+    ],
+    "effective_date": "January 1, 2025",
+    "terms": {
+        "purpose": "evaluating a potential acquisition",
+        "duration": "3 years",
+        "position": "Senior Engineer",
+        "compensation": "$150,000 per year",
+        "scope": "software development services",
+        "non_solicitation": "12 months"
+    },
+    "provisions": ["No reverse engineering of prototypes", "Mutual non-disparagement"],
+    "jurisdiction": "the State of Delaware"
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders per second for each compiled document template")
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    for document_type, source in TEMPLATE_SOURCES.items():
+        CompiledTemplate(document_type, source)
+    compile_ms = (time.perf_counter() - started) * 1000
+    print(f"compiled {len(TEMPLATE_SOURCES)} templates in {compile_ms:.2f}ms")
+
+    print(f"{'document_type':<24} {'renders/s':>10} {'mean':>9} {'chars':>7}")
+    for document_type in TEMPLATE_SOURCES:
+        template = get_compiled_template(document_type)
+        renders = 0
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        while time.perf_counter() < deadline:
+            content = template.render(DOCUMENT_DATA)
+            renders += 1
+        elapsed = time.perf_counter() - started
+        print(f"{document_type:<24} {renders / elapsed:>10,.0f} {elapsed / renders * 1e6:>7.1f}us {len(content):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from document_model import document_text
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "tool_loop")
+
+
+def load_fixture(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_fixture(path: str, fixture: dict):
+    rounds = ",\n".join(
+        "  [\n" + ",\n".join(f"   {json.dumps(chunk)}" for chunk in chunks) + "\n  ]"
+        for chunks in fixture["rounds"]
+    )
+    header = {key: value for key, value in fixture.items() if key != "rounds"}
+    with open(path, "w") as f:
+        f.write(json.dumps(header, indent=1)[:-2] + f',\n "rounds": [\n{rounds}\n ]\n}}\n')
+
+
+def fixture_source(rounds: list, requests: list):
+    remaining = iter(rounds)
+
+    def completion_chunks(params: dict):
+        requests.append(params)
+        return iter(next(remaining))
+
+    return completion_chunks
+
+
+def describe_event(event: dict) -> str:
+    return f"{event['type']}:{event['function']}" if "function" in event else event["type"]
+
+
+def normalize_events(events: list) -> list:
+    normalized, results = [], []
+    for event in events + [None]:
+        if event and event.startswith("tool_result:"):
+            results.append(event)
+            continue
+        normalized.extend(sorted(results))
+        results = []
+        if event:
+            normalized.append(event)
+    return normalized
+
+
+def describe_message(message: dict) -> str:
+    if message.get("tool_calls"):
+        return f"assistant[{','.join(call['id'] for call in message['tool_calls'])}]"
+    if message["role"] == "tool":
+        return f"tool:{message['tool_call_id']}"
+    return message["role"]
+
+
+def describe_document(document: dict | None) -> dict | None:
+    if document is None:
+        return None
+    return {
+        "document_type": document.get("type") or document.get("document_type"),
+        "version": document.get("version"),
+        "extracted_data": document.get("extracted_data"),
+        "text": document_text(document),
+        "history": [{key: value for key, value in edit.items() if key != "timestamp"}
+                    for edit in document.get("history") or []]
+    }
+
+
+def replay(fixture: dict, session_id: str) -> dict:
+    app.TOOL_MAX_ROUNDS = fixture.get("max_rounds", 5)
+    app.TOOL_ARGUMENT_RETRIES = fixture.get("argument_retries", 1)
+    requests = []
+    source = fixture_source(fixture["rounds"], requests)
+
+    events = [
+        json.loads(line[6:])
+        for line in app.generate_sse_stream(session_id, fixture["user_message"], completion_chunks=source)
+    ]
+    messages = app.get_or_create_conversation(session_id)
+
+    return {
+        "events": normalize_events([describe_event(event) for event in events]),
+        "tool_choices": [params["tool_choice"] for params in requests],
+        "messages": [describe_message(message) for message in messages[1:] if message["role"] != "tool"],
+        "tool_results": sorted(message["tool_call_id"] for message in messages if message["role"] == "tool"),
+        "tool_outputs": sorted(([event["function"], event["result"]] for event in events if event["type"] == "tool_result"),
+                               key=json.dumps),
+        "document": describe_document(app.get_current_document(session_id))
+    }
+
+
+def check_message_order(session_id: str) -> list:
+    problems = []
+    open_calls = set()
+    for message in app.get_or_create_conversation(session_id)[1:]:
+        if message["role"] == "tool":
+            if message["tool_call_id"] not in open_calls:
+                problems.append(f"tool message {message['tool_call_id']} has no preceding assistant tool call")
+            open_calls.discard(message["tool_call_id"])
+        else:
+            if open_calls:
+                problems.append(f"tool calls {sorted(open_calls)} not answered before {message['role']} message")
+            open_calls = {call["id"] for call in message.get("tool_calls") or []}
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded completion chunks through the tool loop")
+    parser.add_argument("--update-expected", action="store_true")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    failures = 0
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.json"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        fixture = load_fixture(path)
+        session_id = f"replay_{name}_{time.time()}"
+        observed = replay(fixture, session_id)
+        problems = check_message_order(session_id)
+
+        if args.update_expected:
+            fixture["expected"] = observed
+            write_fixture(path, fixture)
+
+        expected = fixture.get("expected") or {}
+        for key, value in observed.items():
+            if key not in expected:
+                problems.append(f"{key}: no expected value recorded")
+            elif expected[key] != value:
+                problems.append(f"{key}: expected {expected[key]}, got {value}")
+
+        started = time.perf_counter()
+        for iteration in range(args.iterations):
+            replay(fixture, f"replay_{name}_bench_{iteration}")
+        elapsed = time.perf_counter() - started
+
+        failures += bool(problems)
+        status = "FAIL" if problems else "ok"
+        print(f"{status:<5} {name:<26} {len(observed['events']):>4} events  {elapsed / args.iterations * 1e6:>8.1f}us/turn")
+        for problem in problems:
+            print(f"      {problem}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from model_client import build_client
+from tool_loop import ToolLoop
+from response_cache import ResponseCache, replay_chunks
+from benchmarks.common import percentile, start_mock
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sessions", "openings.json")
+
+
+def run_turn(session_id: str, message: str) -> tuple[float, float, list]:
+    started = time.perf_counter()
+    first = None
+    events = []
+    for frame in app.generate_sse_stream(session_id, message):
+        event = json.loads(frame[6:])
+        if first is None and event["type"] in ("content", "tool_call"):
+            first = time.perf_counter() - started
+        events.append(event)
+    return first or 0.0, time.perf_counter() - started, events
+
+
+def replay(sessions: list, label: str) -> dict:
+    first_times, turn_times = [], []
+    errors = 0
+    for index, session in enumerate(sessions):
+        session_id = f"cache_{label}_{index}_{session['id']}"
+        for message in session["messages"]:
+            first, total, events = run_turn(session_id, message)
+            first_times.append(first)
+            turn_times.append(total)
+            types = [event["type"] for event in events]
+            errors += "error" in types or types[-1] != "done"
+    return {"first": first_times, "turns": turn_times, "errors": errors}
+
+
+def malformed_entries(cache: ResponseCache) -> int:
+    malformed = 0
+    for entry in list(cache.entries.values()):
+        loop = ToolLoop([], max_rounds=1, schemas=app.TOOL_SCHEMAS)
+        loop.start_round()
+        for chunk in replay_chunks(entry["chunks"]):
+            loop.feed(chunk)
+        malformed += bool(loop.check_arguments())
+    return malformed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a corpus of opening turns with the response cache off and on")
+    parser.add_argument("--passes", type=int, default=2)
+    parser.add_argument("--similarity", default="1.0,0.8")
+    parser.add_argument("--first-token-delay", type=float, default=0.25)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--tool-call-rate", type=float, default=0.3)
+    parser.add_argument("--malformed-rate", type=float, default=0.2, help="Share of truncated tool arguments")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(CORPUS) as corpus:
+        openings = json.load(corpus)
+    rng = random.Random(args.seed)
+    sessions = [session for _ in range(args.passes) for session in rng.sample(openings, len(openings))]
+
+    mock = start_mock(tokens=30, token_delay=args.token_delay, first_token_delay=args.first_token_delay,
+                      tool_call_rate=args.tool_call_rate, seed=args.seed,
+                      malformed_rate={app.model_router.model(tier): args.malformed_rate for tier in app.model_router.order})
+    app.client = build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT, base_url=mock.base_url)
+    turns = sum(len(session["messages"]) for session in sessions)
+    print(f"{len(sessions)} sessions, {turns} turns, first token delay {args.first_token_delay * 1000:.0f}ms")
+    print(f"{'cache':<14} {'hit rate':>8} {'exact':>6} {'similar':>8} {'model reqs':>10} "
+          f"{'first p50':>10} {'first p95':>10} {'turn p50':>9} {'turn p95':>9}")
+
+    failures = 0
+    for similarity in [None, *(float(value) for value in args.similarity.split(","))]:
+        app.response_cache = ResponseCache(max_entries=1000, max_bytes=16 * 1024 * 1024, ttl_seconds=3600,
+                                           similarity=similarity) if similarity is not None else None
+        before = mock.requests
+        result = replay(sessions, "off" if similarity is None else f"{similarity:g}")
+        stats = app.response_cache.stats() if app.response_cache else {}
+        cached_malformed = malformed_entries(app.response_cache) if app.response_cache else 0
+        failures += result["errors"] + cached_malformed
+        label = "off" if similarity is None else ("exact" if similarity >= 1 else f"similar {similarity:g}")
+        print(
+            f"{label:<14} {stats.get('hit_rate', 0.0):>8.1%} {stats.get('exact_hits', 0):>6} "
+            f"{stats.get('similar_hits', 0):>8} {mock.requests - before:>10} "
+            f"{percentile(result['first'], 50) * 1000:>8.1f}ms {percentile(result['first'], 95) * 1000:>8.1f}ms "
+            f"{percentile(result['turns'], 50) * 1000:>7.1f}ms {percentile(result['turns'], 95) * 1000:>7.1f}ms"
+        )
+        if cached_malformed:
+            print(f"{cached_malformed} cached responses carry malformed tool arguments")
+
+    if failures:
+        print(f"{failures} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
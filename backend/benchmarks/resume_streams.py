@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from model_client import build_client
+import asgi
+from benchmarks.common import start_mock
+
+
+def parse_frames(body: str) -> list:
+    events = []
+    for frame in body.split("\n\n"):
+        event_id, event = None, None
+        for line in frame.splitlines():
+            if line.startswith("id: "):
+                event_id = int(line[4:])
+            elif line.startswith("data: "):
+                event = json.loads(line[6:])
+        if event is not None:
+            events.append((event_id, event))
+    return events
+
+
+class Transcript:
+    def __init__(self):
+        self.ids = []
+        self.events = []
+        self.connections = 0
+
+    def add(self, body: str) -> bool:
+        finished = False
+        for event_id, event in parse_frames(body):
+            self.ids.append(event_id)
+            self.events.append(event)
+            finished = finished or event["type"] in ("done", "error")
+        return finished
+
+    @property
+    def last_id(self) -> int | None:
+        return self.ids[-1] if self.ids else None
+
+    def problems(self) -> list:
+        problems = []
+        if any(event_id is None for event_id in self.ids):
+            problems.append("event without id")
+        elif any(b != a + 1 for a, b in zip(self.ids, self.ids[1:])):
+            problems.append(f"ids not contiguous: {self.ids}")
+        types = [event["type"] for event in self.events]
+        if types.count("done") != 1 or types[-1] != "done":
+            problems.append(f"expected exactly one trailing done, got {types}")
+        if "stream_gap" in types:
+            problems.append("replay buffer lost events")
+        return problems
+
+    def model_requests(self) -> int:
+        return 1 + any(event["type"] == "tool_call" for event in self.events)
+
+
+def run_wsgi_turn(client, session_id: str, message: str, rng: random.Random, drop_rate: float) -> Transcript:
+    transcript = Transcript()
+    headers = {}
+    while True:
+        response = client.post("/api/chat", json={"message": message, "session_id": session_id},
+                               headers=headers, buffered=False)
+        if response.status_code == 409:
+            response.close()
+            time.sleep(0.005)
+            continue
+        transcript.connections += 1
+        budget = rng.randint(1, 12) if rng.random() < drop_rate else None
+        received = 0
+        finished = False
+        for chunk in response.response:
+            finished = transcript.add(chunk.decode() if isinstance(chunk, bytes) else chunk)
+            received += 1
+            if finished or received == budget:
+                break
+        response.close()
+        if finished:
+            return transcript
+        headers = {"Last-Event-ID": str(transcript.last_id or 0)}
+        time.sleep(rng.random() * 0.02)
+
+
+async def run_asgi_turn(session_id: str, message: str, rng: random.Random, drop_rate: float) -> Transcript:
+    transcript = Transcript()
+    headers = []
+    while True:
+        transcript.connections += 1
+        body = json.dumps({"message": message, "session_id": session_id}).encode()
+        disconnect = asyncio.Event()
+        requested = False
+        budget = rng.randint(1, 12) if rng.random() < drop_rate else None
+        received = 0
+        finished = False
+        status = None
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict):
+            nonlocal finished, received, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            if status != 200 or message["type"] != "http.response.body" or not message.get("body") or disconnect.is_set():
+                return
+            finished = transcript.add(message["body"].decode()) or finished
+            received += 1
+            if received == budget:
+                disconnect.set()
+
+        scope = {"type": "http", "method": "POST", "path": "/api/chat", "query_string": b"",
+                 "headers": [(b"content-type", b"application/json"), *headers]}
+        await asgi.application(scope, receive, send)
+        disconnect.set()
+        if status == 409:
+            transcript.connections -= 1
+            await asyncio.sleep(0.005)
+            continue
+        if finished:
+            return transcript
+        headers = [(b"last-event-id", str(transcript.last_id or 0).encode())]
+        await asyncio.sleep(rng.random() * 0.02)
+
+
+def report(mode: str, transcripts: list, requests: int) -> int:
+    problems = [problem for transcript in transcripts for problem in transcript.problems()]
+    expected_requests = sum(transcript.model_requests() for transcript in transcripts)
+    if requests != expected_requests:
+        problems.append(f"model requests {requests}, expected {expected_requests}")
+    reconnects = sum(transcript.connections - 1 for transcript in transcripts)
+    events = sum(len(transcript.events) for transcript in transcripts)
+    status = "FAIL" if problems else "ok"
+    print(f"{status:<5} {mode:<5} {len(transcripts):>4} turns {reconnects:>5} reconnects {events:>6} events "
+          f"{requests:>5} model requests")
+    for problem in problems[:10]:
+        print(f"      {problem}")
+    return bool(problems)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop chat streams at random points and resume with Last-Event-ID")
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--drop-rate", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock = start_mock(tokens=30, token_delay=0.002, first_token_delay=0.01, tool_call_rate=0.5, seed=args.seed)
+    app.client = build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT, base_url=mock.base_url)
+    app.async_client = build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT, asynchronous=True,
+                                    base_url=mock.base_url)
+    rng = random.Random(args.seed)
+    failures = 0
+
+    client = app.app.test_client()
+    before = mock.requests
+    transcripts = [
+        run_wsgi_turn(client, f"resume_wsgi_{turn % 5}_{args.seed}", f"Turn {turn}: I need an NDA", rng, args.drop_rate)
+        for turn in range(args.turns)
+    ]
+    failures += report("wsgi", transcripts, mock.requests - before)
+
+    async def run_asgi() -> list:
+        return [
+            await run_asgi_turn(f"resume_asgi_{turn % 5}_{args.seed}", f"Turn {turn}: I need an NDA", rng, args.drop_rate)
+            for turn in range(args.turns)
+        ]
+
+    before = mock.requests
+    transcripts = asyncio.run(run_asgi())
+    failures += report("asgi", transcripts, mock.requests - before)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from model_client import build_client
+from session_store import MemorySessionStore
+from session_journal import SessionJournal
+from benchmarks.common import percentile, start_mock
+
+
+class SyncJournal(SessionJournal):
+    def append(self, op: str, session_id: str, payload: str):
+        super().append(op, session_id, payload)
+        self.flush()
+
+
+def timed_store(store: MemorySessionStore, timings: list) -> MemorySessionStore:
+    for name in ("save_conversation", "save_document"):
+        method = getattr(store, name)
+
+        def wrapper(*args, method=method):
+            started = time.perf_counter()
+            method(*args)
+            timings.append(time.perf_counter() - started)
+
+        setattr(store, name, wrapper)
+    return store
+
+
+def stream_latency(modes: list, directory: str, sessions: int, turns: int) -> list:
+    results = []
+    for label, journal_class in modes:
+        journal = journal_class(os.path.join(directory, label.replace(" ", "_")), flush_interval=0.05,
+                                compact_bytes=64 * 1024 * 1024) if journal_class else None
+        result = {"label": label, "journal": journal, "store": [], "first": [], "turns": []}
+        result["session_store"] = timed_store(MemorySessionStore(3600, 100000, 1 << 30, journal), result["store"])
+        results.append(result)
+
+    for turn in range(turns):
+        for session in range(sessions):
+            for result in results:
+                app.store = result["session_store"]
+                started = time.perf_counter()
+                first = None
+                for _ in app.generate_sse_stream(f"journal_{session}", f"Turn {turn}: the NDA should last 2 years"):
+                    first = first or time.perf_counter() - started
+                result["first"].append(first)
+                result["turns"].append(time.perf_counter() - started)
+
+    for result in results:
+        if result["journal"]:
+            result["journal"].close()
+    return results
+
+
+def recovery(directory: str, sessions: int, messages: int) -> tuple[bool, list]:
+    journal = SessionJournal(directory, flush_interval=0.05, compact_bytes=1 << 40)
+    store = MemorySessionStore(86400, sessions, 1 << 40, journal)
+    for session in range(sessions):
+        session_id = f"recover_{session}"
+        conversation = [{"role": "system", "content": "You are a legal document assistant."}]
+        store.save_conversation(session_id, conversation)
+        for turn in range(messages):
+            conversation.append({"role": "user" if turn % 2 == 0 else "assistant",
+                                 "content": f"Message {turn} about the agreement for session {session}"})
+            store.save_conversation(session_id, conversation)
+        store.save_document(session_id, {"extracted_data": {"parties": [{"name": f"Party {session}"}]},
+                                         "document_type": "nda", "content": None})
+    expected = {session_id: (entry["conversation"], entry["document"]) for session_id, entry in store.entries.items()}
+    journal.close()
+    written = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    del store
+
+    rows = []
+    ok = True
+    for label in ("journal", "snapshot"):
+        journal = SessionJournal(directory, flush_interval=0.05, compact_bytes=1 << 40)
+        store = MemorySessionStore(86400, sessions, 1 << 40, journal)
+        journal.compacting.join()
+        recovered = {session_id: (entry["conversation"], entry["document"]) for session_id, entry in store.entries.items()}
+        ok = ok and recovered == expected
+        size = written if label == "journal" else sum(
+            os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+        )
+        rows.append((label, len(recovered), size, journal.counters["recovery_seconds"], journal.counters["compaction_seconds"]))
+        journal.close()
+        del store, recovered
+    return ok, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming latency with the session journal, and recovery time")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--recover-sessions", type=int, default=100000)
+    parser.add_argument("--recover-messages", type=int, default=6)
+    args = parser.parse_args()
+
+    mock = start_mock(tokens=20, token_delay=0, first_token_delay=0, tool_call_rate=0.5)
+    app.client = build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT, base_url=mock.base_url)
+    directory = tempfile.mkdtemp(prefix="session-journal-")
+    try:
+        modes = [("off", None), ("write-behind", SessionJournal), ("fsync inline", SyncJournal)]
+        print(f"streaming: {args.sessions} sessions x {args.turns} turns, modes interleaved turn by turn")
+        print(f"{'journal':<13} {'store p50':>10} {'store p99':>10} {'first p50':>10} {'turn p50':>9} {'turn p99':>9} {'fsyncs':>7}")
+        for result in stream_latency(modes, directory, args.sessions, args.turns):
+            fsyncs = result["journal"].counters["flushes"] if result["journal"] else 0
+            print(
+                f"{result['label']:<13} {percentile(result['store'], 50) * 1e6:>8.0f}us "
+                f"{percentile(result['store'], 99) * 1e6:>8.0f}us {percentile(result['first'], 50) * 1000:>8.2f}ms "
+                f"{percentile(result['turns'], 50) * 1000:>7.2f}ms {percentile(result['turns'], 99) * 1000:>7.2f}ms {fsyncs:>7}"
+            )
+
+        recover_dir = os.path.join(directory, "recovery")
+        ok, rows = recovery(recover_dir, args.recover_sessions, args.recover_messages)
+        print(f"\nrecovery: {args.recover_sessions} sessions, {args.recover_messages + 1} messages and a document each")
+        print(f"{'source':<10} {'sessions':>9} {'on disk':>10} {'replay':>9} {'compaction':>11}")
+        for label, sessions, size, seconds, compaction in rows:
+            print(f"{label:<10} {sessions:>9} {size / 1e6:>8.1f}MB {seconds:>8.2f}s {compaction:>10.2f}s")
+        print("recovered state matches" if ok else "FAIL recovered state differs from what was written")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from model_client import build_client
+import asgi
+from benchmarks.common import mock_server
+from sse import content_event
+
+TOKENS = ["The", " agreement", " will", " cover", " the", " parties", ",", " the", " purpose", " of", " disclosure", "."]
+
+
+def legacy_content_event(content: str) -> str:
+    return f"data: {json.dumps({'type': 'content', 'content': content})}\n\n"
+
+
+def encoder_ns(encode, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for token in TOKENS:
+            encode(token)
+    return (time.perf_counter() - started) / (rounds * len(TOKENS)) * 1e9
+
+
+def wsgi_response(client, session_id: str) -> tuple[int, int, int]:
+    response = client.post("/api/chat", json={"message": "Draft an NDA", "session_id": session_id}, buffered=False)
+    received = writes = events = 0
+    for chunk in response.response:
+        chunk = chunk.encode() if isinstance(chunk, str) else chunk
+        received += len(chunk)
+        writes += 1
+        events += chunk.count(b"data: ")
+    response.close()
+    return received, writes, events
+
+
+async def asgi_response(session_id: str) -> tuple[int, int, int]:
+    body = json.dumps({"message": "Draft an NDA", "session_id": session_id}).encode()
+    totals = [0, 0, 0]
+    requested = asyncio.Event()
+
+    async def receive():
+        if not requested.is_set():
+            requested.set()
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message: dict):
+        if message["type"] == "http.response.body" and message.get("body"):
+            totals[0] += len(message["body"])
+            totals[1] += 1
+            totals[2] += message["body"].count(b"data: ")
+
+    scope = {"type": "http", "method": "POST", "path": "/api/chat", "query_string": b"", "headers": []}
+    await asgi.application(scope, receive, send)
+    return tuple(totals)
+
+
+def run(mode: str, base_url: str, responses: int, concurrency: int, label: str) -> tuple[int, int, int]:
+    if mode == "wsgi":
+        client = app.app.test_client()
+        results = [wsgi_response(client, f"wire_{label}_{index}_{time.time()}") for index in range(responses)]
+    else:
+        async def run_all():
+            app.async_client = build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT, asynchronous=True,
+                                            base_url=base_url)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(index: int):
+                async with semaphore:
+                    return await asgi_response(f"wire_{label}_{index}_{time.time()}")
+
+            try:
+                return await asyncio.gather(*(one(index) for index in range(responses)))
+            finally:
+                await app.async_client.http.aclose()
+
+        results = asyncio.run(run_all())
+    return tuple(sum(values) for values in zip(*results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes, writes and CPU per streamed response by SSE coalescing window")
+    parser.add_argument("--mode", choices=["asgi", "wsgi"], default="asgi")
+    parser.add_argument("--responses", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--tokens", type=int, default=300)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--windows", default="0,15,30")
+    args = parser.parse_args()
+
+    legacy = encoder_ns(legacy_content_event, 20000)
+    fast = encoder_ns(content_event, 20000)
+    print(f"content event encoding: json.dumps + f-string {legacy:.0f}ns, precomputed framing {fast:.0f}ns")
+
+    with mock_server("--tokens", str(args.tokens), "--token-delay", str(args.token_delay), "--first-token-delay", "0.01") as base_url:
+        app.client = build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT, base_url=base_url)
+
+        print(f"mode={args.mode} tokens={args.tokens} token_delay={args.token_delay}s responses={args.responses}")
+        print(f"{'window':>8} {'events':>8} {'bytes':>9} {'writes':>8} {'cpu':>9}   (per response)")
+        for window in [float(value) for value in args.windows.split(",")]:
+            app.SSE_COALESCE_MS = window
+            run(args.mode, base_url, min(args.concurrency, args.responses), args.concurrency, "warmup")
+            cpu_before = time.process_time()
+            received, writes, events = run(args.mode, base_url, args.responses, args.concurrency, f"{window:g}")
+            cpu = time.process_time() - cpu_before
+            label = "off" if window == 0 else f"{window:g}ms"
+            print(
+                f"{label:>8} {events / args.responses:>8.1f} {received / args.responses:>9,.0f} "
+                f"{writes / args.responses:>8.1f} {cpu * 1000 / args.responses:>7.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
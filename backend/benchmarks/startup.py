@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+
+import httpx
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+from completion_request import build_completion_request, encode_completion_request
+from benchmarks.common import BACKEND_DIR, free_port, percentile, rss_mb, start_mock
+
+IMPORT_PROBE = ("import sys, time; started = time.perf_counter(); {preload}import {module}; "
+                "print(time.perf_counter() - started, 'openai' in sys.modules)")
+IMPORTS = {
+    "app": ("app", ""),
+    "asgi": ("asgi", ""),
+    "asgi, SDK imported eagerly": ("asgi", "import httpx, openai; ")
+}
+ENTRY_POINTS = {
+    "app.py, FLASK_DEBUG=on": (["app.py"], {"FLASK_DEBUG": "on"}),
+    "app.py": (["app.py"], {}),
+    "serve.py": (["serve.py"], {"LOG_LEVEL": "warning"})
+}
+
+
+def import_seconds(module: str, preload: str, env: dict) -> tuple[float, bool]:
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(module=module, preload=preload)],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), output[1] == "True"
+
+
+def processes(pid: int) -> list:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            return [pid, *[child for child_pid in children.read().split() for child in processes(int(child_pid))]]
+    except OSError:
+        return [pid]
+
+
+def first_sse_byte(url: str, started: float, deadline: float) -> tuple[float | None, list]:
+    while time.perf_counter() < deadline:
+        try:
+            with httpx.stream("POST", f"{url}/api/chat", json={"message": "Hello", "session_id": "startup"},
+                              timeout=30) as response:
+                chunks = response.iter_raw()
+                first = next(chunks)
+                elapsed = time.perf_counter() - started
+                body = first + b"".join(chunks)
+            return elapsed, [json.loads(line[6:])["type"] for line in body.decode().splitlines() if line.startswith("data: ")]
+        except (httpx.HTTPError, StopIteration):
+            time.sleep(0.005)
+    return None, []
+
+
+def ready_seconds(url: str, started: float, deadline: float) -> float | None:
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"{url}/api/ready", timeout=5).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.005)
+    return None
+
+
+def cold_start(args: list, env: dict) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, *args], cwd=BACKEND_DIR, env={**env, "PORT": str(port)},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        first_byte, events = first_sse_byte(url, started, started + 30)
+        ready = ready_seconds(url, started, started + 30)
+        pids = processes(process.pid)
+        return {"first_byte": first_byte, "ready": ready, "events": events, "processes": len(pids),
+                "rss_mb": sum(rss_mb(pid) for pid in pids)}
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+def encode_us(encode, params: dict, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        encode(params)
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and cold start to the first served SSE byte per entry point")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5000)
+    args = parser.parse_args()
+
+    mock = start_mock(tokens=10, first_token_delay=0.0, token_delay=0.0)
+    env = {**os.environ, "OPENAI_API_KEY": "mock", "OPENAI_BASE_URL": mock.base_url, "PYTHONDONTWRITEBYTECODE": "1"}
+    failures = []
+
+    print(f"{'import':<30} {'p50':>8} {'min':>8}  openai loaded")
+    for label, (module, preload) in IMPORTS.items():
+        timings = [import_seconds(module, preload, env) for _ in range(args.runs)]
+        loaded = any(openai for _, openai in timings)
+        seconds = [elapsed for elapsed, _ in timings]
+        print(f"{label:<30} {percentile(seconds, 50) * 1000:>6.0f}ms {min(seconds) * 1000:>6.0f}ms  {loaded}")
+        if loaded and not preload:
+            failures.append(f"importing {module} loads the OpenAI SDK")
+
+    print(f"\n{'entry point':<30} {'first SSE byte':>15} {'ready':>9} {'processes':>10} {'RSS MB':>8}")
+    for label, (entry, extra) in ENTRY_POINTS.items():
+        runs = [cold_start(entry, {**env, **extra}) for _ in range(args.runs)]
+        for run in runs:
+            if run["first_byte"] is None or not run["events"] or run["events"][-1] != "done":
+                failures.append(f"{label}: chat turn did not finish ({run['events']})")
+            if run["ready"] is None:
+                failures.append(f"{label}: /api/ready never answered 200")
+        first = [run["first_byte"] for run in runs if run["first_byte"] is not None]
+        ready = [run["ready"] for run in runs if run["ready"] is not None]
+        print(f"{label:<30} {percentile(first, 50) * 1000:>13.0f}ms {percentile(ready, 50) * 1000:>7.0f}ms "
+              f"{runs[-1]['processes']:>10} {runs[-1]['rss_mb']:>8.1f}")
+
+    params = build_completion_request([{"role": "user", "content": "Draft an NDA"}, {"role": "assistant", "content": "Sure."}] * 4)
+    if json.loads(encode_completion_request(params)) != params:
+        failures.append("pre-serialized completion request differs from json.dumps")
+    print(f"\ncompletion request body: {encode_us(lambda value: json.dumps(value).encode(), params, args.rounds):.1f}us "
+          f"json.dumps, {encode_us(encode_completion_request, params, args.rounds):.1f}us with pre-serialized tools and prompt")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
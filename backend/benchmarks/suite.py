@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.common import backend_server, mock_server, percentile, rss_mb
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SESSIONS = os.path.join(BENCHMARK_DIR, "fixtures", "sessions", "legal_sessions.json")
+BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+METRICS = {
+    "ttft_p50_ms": ("lower", 0.5),
+    "ttft_p99_ms": ("lower", 0.75),
+    "turn_p50_ms": ("lower", 0.5),
+    "turn_p99_ms": ("lower", 0.75),
+    "turns_per_second": ("higher", 0.3),
+    "kb_per_session": ("lower", 0.5),
+}
+
+
+async def run_turn(client: httpx.AsyncClient, url: str, session_id: str, turn: dict) -> dict:
+    started = time.perf_counter()
+    first = None
+    results = []
+    try:
+        async with client.stream("POST", f"{url}/api/chat", json={"message": turn["user"], "session_id": session_id}) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[6:])
+                if first is None and event["type"] in ("content", "tool_call"):
+                    first = time.perf_counter() - started
+                if event["type"] == "tool_result":
+                    results.append((event["function"], event["result"].get("status")))
+                elif event["type"] == "error":
+                    return {"ok": False, "error": event["error"]}
+                elif event["type"] == "done":
+                    break
+            else:
+                return {"ok": False, "error": "stream ended without done"}
+    except httpx.HTTPError as e:
+        return {"ok": False, "error": type(e).__name__}
+
+    expected = sorted(call["name"] for call in turn.get("tool_calls", []))
+    if sorted(name for name, _ in results) != expected or any(status != "success" for _, status in results):
+        return {"ok": False, "error": f"tool results {results} for {expected}"}
+    return {"ok": True, "ttft": first or 0.0, "total": time.perf_counter() - started}
+
+
+async def run_user(client: httpx.AsyncClient, url: str, session_id: str, session: dict) -> list:
+    results = []
+    for turn in session["turns"]:
+        result = await run_turn(client, url, session_id, turn)
+        results.append(result)
+        if not result["ok"]:
+            break
+    return results
+
+
+async def run_mode(mode: str, url: str, pid: int, sessions: list, users: int, timeout: float) -> dict:
+    rss_before = rss_mb(pid)
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        runs = await asyncio.gather(*(
+            run_user(client, url, f"suite_{mode}_{user}", sessions[user % len(sessions)]) for user in range(users)
+        ))
+        elapsed = time.perf_counter() - started
+
+    turns = [result for run in runs for result in run]
+    ok = [result for result in turns if result["ok"]]
+    return {
+        "metrics": {
+            "ttft_p50_ms": percentile([r["ttft"] for r in ok], 50) * 1000,
+            "ttft_p99_ms": percentile([r["ttft"] for r in ok], 99) * 1000,
+            "turn_p50_ms": percentile([r["total"] for r in ok], 50) * 1000,
+            "turn_p99_ms": percentile([r["total"] for r in ok], 99) * 1000,
+            "turns_per_second": len(ok) / elapsed,
+            "kb_per_session": max(0.0, rss_mb(pid) - rss_before) * 1024 / users,
+        },
+        "turns": len(ok),
+        "errors": [result["error"] for result in turns if not result["ok"]],
+    }
+
+
+def regressions(mode: str, metrics: dict, baseline: dict, scale: float) -> list:
+    found = []
+    for name, (better, tolerance) in METRICS.items():
+        reference = baseline.get(mode, {}).get(name)
+        if reference is None:
+            continue
+        limit = reference * (1 + tolerance * scale) if better == "lower" else reference * (1 - tolerance * scale)
+        if (better == "lower" and metrics[name] > limit) or (better == "higher" and metrics[name] < limit):
+            found.append(f"{mode} {name} {metrics[name]:.2f} vs baseline {reference:.2f} (limit {limit:.2f})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scripted multi-turn legal document sessions against /api/chat")
+    parser.add_argument("--modes", default="wsgi,asgi")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--first-token-delay", type=float, default=0.1)
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-jitter", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance-scale", type=float, default=1.0)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    with open(SESSIONS) as f:
+        sessions = json.load(f)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    params = {
+        "users": args.users,
+        "tokens": args.tokens,
+        "token_delay": args.token_delay,
+        "first_token_delay": args.first_token_delay,
+        "latency_distribution": args.latency_distribution,
+        "latency_jitter": args.latency_jitter,
+        "seed": args.seed,
+        "turns": sum(len(session["turns"]) for session in sessions),
+    }
+    matching = baseline.get("params") == params
+    if baseline and not matching and not args.update_baseline:
+        print(f"baseline was recorded with {baseline.get('params')}, not comparing")
+
+    failures = []
+    measured = {}
+    with mock_server(
+        "--script", SESSIONS,
+        "--tokens", str(args.tokens),
+        "--token-delay", str(args.token_delay),
+        "--first-token-delay", str(args.first_token_delay),
+        "--latency-distribution", args.latency_distribution,
+        "--latency-jitter", str(args.latency_jitter),
+        "--seed", str(args.seed),
+    ) as base_url:
+        print(f"{args.users} users, {len(sessions)} scripted sessions, {sum(len(s['turns']) for s in sessions)} turns, "
+              f"{args.latency_distribution} latency jitter {args.latency_jitter:g}")
+        print(f"{'mode':<6} {'turns':>6} {'errors':>7} {'ttft p50':>10} {'ttft p99':>10} {'turn p50':>10} "
+              f"{'turn p99':>10} {'turns/s':>8} {'KB/session':>11}")
+        for mode in args.modes.split(","):
+            with backend_server(mode, base_url) as (url, process):
+                result = asyncio.run(run_mode(mode, url, process.pid, sessions, args.users, args.timeout))
+            metrics = result["metrics"]
+            measured[mode] = {name: round(value, 3) for name, value in metrics.items()}
+            print(
+                f"{mode:<6} {result['turns']:>6} {len(result['errors']):>7} {metrics['ttft_p50_ms']:>8.1f}ms "
+                f"{metrics['ttft_p99_ms']:>8.1f}ms {metrics['turn_p50_ms']:>8.1f}ms {metrics['turn_p99_ms']:>8.1f}ms "
+                f"{metrics['turns_per_second']:>8.1f} {metrics['kb_per_session']:>11.1f}"
+            )
+            failures += [f"{mode} {error}" for error in sorted(set(result["errors"]))]
+            if matching and not args.update_baseline:
+                failures += regressions(mode, metrics, baseline, args.tolerance_scale)
+
+    if args.update_baseline and not failures:
+        with open(args.baseline, "w") as f:
+            json.dump({**(baseline if matching else {}), **measured, "params": params}, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {os.path.relpath(args.baseline)}")
+    elif not baseline and not args.update_baseline:
+        print("no baseline stored, run with --update-baseline to record one")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import sys
+import glob
+import json
+import time
+import random
+import argparse
+
+from tools import TOOLS
+from tool_arguments import ArgumentStream, check_arguments, compile_tools
+from benchmarks.replay import FIXTURE_DIR, load_fixture
+
+SCHEMAS = compile_tools(TOOLS)
+
+
+def recorded_calls() -> list:
+    calls = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.json"))):
+        for chunks in load_fixture(path)["rounds"]:
+            fragments = {}
+            for chunk in chunks:
+                for tool_call in (chunk["choices"][0]["delta"].get("tool_calls") or []) if chunk["choices"] else []:
+                    entry = fragments.setdefault(tool_call.get("index", 0), ["", []])
+                    function = tool_call.get("function") or {}
+                    entry[0] = function.get("name") or entry[0]
+                    if function.get("arguments"):
+                        entry[1].append(function["arguments"])
+            calls.extend((name, pieces) for name, pieces in fragments.values())
+    return [(name, pieces) for name, pieces in calls if not check_arguments(SCHEMAS.get(name), "".join(pieces))]
+
+
+def large_document(provisions: int, rng: random.Random) -> dict:
+    return {
+        "document_type": "service_agreement",
+        "document_data": {
+            "title": "Master Services Agreement",
+            "parties": [{"name": f"Party {index} Holdings LLC", "role": "provider" if index % 2 else "client",
+                         "address": f"{100 + index} Market Street, Suite {index}, San Francisco, CA",
+                         "entity_type": "llc"} for index in range(6)],
+            "effective_date": "2026-01-01",
+            "terms": {"duration": "three years", "payment": "net 30", "notice": "sixty days \"written\" notice"},
+            "provisions": [" ".join(rng.choice(("The", "Provider", "shall", "deliver", "services", "in", "accordance",
+                                                "with", "the", "Statement", "of", "Work", "and", "applicable", "law"))
+                                    for _ in range(40)) + "." for _ in range(provisions)],
+            "jurisdiction": "California"
+        }
+    }
+
+
+def token_chunks(text: str, rng: random.Random) -> list:
+    pieces, position = [], 0
+    while position < len(text):
+        size = rng.randint(1, 8)
+        pieces.append(text[position:position + size])
+        position += size
+    return pieces
+
+
+def parse_whole(name: str, pieces: list):
+    arguments = ""
+    for piece in pieces:
+        arguments += piece
+    return json.loads(arguments)
+
+
+def parse_incremental(name: str, pieces: list):
+    stream = ArgumentStream(SCHEMAS[name])
+    for piece in pieces:
+        stream.feed(piece)
+    return stream.finish()
+
+
+def first_progress(name: str, pieces: list, prefix: tuple) -> float:
+    stream, consumed, total = ArgumentStream(SCHEMAS[name]), 0, sum(map(len, pieces))
+    for piece in pieces:
+        consumed += len(piece)
+        if any(path[:len(prefix)] == prefix for path, _ in stream.feed(piece)):
+            return consumed / total
+    return 1.0
+
+
+def abort_point(name: str, pieces: list) -> float:
+    stream, consumed, total = ArgumentStream(SCHEMAS[name]), 0, sum(map(len, pieces))
+    for piece in pieces:
+        consumed += len(piece)
+        stream.feed(piece)
+        if stream.problem:
+            return consumed / total
+    return 1.0
+
+
+def throughput(parse, workload: list, seconds: float) -> tuple[float, float]:
+    size = sum(len(piece) for _, pieces in workload for piece in pieces)
+    chunks = sum(len(pieces) for _, pieces in workload)
+    rounds, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for name, pieces in workload:
+            parse(name, pieces)
+        rounds += 1
+    elapsed = time.perf_counter() - started
+    return size * rounds / elapsed / 1e6, elapsed / (chunks * rounds) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental tool argument parsing against json.loads on recorded chunks")
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--provisions", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    document = json.dumps(large_document(args.provisions, rng))
+    malformed = document.replace("service_agreement", "services_agreement", 1)
+    workloads = {
+        "recorded": recorded_calls(),
+        "generate_document": [("generate_document", token_chunks(document, rng))]
+    }
+
+    failures = []
+    print(f"{'workload':<18} {'calls':>5} {'chunks':>7} {'KB':>7} {'parser':<12} {'MB/s':>7} {'us/chunk':>9}")
+    for label, workload in workloads.items():
+        for name, pieces in workload:
+            if parse_incremental(name, pieces) != parse_whole(name, pieces):
+                failures.append(f"{label}: {name} parsed differently from json.loads")
+        size = sum(len(piece) for _, pieces in workload for piece in pieces) / 1024
+        chunks = sum(len(pieces) for _, pieces in workload)
+        for parser_label, parse in (("json.loads", parse_whole), ("incremental", parse_incremental)):
+            rate, per_chunk = throughput(parse, workload, args.seconds)
+            print(f"{label:<18} {len(workload):>5} {chunks:>7} {size:>7.1f} {parser_label:<12} {rate:>7.2f} {per_chunk:>9.2f}")
+
+    pieces = workloads["generate_document"][0][1]
+    bad = token_chunks(malformed, random.Random(args.seed))
+    for label, prefix in (("party", ("document_data", "parties")), ("provision", ("document_data", "provisions"))):
+        print(f"generate_document: first {label} after {first_progress('generate_document', pieces, prefix):.1%} "
+              f"of the arguments (json.loads: 100%)")
+    print(f"invalid document_type: aborted after {abort_point('generate_document', bad):.1%} of the arguments")
+    if abort_point("generate_document", bad) >= 1.0:
+        failures.append("invalid document_type was not detected before the arguments finished")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import json
+import argparse
+
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+import app
+from benchmarks.common import percentile
+
+DOCUMENT_TYPES = ["nda", "employment_agreement", "service_agreement"]
+
+
+def tool_call_round(calls: int) -> list:
+    chunks = [{"choices": [{"index": 0, "delta": {"role": "assistant", "tool_calls": [{
+        "index": index, "id": f"call_slow_{index}", "type": "function",
+        "function": {"name": "generate_document", "arguments": json.dumps({
+            "document_type": DOCUMENT_TYPES[index % len(DOCUMENT_TYPES)],
+            "document_data": {"parties": [{"name": f"Party {index}", "role": "client"}]}
+        })}
+    } for index in range(calls)]}, "finish_reason": None}]}]
+    return chunks + [{"choices": [{"index": 0, "delta": {}, "finish_reason": "tool_calls"}]}]
+
+
+def reply_round() -> list:
+    return [
+        {"choices": [{"index": 0, "delta": {"role": "assistant", "content": "Done."}, "finish_reason": None}]},
+        {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+    ]
+
+
+def run(turns: int, calls: int) -> tuple[list, int]:
+    latencies, failed = [], 0
+
+    for turn in range(turns):
+        rounds = iter([tool_call_round(calls), reply_round()])
+        started = time.perf_counter()
+        session_id = f"bench_rounds_{calls}_{turn}_{time.time()}"
+        events = [json.loads(frame[6:]) for frame in app.generate_sse_stream(
+            session_id, "Draft the agreements.", completion_chunks=lambda params: iter(next(rounds))
+        )]
+        latencies.append(time.perf_counter() - started)
+        results = [event["result"] for event in events if event["type"] == "tool_result"]
+        document = app.get_current_document(session_id)
+        failed += (len(results) != calls or any(result["status"] != "success" for result in results)
+                   or [result["document_type"] for result in results] != [DOCUMENT_TYPES[index % len(DOCUMENT_TYPES)]
+                                                                          for index in range(calls)]
+                   or document["type"] != results[-1]["document_type"] or document["version"] != calls)
+
+    return latencies, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turn latency with several document tool calls applied serially per round")
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=4)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'calls per round':<16} {'p50':>9} {'p99':>9} {'failed turns':>13}")
+    for calls in sorted({1, args.calls}):
+        latencies, failed = run(args.turns, calls)
+        print(
+            f"{calls:<16} {percentile(latencies, 50) * 1000:>7.1f}ms "
+            f"{percentile(latencies, 99) * 1000:>7.1f}ms {failed:>13}"
+        )
+        if failed:
+            failures.append(f"{calls} calls: {failed} turns without {calls} successful results applied in call order")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
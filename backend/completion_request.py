@@ -0,0 +1,105 @@
+import json
+import hashlib
+import threading
+from collections import deque
+
+from prompts import LEGAL_ASSISTANT_SYSTEM_PROMPT
+from tools import TOOLS
+
+MODEL = "gpt-4o"
+
+SYSTEM_MESSAGE = {"role": "system", "content": LEGAL_ASSISTANT_SYSTEM_PROMPT}
+CACHEABLE_TOOLS = json.loads(json.dumps(TOOLS))
+PREFIX_SHA = hashlib.sha256(
+    json.dumps([CACHEABLE_TOOLS, SYSTEM_MESSAGE], separators=(",", ":")).encode()
+).hexdigest()[:16]
+TOOLS_JSON = json.dumps(CACHEABLE_TOOLS)
+SYSTEM_JSON = json.dumps(SYSTEM_MESSAGE)
+
+
+def build_completion_request(messages: list, model: str = MODEL, tool_choice: str = "auto") -> dict:
+    if messages and messages[0]["role"] == "system":
+        messages = messages[1:]
+
+    return {
+        "model": model,
+        "tools": CACHEABLE_TOOLS,
+        "tool_choice": tool_choice,
+        "messages": [SYSTEM_MESSAGE, *messages],
+        "stream": True,
+        "stream_options": {"include_usage": True}
+    }
+
+
+def encode_completion_request(params: dict) -> bytes:
+    messages = params.get("messages") or []
+    if params.get("tools") is not CACHEABLE_TOOLS or not messages or messages[0] is not SYSTEM_MESSAGE:
+        return json.dumps(params).encode()
+
+    rest = json.dumps({key: value for key, value in params.items() if key not in ("tools", "messages")})
+    history = json.dumps(messages[1:])
+    return "".join((
+        rest[:-1], ", " if len(rest) > 2 else "", '"tools": ', TOOLS_JSON, ', "messages": [', SYSTEM_JSON,
+        ", " if len(history) > 2 else "", history[1:], "}"
+    )).encode()
+
+
+class PromptCacheStats:
+    def __init__(self, recent: int = 256):
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=recent)
+        self.totals = {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "completion_tokens": 0,
+            "cached_requests": 0,
+            "uncached_requests": 0,
+            "cached_ttft_seconds": 0.0,
+            "uncached_ttft_seconds": 0.0
+        }
+
+    def record(self, usage: dict, ttft: float | None):
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+        record = {
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "uncached_tokens": prompt_tokens - cached_tokens,
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "ttft_seconds": ttft
+        }
+
+        with self.lock:
+            self.recent.append(record)
+            self.totals["requests"] += 1
+            self.totals["prompt_tokens"] += prompt_tokens
+            self.totals["cached_tokens"] += cached_tokens
+            self.totals["completion_tokens"] += record["completion_tokens"]
+            if ttft is not None:
+                if cached_tokens:
+                    self.totals["cached_requests"] += 1
+                    self.totals["cached_ttft_seconds"] += ttft
+                else:
+                    self.totals["uncached_requests"] += 1
+                    self.totals["uncached_ttft_seconds"] += ttft
+
+    def stats(self) -> dict:
+        with self.lock:
+            totals = dict(self.totals)
+            recent = list(self.recent)[-10:]
+
+        timed = totals["cached_requests"] + totals["uncached_requests"]
+        return {
+            "prefix_sha": PREFIX_SHA,
+            "requests": totals["requests"],
+            "prompt_tokens": totals["prompt_tokens"],
+            "cached_tokens": totals["cached_tokens"],
+            "uncached_tokens": totals["prompt_tokens"] - totals["cached_tokens"],
+            "completion_tokens": totals["completion_tokens"],
+            "cached_token_ratio": totals["cached_tokens"] / totals["prompt_tokens"] if totals["prompt_tokens"] else 0.0,
+            "mean_ttft": (totals["cached_ttft_seconds"] + totals["uncached_ttft_seconds"]) / timed if timed else None,
+            "mean_ttft_cached": totals["cached_ttft_seconds"] / totals["cached_requests"] if totals["cached_requests"] else None,
+            "mean_ttft_uncached": totals["uncached_ttft_seconds"] / totals["uncached_requests"] if totals["uncached_requests"] else None,
+            "recent": recent
+        }
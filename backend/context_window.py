@@ -0,0 +1,148 @@
+import json
+import threading
+from collections import OrderedDict
+
+MESSAGE_OVERHEAD_TOKENS = 4
+STATE_FIELDS = ("type", "document_type", "extracted_data", "data", "version")
+
+
+def estimate_tokens(message: dict) -> int:
+    size = len(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        size += len(tool_call["function"]["name"]) + len(tool_call["function"]["arguments"])
+    return size // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+def compact_tool_message(message: dict) -> dict:
+    try:
+        result = json.loads(message["content"])
+    except (TypeError, json.JSONDecodeError):
+        return message
+    if not isinstance(result, dict):
+        return message
+
+    summary = {
+        key: value for key, value in result.items()
+        if isinstance(value, (str, int, float, bool)) and len(str(value)) <= 120
+    }
+    summary["compacted"] = True
+    return {"role": "tool", "tool_call_id": message["tool_call_id"], "content": json.dumps(summary)}
+
+
+def state_message(document: dict) -> dict:
+    state = {key: document[key] for key in STATE_FIELDS if document.get(key) is not None}
+    return {"role": "system", "content": f"Current document state: {json.dumps(state, sort_keys=True)}"}
+
+
+class SessionLedger:
+    def __init__(self):
+        self.tokens = []
+        self.compacted = {}
+        self.total = 0
+
+    def sync(self, messages: list):
+        if len(self.tokens) > len(messages) or (
+            self.tokens and estimate_tokens(messages[len(self.tokens) - 1]) != self.tokens[-1]
+        ):
+            self.__init__()
+
+        for message in messages[len(self.tokens):]:
+            tokens = estimate_tokens(message)
+            self.tokens.append(tokens)
+            self.total += tokens
+
+    def compact(self, messages: list, index: int) -> tuple[dict, int]:
+        if index not in self.compacted:
+            message = compact_tool_message(messages[index])
+            self.compacted[index] = (message, estimate_tokens(message))
+        return self.compacted[index]
+
+
+class ContextWindow:
+    def __init__(self, max_tokens: int, full_tool_turns: int, max_sessions: int = 10000):
+        self.max_tokens = max_tokens
+        self.full_tool_turns = full_tool_turns
+        self.max_sessions = max_sessions
+        self.ledgers = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {
+            "windows": 0,
+            "tokens_full": 0,
+            "tokens_sent": 0,
+            "turns_dropped": 0,
+            "tool_results_compacted": 0
+        }
+
+    def ledger(self, session_id: str, messages: list) -> SessionLedger:
+        with self.lock:
+            ledger = self.ledgers.pop(session_id, None) or SessionLedger()
+            self.ledgers[session_id] = ledger
+            while len(self.ledgers) > self.max_sessions:
+                self.ledgers.popitem(last=False)
+        ledger.sync(messages)
+        return ledger
+
+    def session_tokens(self, session_id: str) -> int:
+        ledger = self.ledgers.get(session_id)
+        return ledger.total if ledger else 0
+
+    def build(self, session_id: str, messages: list, document: dict | None) -> list:
+        ledger = self.ledger(session_id, messages)
+        turn_starts = [i for i, message in enumerate(messages) if message["role"] == "user"]
+        if not turn_starts:
+            return messages
+
+        state = state_message(document) if document else None
+        budget = self.max_tokens - ledger.tokens[0] - (estimate_tokens(state) if state else 0)
+
+        turns = []
+        compacted = 0
+        turn_ends = turn_starts[1:] + [len(messages)]
+        for age, (start, end) in enumerate(zip(reversed(turn_starts), reversed(turn_ends))):
+            turn = []
+            tokens = 0
+            for index in range(start, end):
+                if age >= self.full_tool_turns and messages[index]["role"] == "tool":
+                    message, message_tokens = ledger.compact(messages, index)
+                    compacted += message is not messages[index]
+                else:
+                    message, message_tokens = messages[index], ledger.tokens[index]
+                turn.append(message)
+                tokens += message_tokens
+
+            if turns and tokens > budget:
+                break
+            turns.append(turn)
+            budget -= tokens
+
+        dropped = len(turn_starts) - len(turns)
+        if not dropped and not compacted:
+            self.count(ledger.total, ledger.total, dropped, compacted)
+            return messages
+
+        self.count(ledger.total, self.max_tokens - budget, dropped, compacted)
+
+        window = [messages[0]]
+        for turn in reversed(turns[1:]):
+            window.extend(turn)
+        if state:
+            window.append(state)
+        window.extend(turns[0])
+        return window
+
+    def count(self, tokens_full: int, tokens_sent: int, dropped: int, compacted: int):
+        with self.lock:
+            self.counters["windows"] += 1
+            self.counters["tokens_full"] += tokens_full
+            self.counters["tokens_sent"] += tokens_sent
+            self.counters["turns_dropped"] += dropped
+            self.counters["tool_results_compacted"] += compacted
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "max_tokens": self.max_tokens,
+                "full_tool_turns": self.full_tool_turns,
+                "sessions": len(self.ledgers),
+                **self.counters
+            }
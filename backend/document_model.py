@@ -0,0 +1,256 @@
+import os
+import re
+
+SECTION_REFERENCE = re.compile(r"\b(?:Section|Clause) (\d+(?:\.\d+)*)\b")
+CAPITALIZED_RUN = re.compile(r"[A-Z][\w-]*(?: (?:[A-Z][\w-]*|\d+))*")
+DEFINED_TERM = re.compile(r"\"([A-Z][\w-]*(?: (?:[A-Z][\w-]*|\d+))*)\"")
+GENERIC_TERMS = {"Agreement"}
+ALIAS_PREFIXES = ("section ", "clause ", "the ")
+ALIAS_SUFFIXES = (" section", " clause", " provision")
+
+
+def normalize(name: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9.]+", " ", str(name).lower()).split()).strip(".")
+
+
+def slugify(name: str) -> str:
+    return normalize(name).replace(".", "").replace(" ", "_") or "section"
+
+
+def build_document(document_type: str, data: dict, title: str, clauses: list) -> dict:
+    document = {
+        "type": document_type,
+        "data": data,
+        "title": title,
+        "version": 1,
+        "history": [],
+        "sections": {},
+        "order": []
+    }
+    for clause in clauses:
+        add_section(document, clause["heading"], clause["text"], section_id=clause.get("id"),
+                    aliases=clause.get("aliases"))
+    reindex(document)
+    return document
+
+
+def add_section(document: dict, heading: str, text: str, parent: str | None = None, section_id: str | None = None,
+                aliases: list | None = None) -> str:
+    sections = document["sections"]
+    section_id = section_id or slugify(heading)
+    base, suffix = section_id, 2
+    while section_id in sections:
+        section_id = f"{base}_{suffix}"
+        suffix += 1
+
+    sections[section_id] = {
+        "id": section_id,
+        "heading": heading,
+        "text": text,
+        "parent": parent,
+        "children": [],
+        "aliases": list(aliases or []),
+        "defines": [],
+        "references": [],
+        "referenced_by": []
+    }
+    siblings = sections[parent]["children"] if parent else document["order"]
+    siblings.append(section_id)
+    return section_id
+
+
+def walk(document: dict, ids: list | None = None, prefix: str = ""):
+    for position, section_id in enumerate(document["order"] if ids is None else ids, 1):
+        number = f"{prefix}{position}"
+        yield number, document["sections"][section_id]
+        yield from walk(document, document["sections"][section_id]["children"], f"{number}.")
+
+
+def section_aliases(section: dict, number: str) -> set:
+    return {section["id"], normalize(section["id"]), normalize(section["heading"]), number,
+            *(normalize(alias) for alias in section.get("aliases", [])),
+            *(normalize(term) for term in section["defines"])}
+
+
+def reindex(document: dict):
+    index, terms = {}, {}
+    for number, section in walk(document):
+        section["defines"] = [
+            term for term in DEFINED_TERM.findall(section["text"]) if term not in GENERIC_TERMS
+        ]
+        for term in [section["heading"], *section["defines"]]:
+            terms.setdefault(term, section["id"])
+        for alias in section_aliases(section, number):
+            index.setdefault(alias, section["id"])
+
+    document["index"] = index
+    document["terms"] = terms
+    for section in document["sections"].values():
+        section["referenced_by"] = []
+    for section in document["sections"].values():
+        section["references"] = scan_references(document, section)
+        for target in section["references"]:
+            document["sections"][target]["referenced_by"].append(section["id"])
+
+
+def scan_references(document: dict, section: dict) -> list:
+    targets = [document["index"].get(match.group(1)) for match in SECTION_REFERENCE.finditer(section["text"])]
+    terms = document["terms"]
+    for match in CAPITALIZED_RUN.finditer(section["text"]):
+        words = match.group(0).split(" ")
+        for start in range(len(words)):
+            for end in range(len(words), start, -1):
+                target = terms.get(" ".join(words[start:end]))
+                if target:
+                    targets.append(target)
+
+    references = []
+    for target in targets:
+        if target and target != section["id"] and target not in references:
+            references.append(target)
+    return references
+
+
+def resolve_section(document: dict, target: str | None) -> str | None:
+    if not target or not document.get("sections"):
+        return None
+
+    name = normalize(target)
+    index = document["index"]
+    for prefix in ("", *ALIAS_PREFIXES):
+        if not name.startswith(prefix):
+            continue
+        stripped = name[len(prefix):]
+        if stripped in index:
+            return index[stripped]
+        for suffix in ALIAS_SUFFIXES:
+            if stripped.endswith(suffix) and stripped[:-len(suffix)] in index:
+                return index[stripped[:-len(suffix)]]
+    return None
+
+
+def relink(document: dict, section: dict):
+    sections = document["sections"]
+    for target in section["references"]:
+        if target in sections:
+            sections[target]["referenced_by"].remove(section["id"])
+    section["references"] = scan_references(document, section)
+    for target in section["references"]:
+        sections[target]["referenced_by"].append(section["id"])
+
+
+def update_references(document: dict, section: dict):
+    defines = [term for term in DEFINED_TERM.findall(section["text"]) if term not in GENERIC_TERMS]
+    if any(term not in document["terms"] for term in defines):
+        reindex(document)
+        return
+
+    removed = [term for term in section["defines"] if term not in defines and document["terms"].get(term) == section["id"]]
+    section["defines"] = defines
+    for term in removed:
+        del document["terms"][term]
+        if document["index"].get(normalize(term)) == section["id"]:
+            del document["index"][normalize(term)]
+
+    relink(document, section)
+    if removed:
+        for referrer in list(section["referenced_by"]):
+            relink(document, document["sections"][referrer])
+
+
+def remove_section(document: dict, section_id: str):
+    section = document["sections"][section_id]
+    for child in list(section["children"]):
+        remove_section(document, child)
+    siblings = document["sections"][section["parent"]]["children"] if section["parent"] else document["order"]
+    siblings.remove(section_id)
+    del document["sections"][section_id]
+
+
+def apply_edit(document: dict, edit_type: str, target_section: str, original_value: str, new_value: str,
+               requested: list | None = None) -> dict:
+    section_id = resolve_section(document, target_section)
+    section = document["sections"].get(section_id) if section_id else None
+
+    if section is None:
+        if edit_type == "add" and new_value and "sections" in document:
+            section_id = add_section(document, target_section or "Additional Provision", new_value)
+            reindex(document)
+            return {"section_id": section_id, "applied": True, "created": True, "exact": True,
+                    "affected_clauses": affected_clauses(document, section_id, requested),
+                    "delta": {"set": {section_id: section_state(document["sections"][section_id])},
+                              "order": list(document["order"])}}
+        return {"section_id": None, "applied": False, "affected_clauses": []}
+
+    outcome = {"section_id": section_id, "applied": True, "exact": True,
+               "affected_clauses": affected_clauses(document, section_id, requested)}
+    if edit_type == "remove" and not original_value:
+        removed = [node["id"] for _, node in walk(document, [section_id])]
+        remove_section(document, section_id)
+        reindex(document)
+        delta = {"remove": removed}
+        if section["parent"]:
+            delta["set"] = {section["parent"]: section_state(document["sections"][section["parent"]])}
+        else:
+            delta["order"] = list(document["order"])
+        return {**outcome, "removed": True, "delta": delta}
+
+    text = section["text"]
+    if edit_type == "add":
+        section["text"] = f"{text}\n\n{new_value}" if text else new_value
+    elif original_value and original_value in text:
+        section["text"] = text.replace(original_value, "" if edit_type == "remove" else new_value or "", 1)
+        outcome["exact"] = text.count(original_value) == 1
+    elif original_value:
+        outcome.update(applied=False, exact=False, missing=original_value)
+    elif edit_type in ("modify", "replace") and new_value:
+        section["text"] = new_value
+        outcome.update(exact=False, rewrite=True)
+    else:
+        outcome["applied"] = False
+
+    if outcome["applied"]:
+        outcome["delta"] = {"text": {section_id: text_delta(text, section["text"])}}
+        update_references(document, section)
+    return outcome
+
+
+def affected_clauses(document: dict, section_id: str, requested: list | None) -> list:
+    affected = []
+    for target in [*document["sections"][section_id]["referenced_by"],
+                   *(resolve_section(document, name) for name in requested or [])]:
+        if target and target != section_id and target not in affected:
+            affected.append(target)
+    return affected
+
+
+def section_state(section: dict) -> dict:
+    return {
+        "heading": section["heading"],
+        "text": section["text"],
+        "parent": section["parent"],
+        "children": list(section["children"])
+    }
+
+
+def text_delta(before: str, after: str) -> list:
+    prefix = len(os.path.commonprefix([before, after]))
+    suffix = len(os.path.commonprefix([before[prefix:][::-1], after[prefix:][::-1]]))
+    return [prefix, suffix, after[prefix:len(after) - suffix]]
+
+
+def apply_text_delta(text: str, delta: list) -> str:
+    prefix, suffix, inserted = delta
+    return text[:prefix] + inserted + text[len(text) - suffix:]
+
+
+def format_text(title: str, blocks) -> str:
+    return "\n\n".join([title.upper(), *(f"{number}. {heading.upper()}\n\n{text}" for number, heading, text in blocks)]) + "\n"
+
+
+def document_text(document: dict) -> str:
+    if not document.get("sections"):
+        return document.get("content", "")
+    return format_text(document.get("title", ""), (
+        (number, section["heading"], section["text"]) for number, section in walk(document)
+    ))
@@ -0,0 +1,381 @@
+import re
+
+from document_model import build_document, format_text
+
+FIELD_PATTERN = re.compile(r"\{\{\s*([\w.]+)\s*(?:\|([^}]*))?\}\}")
+PATH_PATTERN = re.compile(r"[a-z_]+(\.\w+)*")
+
+TEMPLATE_SOURCES = {
+    "nda": {
+        "title": "Mutual Non-Disclosure Agreement",
+        "roles": ["disclosing_party", "receiving_party"],
+        "required": {
+            "disclosing_party": "roles.disclosing_party.name",
+            "receiving_party": "roles.receiving_party.name",
+            "purpose": "terms.purpose|terms.scope",
+            "duration": "terms.duration|dates.duration|dates.end_date",
+            "jurisdiction": "jurisdiction|terms.jurisdiction|terms.governing_law"
+        },
+        "clauses": [
+            {"id": "parties", "heading": "Parties", "body": (
+                "This {{title}} (the \"Agreement\") is entered into as of {{effective_date|the date of the last signature below}} "
+                "by and between:\n\n{{party_list}}"
+            )},
+            {"id": "purpose", "heading": "Purpose", "aliases": ["purpose of disclosure"], "body": (
+                "The parties wish to exchange Confidential Information for the purpose of "
+                "{{terms.purpose|evaluating a potential business relationship}} (the \"Purpose\")."
+            )},
+            {"id": "confidential_information", "heading": "Confidential Information", "aliases": ["confidentiality"], "body": (
+                "\"Confidential Information\" means any non-public information disclosed by "
+                "{{roles.disclosing_party.name|[Disclosing Party]}} to {{roles.receiving_party.name|[Receiving Party]}}, "
+                "whether oral, written or electronic, that is marked confidential or that a reasonable person would "
+                "understand to be confidential. It does not include information that is or becomes public through no "
+                "fault of the receiving party, was already lawfully known to it, or is independently developed."
+            )},
+            {"id": "obligations", "heading": "Obligations", "aliases": ["duties"], "body": (
+                "{{roles.receiving_party.name|[Receiving Party]}} shall use Confidential Information solely for the Purpose, "
+                "protect it with at least reasonable care, and disclose it only to employees and advisers who need to know "
+                "it and are bound by duties of confidentiality no less protective than this Agreement."
+            )},
+            {"id": "term", "heading": "Term", "aliases": ["duration", "period", "length"], "body": (
+                "The obligations in this Agreement continue for {{terms.duration|dates.duration|two (2) years}} "
+                "from the Effective Date."
+            )},
+            {"id": "return_of_materials", "heading": "Return of Materials", "aliases": ["return", "destruction"], "body": (
+                "On written request, the receiving party shall promptly return or destroy all Confidential Information "
+                "and any copies of it."
+            )},
+        ]
+    },
+    "employment_agreement": {
+        "title": "Employment Agreement",
+        "roles": ["employer", "employee"],
+        "required": {
+            "employer": "roles.employer.name",
+            "employee": "roles.employee.name",
+            "position": "terms.position|terms.job_title",
+            "start_date": "terms.start_date|dates.effective_date|effective_date",
+            "compensation": "terms.compensation|terms.salary"
+        },
+        "clauses": [
+            {"id": "parties", "heading": "Parties", "body": (
+                "This {{title}} (the \"Agreement\") is entered into as of {{effective_date|[Effective Date]}} "
+                "by and between:\n\n{{party_list}}"
+            )},
+            {"id": "position", "heading": "Position and Duties", "aliases": ["role", "job title"], "body": (
+                "{{roles.employer.name|[Employer]}} employs {{roles.employee.name|[Employee]}} as "
+                "{{terms.position|terms.job_title|[Position]}} on a {{terms.employment_type|full-time}} basis. "
+                "The Employee shall perform the duties customarily associated with that position."
+            )},
+            {"id": "start_date", "heading": "Start Date", "aliases": ["commencement", "commencement date"], "body": (
+                "Employment begins on {{terms.start_date|effective_date|[Start Date]}}."
+            )},
+            {"id": "compensation", "heading": "Compensation", "aliases": ["salary", "pay", "wages"], "body": (
+                "The Employee shall receive {{terms.compensation|terms.salary|[Compensation]}}, payable in accordance "
+                "with the Employer's standard payroll practices, less applicable withholdings."
+            )},
+            {"id": "benefits", "heading": "Benefits", "when": "terms.benefits", "body": (
+                "The Employee is eligible for the following benefits: {{terms.benefits}}."
+            )},
+            {"id": "termination", "heading": "Termination", "aliases": ["notice", "notice period"], "body": (
+                "Either party may terminate this Agreement on {{terms.notice_period|two (2) weeks}} written notice."
+            )},
+        ]
+    },
+    "board_resolution": {
+        "title": "Resolution of the Board of Directors",
+        "roles": ["company"],
+        "required": {
+            "company": "roles.company.name|terms.company_name",
+            "directors": "terms.directors|parties.0.name",
+            "resolution_subject": "terms.subject|terms.resolution_subject",
+            "effective_date": "dates.effective_date|effective_date",
+            "authorized_actions": "terms.actions|terms.authorized_actions"
+        },
+        "clauses": [
+            {"id": "company", "heading": "Company", "body": (
+                "The undersigned, being the directors of {{roles.company.name|terms.company_name|[Company]}} "
+                "(the \"Company\"), adopt the following resolution effective {{effective_date|[Effective Date]}}."
+            )},
+            {"id": "directors", "heading": "Directors", "body": "{{party_list}}"},
+            {"id": "recitals", "heading": "Recitals", "body": (
+                "WHEREAS, the Board has considered {{terms.subject|terms.resolution_subject|[Resolution Subject]}}."
+            )},
+            {"id": "resolution", "heading": "Resolution", "aliases": ["resolutions", "resolved"], "body": (
+                "NOW, THEREFORE, BE IT RESOLVED, that the Company is authorized to "
+                "{{terms.actions|terms.authorized_actions|[Authorized Actions]}}; and FURTHER RESOLVED, that the officers "
+                "of the Company are authorized to take all actions necessary to carry out this resolution."
+            )},
+        ]
+    },
+    "service_agreement": {
+        "title": "Service Agreement",
+        "roles": ["service_provider", "client"],
+        "required": {
+            "service_provider": "roles.service_provider.name",
+            "client": "roles.client.name",
+            "scope_of_services": "terms.scope|terms.services|terms.scope_of_services",
+            "payment_terms": "terms.compensation|terms.payment_terms|terms.fees",
+            "duration": "terms.duration|dates.duration|terms.term|dates.end_date"
+        },
+        "clauses": [
+            {"id": "parties", "heading": "Parties", "body": (
+                "This {{title}} (the \"Agreement\") is entered into as of {{effective_date|[Effective Date]}} "
+                "by and between:\n\n{{party_list}}"
+            )},
+            {"id": "services", "heading": "Services", "aliases": ["scope", "scope of work"], "body": (
+                "{{roles.service_provider.name|[Service Provider]}} shall provide to {{roles.client.name|[Client]}} "
+                "the following services: {{terms.scope|terms.services|terms.scope_of_services|[Scope of Services]}}."
+            )},
+            {"id": "payment", "heading": "Payment", "aliases": ["fees", "compensation", "rate"], "body": (
+                "The Client shall pay {{terms.compensation|terms.payment_terms|terms.fees|[Payment Terms]}}."
+            )},
+            {"id": "term", "heading": "Term", "aliases": ["duration", "period", "length"], "body": (
+                "This Agreement remains in effect for {{terms.duration|dates.duration|terms.term|[Term]}} unless "
+                "terminated earlier in accordance with its terms."
+            )},
+            {"id": "independent_contractor", "heading": "Relationship of the Parties", "aliases": ["relationship", "contractor status"], "body": (
+                "The Service Provider is an independent contractor, and nothing in this Agreement creates an "
+                "employment, partnership or agency relationship."
+            )},
+        ]
+    },
+    "consulting_agreement": {
+        "title": "Consulting Agreement",
+        "roles": ["consultant", "client"],
+        "required": {
+            "consultant": "roles.consultant.name",
+            "client": "roles.client.name",
+            "scope_of_services": "terms.scope|terms.services|terms.scope_of_services",
+            "fees": "terms.compensation|terms.fees|terms.payment_terms",
+            "duration": "terms.duration|dates.duration|terms.term|dates.end_date"
+        },
+        "clauses": [
+            {"id": "parties", "heading": "Parties", "body": (
+                "This {{title}} (the \"Agreement\") is entered into as of {{effective_date|[Effective Date]}} "
+                "by and between:\n\n{{party_list}}"
+            )},
+            {"id": "services", "heading": "Consulting Services", "aliases": ["scope", "scope of work"], "body": (
+                "{{roles.consultant.name|[Consultant]}} shall provide {{roles.client.name|[Client]}} with consulting "
+                "services relating to {{terms.scope|terms.services|terms.scope_of_services|[Scope of Services]}}."
+            )},
+            {"id": "fees", "heading": "Fees", "aliases": ["payment", "compensation", "rate"], "body": (
+                "The Client shall pay the Consultant {{terms.compensation|terms.fees|terms.payment_terms|[Fees]}}."
+            )},
+            {"id": "term", "heading": "Term", "aliases": ["duration", "period", "length"], "body": (
+                "This Agreement remains in effect for {{terms.duration|dates.duration|terms.term|[Term]}}."
+            )},
+            {"id": "intellectual_property", "heading": "Work Product", "aliases": ["ip", "ownership", "deliverables"], "body": (
+                "All work product created by the Consultant for the Client under this Agreement belongs to the Client "
+                "on payment in full."
+            )},
+        ]
+    },
+    "partnership_agreement": {
+        "title": "Partnership Agreement",
+        "roles": [],
+        "required": {
+            "partners": "parties.1.name",
+            "business_purpose": "terms.purpose|terms.business",
+            "capital_contributions": "terms.contributions|terms.capital_contributions"
+        },
+        "clauses": [
+            {"id": "parties", "heading": "Partners", "body": (
+                "This {{title}} (the \"Agreement\") is entered into as of {{effective_date|[Effective Date]}} "
+                "by and between:\n\n{{party_list}}"
+            )},
+            {"id": "business", "heading": "Business of the Partnership", "aliases": ["purpose"], "body": (
+                "The partners form a partnership under the name {{terms.partnership_name|[Partnership Name]}} to carry "
+                "on the business of {{terms.purpose|terms.business|[Business Purpose]}}."
+            )},
+            {"id": "contributions", "heading": "Capital Contributions", "aliases": ["capital"], "body": (
+                "Each partner shall contribute {{terms.contributions|terms.capital_contributions|[Capital Contributions]}}."
+            )},
+            {"id": "profits", "heading": "Profits and Losses", "aliases": ["losses", "profit sharing"], "body": (
+                "Profits and losses are shared {{terms.profit_split|terms.profit_sharing|equally among the partners}}."
+            )},
+        ]
+    },
+}
+
+COMMON_CLAUSES = [
+    {"id": "additional_terms", "heading": "Additional Terms", "when": "other_terms", "body": "{{other_terms}}"},
+    {"id": "additional_provisions", "heading": "Additional Provisions", "when": "provisions", "body": "{{provision_list}}"},
+    {"id": "governing_law", "heading": "Governing Law", "aliases": ["jurisdiction", "choice of law", "applicable law"], "body": (
+        "This Agreement is governed by the laws of {{jurisdiction|[Jurisdiction]}}."
+    )},
+    {"id": "signatures", "heading": "Signatures", "aliases": ["signature block", "execution"], "body": "{{signature_blocks}}"},
+]
+
+FALLBACK_TEMPLATE = {
+    "title": "Legal Document",
+    "roles": [],
+    "required": {"parties": "parties.0.name"},
+    "clauses": [
+        {"id": "parties", "heading": "Parties", "body": (
+            "This {{title}} is entered into as of {{effective_date|[Effective Date]}} by and between:\n\n{{party_list}}"
+        )},
+    ]
+}
+
+
+def label(key: str) -> str:
+    return key.replace("_", " ").capitalize()
+
+
+def format_value(value) -> str:
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, list):
+        return ", ".join(format_value(item) for item in value)
+    if isinstance(value, dict):
+        return "; ".join(f"{label(key)}: {format_value(item)}" for key, item in value.items())
+    return str(value)
+
+
+def compile_path(path: str) -> tuple:
+    return tuple(int(key) if key.isdigit() else key for key in path.split("."))
+
+
+def resolve(context: dict, path: tuple):
+    value = context
+    for key in path:
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, list) and isinstance(key, int):
+            value = value[key] if key < len(value) else None
+        else:
+            return None
+        if value is None or value == "" or value == [] or value == {}:
+            return None
+    return value
+
+
+def compile_body(body: str) -> list:
+    segments = []
+    position = 0
+    for match in FIELD_PATTERN.finditer(body):
+        if match.start() > position:
+            segments.append(body[position:match.start()])
+        alternatives = [compile_path(match.group(1))]
+        default = f"[{match.group(1)}]"
+        for option in match.group(2).split("|") if match.group(2) else []:
+            if PATH_PATTERN.fullmatch(option):
+                alternatives.append(compile_path(option))
+            else:
+                default = option
+        segments.append((tuple(alternatives), default))
+        position = match.end()
+    if position < len(body):
+        segments.append(body[position:])
+    return segments
+
+
+class CompiledTemplate:
+    def __init__(self, document_type: str, source: dict):
+        self.document_type = document_type
+        self.title = source["title"]
+        self.roles = source["roles"]
+        self.clauses = [
+            (clause["id"], clause["heading"], compile_path(clause["when"]) if clause.get("when") else None,
+             compile_body(clause["body"]))
+            for clause in source["clauses"] + COMMON_CLAUSES
+        ]
+        self.aliases = {clause["id"]: clause.get("aliases", []) for clause in source["clauses"] + COMMON_CLAUSES}
+        self.required = [
+            (field, tuple(compile_path(path) for path in paths.split("|")))
+            for field, paths in source.get("required", {}).items()
+        ]
+        self.referenced_terms = {
+            path[1]
+            for _, _, _, segments in self.clauses
+            for segment in segments if isinstance(segment, tuple)
+            for path in segment[0] if len(path) > 1 and path[0] == "terms"
+        }
+
+    def context(self, data: dict) -> dict:
+        parties = [party for party in data.get("parties") or [] if isinstance(party, dict)]
+        roles = {}
+        for role in self.roles:
+            roles[role] = next((party for party in parties if str(party.get("role", "")).lower().replace(" ", "_") == role), None)
+        unassigned = [party for party in parties if not any(party is assigned for assigned in roles.values())]
+        for role in self.roles:
+            if roles[role] is None and unassigned:
+                roles[role] = unassigned.pop(0)
+
+        terms = data.get("terms") if isinstance(data.get("terms"), dict) else {}
+        other_terms = {key: value for key, value in terms.items()
+                       if key not in self.referenced_terms and value not in (None, "", [], {})}
+        provisions = [provision for provision in data.get("provisions") or [] if provision]
+
+        return {
+            **data,
+            "title": data.get("title") or self.title,
+            "terms": terms,
+            "roles": roles,
+            "party_list": "\n".join(self.party_line(party) for party in parties) or "[Parties]",
+            "other_terms": "\n".join(f"{label(key)}: {format_value(value)}" for key, value in other_terms.items()),
+            "provisions": provisions,
+            "provision_list": "\n".join(f"({chr(97 + i % 26)}) {provision}" for i, provision in enumerate(provisions)),
+            "signature_blocks": "\n\n".join(
+                f"______________________________\n{party.get('name', '[Name]')}" for party in parties
+            ) or "______________________________"
+        }
+
+    def missing_fields(self, data: dict) -> list:
+        context = self.context(data or {})
+        return [field for field, paths in self.required if all(resolve(context, path) is None for path in paths)]
+
+    def party_line(self, party: dict) -> str:
+        line = party.get("name") or "[Name]"
+        if party.get("entity_type") and party["entity_type"] != "individual":
+            line += f", a {party['entity_type']}"
+        if party.get("address"):
+            line += f", of {party['address']}"
+        if party.get("role"):
+            line += f" (the \"{party['role'].replace('_', ' ').title()}\")"
+        return line
+
+    def render_clauses(self, data: dict) -> list:
+        context = self.context(data or {})
+        rendered = []
+        for clause_id, heading, when, segments in self.clauses:
+            if when is not None and resolve(context, when) is None:
+                continue
+            parts = []
+            for segment in segments:
+                if isinstance(segment, str):
+                    parts.append(segment)
+                    continue
+                alternatives, default = segment
+                for path in alternatives:
+                    value = resolve(context, path)
+                    if value is not None:
+                        parts.append(format_value(value))
+                        break
+                else:
+                    parts.append(default)
+            rendered.append({"id": clause_id, "heading": heading, "aliases": self.aliases[clause_id], "text": "".join(parts)})
+        return rendered
+
+    def build(self, data: dict) -> dict:
+        data = data or {}
+        return build_document(self.document_type, data, data.get("title") or self.title, self.render_clauses(data))
+
+    def render(self, data: dict) -> str:
+        data = data or {}
+        return format_text(data.get("title") or self.title, (
+            (number, clause["heading"], clause["text"]) for number, clause in enumerate(self.render_clauses(data), 1)
+        ))
+
+
+TEMPLATES = {document_type: CompiledTemplate(document_type, source) for document_type, source in TEMPLATE_SOURCES.items()}
+FALLBACK = CompiledTemplate("other", FALLBACK_TEMPLATE)
+
+
+def get_compiled_template(document_type: str) -> CompiledTemplate:
+    return TEMPLATES.get(document_type, FALLBACK)
+
+
+def render_document(document_type: str, document_data: dict) -> str:
+    return get_compiled_template(document_type).render(document_data)
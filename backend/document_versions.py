@@ -0,0 +1,128 @@
+import time
+import bisect
+import difflib
+
+from document_model import apply_text_delta, document_text, section_state
+
+
+def snapshot(document: dict) -> dict:
+    return {
+        "title": document.get("title", ""),
+        "order": list(document["order"]),
+        "sections": {section_id: section_state(section) for section_id, section in document["sections"].items()}
+    }
+
+
+def start_history(document: dict):
+    document["versions"] = {"checkpoints": [[document.get("version", 1), snapshot(document)]], "deltas": []}
+
+
+def record_version(document: dict, edit: dict, delta: dict | None, checkpoint_interval: int, max_checkpoints: int):
+    version = document.get("version", 1) + 1
+    document["version"] = version
+    document.setdefault("history", []).append({**edit, "version": version, "timestamp": time.time()})
+
+    versions = document.get("versions")
+    if versions is None:
+        return
+
+    versions["deltas"].append([version, delta or {}])
+    if version - versions["checkpoints"][-1][0] >= checkpoint_interval:
+        versions["checkpoints"].append([version, snapshot(document)])
+
+    if len(versions["checkpoints"]) > max_checkpoints:
+        versions["checkpoints"] = versions["checkpoints"][-max_checkpoints:]
+        oldest = versions["checkpoints"][0][0]
+        versions["deltas"] = versions["deltas"][bisect.bisect_right(versions["deltas"], oldest, key=lambda entry: entry[0]):]
+        document["history"] = [entry for entry in document["history"] if entry.get("version", 0) > oldest]
+
+
+def available_versions(document: dict) -> tuple[int, int] | None:
+    versions = document.get("versions")
+    if not versions:
+        return None
+    return versions["checkpoints"][0][0], document.get("version", 1)
+
+
+def apply_delta(state: dict, delta: dict):
+    sections = state["sections"]
+    for section_id in delta.get("remove", []):
+        sections.pop(section_id, None)
+    for section_id, section in delta.get("set", {}).items():
+        sections[section_id] = {**section, "children": list(section["children"])}
+    for section_id, change in delta.get("text", {}).items():
+        sections[section_id] = {**sections[section_id], "text": apply_text_delta(sections[section_id]["text"], change)}
+    if "order" in delta:
+        state["order"] = list(delta["order"])
+
+
+def get_version(document: dict, version: int) -> dict | None:
+    bounds = available_versions(document)
+    if bounds is None or not bounds[0] <= version <= bounds[1]:
+        return None
+
+    versions = document["versions"]
+    position = bisect.bisect_right(versions["checkpoints"], version, key=lambda entry: entry[0]) - 1
+    base_version, base = versions["checkpoints"][position]
+    state = {"title": base["title"], "order": list(base["order"]), "sections": dict(base["sections"])}
+
+    start = bisect.bisect_right(versions["deltas"], base_version, key=lambda entry: entry[0])
+    end = bisect.bisect_right(versions["deltas"], version, key=lambda entry: entry[0])
+    for _, delta in versions["deltas"][start:end]:
+        apply_delta(state, delta)
+
+    return {"version": version, **state, "content": document_text(state)}
+
+
+def diff_versions(document: dict, from_version: int, to_version: int) -> dict | None:
+    before = get_version(document, from_version)
+    after = get_version(document, to_version)
+    if before is None or after is None:
+        return None
+
+    changes = []
+    for section_id in [*after["sections"], *(section_id for section_id in before["sections"] if section_id not in after["sections"])]:
+        old = before["sections"].get(section_id)
+        new = after["sections"].get(section_id)
+        if old and new and (old["heading"], old["text"]) == (new["heading"], new["text"]):
+            continue
+        changes.append({
+            "section_id": section_id,
+            "heading": (new or old)["heading"],
+            "change": "added" if old is None else "removed" if new is None else "modified",
+            "before": old["text"] if old else None,
+            "after": new["text"] if new else None
+        })
+
+    return {
+        "from": from_version,
+        "to": to_version,
+        "changes": changes,
+        "unified": "".join(difflib.unified_diff(
+            before["content"].splitlines(keepends=True), after["content"].splitlines(keepends=True),
+            f"version {from_version}", f"version {to_version}"
+        ))
+    }
+
+
+def patch_since(document: dict, since: int | None) -> dict:
+    version = document.get("version", 1)
+    versions = document.get("versions")
+    if since is not None and versions and versions["checkpoints"][0][0] <= since <= version:
+        start = bisect.bisect_right(versions["deltas"], since, key=lambda entry: entry[0])
+        return {"base_version": since, "version": version, "deltas": [delta for _, delta in versions["deltas"][start:]]}
+    return {"base_version": None, "version": version, "snapshot": snapshot(document) if versions else None}
+
+
+class DocumentSync:
+    def __init__(self, version: int | None):
+        self.version = version
+
+    def patch(self, document: dict | None) -> dict | None:
+        if not document or not document.get("versions"):
+            return None
+        patch = patch_since(document, self.version)
+        if patch.get("deltas") == []:
+            return None
+        self.version = patch["version"]
+        return {"type": "document_patch", **patch}
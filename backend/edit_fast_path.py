@@ -0,0 +1,78 @@
+import threading
+
+from document_model import walk
+
+
+def quote(value: str, limit: int = 80) -> str:
+    value = " ".join(str(value).split())
+    return f"\"{value if len(value) <= limit else value[:limit - 3] + '...'}\""
+
+
+def edit_summary(document: dict, result: dict) -> str:
+    section = document["sections"].get(result.get("section_id"))
+    heading = section["heading"] if section else result.get("target_section")
+    edit_type, original = result.get("edit_type"), result.get("original_value")
+    if edit_type == "remove":
+        return f"Removed {quote(original)} from {heading}." if original else f"Removed the {heading} section."
+    if edit_type == "add":
+        return f"Added the new text to {heading}."
+    return f"Changed {quote(original)} to {quote(result.get('new_value'))} in {heading}."
+
+
+class EditFastPath:
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.follow_up_seconds = None
+        self.lock = threading.Lock()
+        self.counters = {"taken": 0, "fallback": 0, "saved_seconds": 0.0}
+
+    def confirmation(self, document: dict | None, results: list) -> tuple[str | None, str]:
+        if not document or not document.get("sections"):
+            return None, "no_document"
+        for _, result in results:
+            if result.get("status") != "success":
+                return None, "failed"
+            if result.get("rewrite"):
+                return None, "rewrite"
+            if not result.get("exact_match"):
+                return None, "inexact"
+            if result.get("affected_clauses"):
+                return None, "affected_clauses"
+
+        numbers = {section["id"]: number for number, section in walk(document)}
+        lines = [edit_summary(document, result) for _, result in results]
+        shown = []
+        for _, result in results:
+            section_id = result.get("section_id")
+            if section_id in numbers and section_id not in shown:
+                shown.append(section_id)
+                section = document["sections"][section_id]
+                lines.append(f"\n{numbers[section_id]}. {section['heading']}\n{section['text']}")
+        return "\n".join(lines), "clean"
+
+    def observe_follow_up(self, seconds: float):
+        with self.lock:
+            self.follow_up_seconds = seconds if self.follow_up_seconds is None else (
+                0.9 * self.follow_up_seconds + 0.1 * seconds
+            )
+
+    def record(self, taken: bool) -> float:
+        with self.lock:
+            if not taken:
+                self.counters["fallback"] += 1
+                return 0.0
+            saved = self.follow_up_seconds or 0.0
+            self.counters["taken"] += 1
+            self.counters["saved_seconds"] += saved
+            return saved
+
+    def stats(self) -> dict:
+        with self.lock:
+            decided = self.counters["taken"] + self.counters["fallback"]
+            return {
+                "enabled": self.enabled,
+                **self.counters,
+                "saved_seconds": round(self.counters["saved_seconds"], 3),
+                "taken_rate": round(self.counters["taken"] / decided, 4) if decided else 0.0,
+                "follow_up_round_seconds": round(self.follow_up_seconds, 4) if self.follow_up_seconds else None
+            }
@@ -0,0 +1,80 @@
+def normalize(value) -> str:
+    return " ".join(str(value or "").split()).casefold()
+
+
+def find_party(parties: list, party: dict) -> dict | None:
+    name, role = normalize(party.get("name")), normalize(party.get("role"))
+    if name:
+        match = next((existing for existing in parties if normalize(existing.get("name")) == name), None)
+        if match is not None:
+            return match
+    if role:
+        return next((existing for existing in parties if normalize(existing.get("role")) == role
+                     and not (name and existing.get("name"))), None)
+    return None
+
+
+def merge_parties(current: list, delta: list) -> list:
+    parties = [dict(party) for party in current]
+    for party in delta:
+        values = {key: value for key, value in party.items() if value not in (None, "")}
+        match = find_party(parties, party)
+        if match is None:
+            parties.append(values)
+            continue
+        if match.get("name"):
+            values.pop("name", None)
+        match.update(values)
+    return parties
+
+
+def merge_values(current: dict, delta: dict) -> dict:
+    merged = dict(current)
+    for key, value in delta.items():
+        if value is None:
+            merged.pop(key, None)
+        elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_values(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def merge_provisions(current: list, delta: list) -> list:
+    seen = {normalize(provision) for provision in current}
+    provisions = list(current)
+    for provision in delta:
+        if normalize(provision) and normalize(provision) not in seen:
+            seen.add(normalize(provision))
+            provisions.append(provision)
+    return provisions
+
+
+def merge_extracted(current: dict, delta: dict) -> dict:
+    merged = dict(current)
+    for key, value in delta.items():
+        if key == "parties" and isinstance(value, list):
+            merged[key] = merge_parties(current.get(key) or [], value)
+        elif key == "additional_provisions" and isinstance(value, list):
+            merged[key] = merge_provisions(current.get(key) or [], value)
+        elif value is None:
+            merged.pop(key, None)
+        elif isinstance(value, dict) and isinstance(current.get(key), dict):
+            merged[key] = merge_values(current[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def generation_data(extracted: dict, explicit: dict) -> dict:
+    dates = extracted.get("dates") or {}
+    data = {
+        "parties": extracted.get("parties") or [],
+        "effective_date": dates.get("effective_date"),
+        "dates": dates,
+        "terms": extracted.get("terms") or {},
+        "provisions": extracted.get("additional_provisions") or [],
+        "jurisdiction": extracted.get("jurisdiction")
+    }
+    data = {key: value for key, value in data.items() if value not in (None, "", [], {})}
+    return merge_values(data, explicit) if data else explicit
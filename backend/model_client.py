@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import random
+import threading
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+STATUS_ERRORS = {400: "BadRequestError", 401: "AuthenticationError", 403: "PermissionDeniedError", 404: "NotFoundError",
+                 409: "ConflictError", 422: "UnprocessableEntityError", 429: "RateLimitError"}
+
+
+class ModelBusy(RuntimeError):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def pool_limits(max_connections: int, max_keepalive: int, keepalive_seconds: float) -> dict:
+    return {"max_connections": max_connections, "max_keepalive_connections": max_keepalive,
+            "keepalive_expiry": keepalive_seconds}
+
+
+def pool_timeout(connect: float, read: float, pool: float) -> dict:
+    return {"connect": connect, "read": read, "write": connect, "pool": pool}
+
+
+class CompletionClient:
+    def __init__(self, sdk, http):
+        self.sdk = sdk
+        self.http = http
+        self.url = sdk.base_url.join("chat/completions")
+        self.headers = {name: value for name, value in sdk.default_headers.items() if isinstance(value, str)}
+
+    def request(self, body: bytes):
+        return self.http.build_request("POST", self.url, content=body, headers=self.headers)
+
+
+def build_client(api_key: str | None, limits: dict, timeout: dict, asynchronous: bool = False,
+                 base_url: str | None = None) -> CompletionClient:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+    limits, timeout = httpx.Limits(**limits), httpx.Timeout(**timeout)
+    http = (httpx.AsyncClient if asynchronous else httpx.Client)(limits=limits, timeout=timeout)
+    sdk = (AsyncOpenAI if asynchronous else OpenAI)(api_key=api_key, base_url=base_url, max_retries=0, timeout=timeout,
+                                                    http_client=http)
+    return CompletionClient(sdk, http)
+
+
+class LazyClient:
+    def __init__(self, build):
+        self.build = build
+        self.builds = 0
+        self.reset()
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.client = None
+        self.pid = None
+
+    def get(self):
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.client = self.build()
+                    self.builds += 1
+                    self.pid = os.getpid()
+        return self.client
+
+    def stats(self) -> dict:
+        return {"built": self.pid == os.getpid(), "builds": self.builds}
+
+
+def status_error(response) -> Exception:
+    import openai
+
+    text = response.text.strip()
+    try:
+        body = json.loads(text)
+        message = f"Error code: {response.status_code} - {body}"
+    except ValueError:
+        body = text or None
+        message = text or f"Error code: {response.status_code}"
+    if isinstance(body, dict):
+        body = body.get("error", body)
+    fallback = "InternalServerError" if response.status_code >= 500 else "APIStatusError"
+    name = STATUS_ERRORS.get(response.status_code, fallback)
+    return getattr(openai, name)(message, response=response, body=body)
+
+
+def send_completion(client: CompletionClient, body: bytes):
+    response = client.http.send(client.request(body), stream=True)
+    if response.is_error:
+        response.read()
+        response.close()
+        raise status_error(response)
+    return response
+
+
+async def asend_completion(client: CompletionClient, body: bytes):
+    response = await client.http.send(client.request(body), stream=True)
+    if response.is_error:
+        await response.aread()
+        await response.aclose()
+        raise status_error(response)
+    return response
+
+
+def raised(error: Exception, module: str, name: str) -> bool:
+    loaded = sys.modules.get(module)
+    return loaded is not None and isinstance(error, getattr(loaded, name))
+
+
+def retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    if not raised(error, "openai", "APIStatusError") or response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def retry_reason(error: Exception) -> str | None:
+    if raised(error, "openai", "APIStatusError"):
+        return str(error.status_code) if error.status_code in RETRYABLE_STATUS else None
+    if raised(error, "openai", "APIConnectionError"):
+        return "timeout" if "timed out" in str(error).lower() else "connection"
+    if raised(error, "httpx", "TimeoutException"):
+        return "timeout"
+    if raised(error, "httpx", "TransportError"):
+        return "connection"
+    return None
+
+
+class RetryPolicy:
+    def __init__(self, retries: int, base_delay: float, max_delay: float, seed: int | None = None):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"retries": 0, "exhausted": 0, "not_retryable": 0}
+
+    def delay(self, error: Exception, attempt: int) -> float | None:
+        reason = retry_reason(error)
+        wait = retry_after(error)
+        with self.lock:
+            if reason is None:
+                self.counters["not_retryable"] += 1
+                return None
+            if attempt >= self.retries or (wait is not None and wait > self.max_delay):
+                self.counters["exhausted"] += 1
+                return None
+            self.counters["retries"] += 1
+            if wait is not None:
+                return wait + self.random.uniform(0, self.base_delay)
+            return self.random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def busy(self, error: Exception) -> ModelBusy | None:
+        if not raised(error, "openai", "APIStatusError") or error.status_code != 429:
+            return None
+        wait = retry_after(error) or self.base_delay
+        return ModelBusy(f"The model is rate limited, retry in {wait:.0f}s" if wait >= 1
+                         else "The model is rate limited, retry shortly", wait)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"retries_allowed": self.retries, "base_delay_seconds": self.base_delay,
+                    "max_delay_seconds": self.max_delay, **self.counters}
@@ -0,0 +1,82 @@
+import threading
+
+TOOL_PHASES = {"extract_information": "gather", "generate_document": "generate", "apply_edits": "edit"}
+
+
+def parse_pairs(value: str) -> dict:
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {key.strip(): val.strip() for key, val in pairs}
+
+
+def route_phase(document: dict | None, messages: list) -> str:
+    after_tools = bool(messages) and messages[-1]["role"] == "tool"
+    if document and (document.get("sections") or document.get("content")):
+        return "reply" if after_tools else "edit"
+    if after_tools:
+        return "reply"
+    if document and document.get("ready_to_generate") and not document.get("missing_fields"):
+        return "generate"
+    return "gather"
+
+
+class ModelRouter:
+    def __init__(self, tiers: dict, routes: dict, escalate: bool):
+        self.tiers = tiers
+        self.order = list(tiers)
+        self.routes = {phase: tier for phase, tier in routes.items() if tier in tiers}
+        self.escalate = escalate
+        self.lock = threading.Lock()
+        self.usage = {tier: {"rounds": 0, "prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0} for tier in tiers}
+        self.escalations = {}
+
+    def rank(self, tier: str | None) -> int:
+        return self.order.index(tier) if tier in self.tiers else -1
+
+    def higher(self, first: str | None, second: str | None) -> str | None:
+        return first if self.rank(first) >= self.rank(second) else second
+
+    def model(self, tier: str) -> str:
+        return self.tiers[tier]
+
+    def route(self, document: dict | None, messages: list, floor: str | None = None) -> tuple[str, str]:
+        phase = route_phase(document, messages)
+        return phase, self.higher(self.routes.get(phase, self.order[-1]), floor)
+
+    def escalation(self, tier: str, tool_calls: dict, malformed: str | None) -> tuple[str, str] | None:
+        if not self.escalate or self.rank(tier) == len(self.order) - 1:
+            return None
+
+        target, reason = None, None
+        if malformed:
+            target, reason = self.order[-1], "invalid_arguments"
+        else:
+            for call in tool_calls.values():
+                needed = self.routes.get(TOOL_PHASES.get(call["function"]["name"]))
+                if self.rank(needed) > self.rank(tier) and self.rank(needed) > self.rank(target):
+                    target, reason = needed, "tool"
+
+        if target is None:
+            return None
+        with self.lock:
+            key = f"{tier}->{target}:{reason}"
+            self.escalations[key] = self.escalations.get(key, 0) + 1
+        return target, reason
+
+    def record(self, tier: str, seconds: float, usage: dict | None):
+        with self.lock:
+            totals = self.usage[tier]
+            totals["rounds"] += 1
+            totals["seconds"] += seconds
+            if usage:
+                totals["prompt_tokens"] += usage.get("prompt_tokens", 0)
+                totals["completion_tokens"] += usage.get("completion_tokens", 0)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "tiers": dict(self.tiers),
+                "routes": dict(self.routes),
+                "escalate": self.escalate,
+                "usage": {tier: {**totals, "seconds": round(totals["seconds"], 3)} for tier, totals in self.usage.items()},
+                "escalations": dict(self.escalations)
+            }
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import uuid
+import asyncio
+import threading
+from collections import Counter, OrderedDict
+
+
+def frame_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    def __init__(self, thread_id: int, interval: float, active=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.active = active
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.started_at = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None and (self.active is None or self.active()):
+                self.stacks[frame_stack(frame)] += 1
+
+    def stop(self) -> dict:
+        self.stopped.set()
+        self.thread.join()
+        return {
+            "seconds": time.perf_counter() - self.started_at,
+            "interval_seconds": self.interval,
+            "samples": sum(self.stacks.values()),
+            "folded": "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+        }
+
+
+class ProfileStore:
+    def __init__(self, interval: float, keep: int):
+        self.interval = interval
+        self.keep = keep
+        self.profiles = OrderedDict()
+        self.lock = threading.Lock()
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex[:16]
+
+    def save(self, profile_id: str, session_id: str, profile: dict):
+        with self.lock:
+            self.profiles[profile_id] = {"session_id": session_id, **profile}
+            while len(self.profiles) > self.keep:
+                self.profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> dict | None:
+        with self.lock:
+            return self.profiles.get(profile_id)
+
+    def profile(self, profile_id: str, session_id: str, events):
+        sampler = Sampler(threading.get_ident(), self.interval)
+        try:
+            yield from events
+        finally:
+            self.save(profile_id, session_id, sampler.stop())
+
+    async def aprofile(self, profile_id: str, session_id: str, events):
+        loop, task = asyncio.get_running_loop(), asyncio.current_task()
+        sampler = Sampler(threading.get_ident(), self.interval, lambda: asyncio.current_task(loop) is task)
+        try:
+            async for event in events:
+                yield event
+        finally:
+            self.save(profile_id, session_id, sampler.stop())
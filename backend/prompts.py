@@ -64,14 +64,16 @@ When the user requests changes:
 ### extract_information
 Call this function:
 - After the user provides new information
-- To structure and validate collected data
-- Before generating a document to ensure completeness
+- With only the fields that are new or changed; the server merges them with what was already recorded
+- To correct a party, send it again under the same name; set a term to null to remove it
+- Use the missing_fields and ready_to_generate it returns to decide what to ask next
 
 ### generate_document  
 Call this function:
 - ONLY after all required information is collected
 - ONLY after confirming details with the user
-- Include all extracted information in the function call
+- document_data only needs fields that differ from what extract_information recorded
+- The full document text is rendered from a template on the server; do not write the document out in your reply, summarize what was generated instead
 
 ### apply_edits
 Call this function:
@@ -0,0 +1,217 @@
+import re
+import json
+import math
+import time
+import uuid
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+CACHEABLE_FINISH_REASONS = ("stop", "tool_calls")
+SALIENT_TOKEN = re.compile(r"\b(?:\d[\d,./:-]*|(?!I\b)[A-Z][\w-]*)")
+
+
+def normalize_text(text: str | None, fold_case: bool = False) -> str:
+    text = " ".join((text or "").split())
+    return text.lower().strip(" .!?") if fold_case else text
+
+
+def canonical_json(value: str) -> str:
+    try:
+        return json.dumps(json.loads(value), sort_keys=True, separators=(",", ":"))
+    except (TypeError, json.JSONDecodeError):
+        return normalize_text(value)
+
+
+def normalize_message(message: dict) -> list:
+    role = message["role"]
+    if role == "tool":
+        return [role, canonical_json(message.get("content"))]
+    normalized = [role, normalize_text(message.get("content"), fold_case=role == "user")]
+    for tool_call in message.get("tool_calls") or []:
+        normalized.append([tool_call["function"]["name"], canonical_json(tool_call["function"]["arguments"])])
+    return normalized
+
+
+def salient_tokens(text: str | None) -> frozenset:
+    text = text or ""
+    return frozenset(token.rstrip(",./:-") for token in SALIENT_TOKEN.findall(text[:1].lower() + text[1:]))
+
+
+def digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, separators=(",", ":")).encode()).hexdigest()
+
+
+def ngrams(text: str, size: int = 3) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+
+
+def cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    norm = math.sqrt(sum(count * count for count in a.values())) * math.sqrt(sum(count * count for count in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def compact_chunk(chunk: dict) -> dict:
+    return {"choices": [
+        {"index": choice.get("index", 0), "delta": choice.get("delta") or {}, "finish_reason": choice.get("finish_reason")}
+        for choice in chunk["choices"]
+    ]}
+
+
+def replay_chunks(chunks: list):
+    call_ids = {}
+    for chunk in chunks:
+        chunk = json.loads(json.dumps(chunk))
+        for tool_call in chunk["choices"][0]["delta"].get("tool_calls") or []:
+            if tool_call.get("id"):
+                tool_call["id"] = call_ids.setdefault(tool_call["id"], f"call_cached_{uuid.uuid4().hex[:24]}")
+        yield chunk
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float, similarity: float, bucket_size: int = 64):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.bucket_size = bucket_size
+        self.entries = OrderedDict()
+        self.buckets = {}
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.counters = {
+            "lookups": 0,
+            "exact_hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "replayed_chunks": 0
+        }
+
+    def key(self, scope: str | None, params: dict) -> dict | None:
+        messages = params["messages"]
+        if not messages:
+            return None
+        head = [scope, params.get("model"), params.get("tool_choice"), [normalize_message(m) for m in messages[:-1]]]
+        last = normalize_message(messages[-1])
+        text = last[1] if last[0] == "user" else json.dumps(last)
+        prefix = digest(head)
+        user = last[0] == "user"
+        return {"key": digest([prefix, text]), "prefix": prefix, "text": text,
+                "grams": ngrams(text) if user else None,
+                "salient": salient_tokens(messages[-1].get("content")) if user else None}
+
+    def lookup(self, scope: str | None, params: dict) -> tuple[dict | None, list | None]:
+        lookup = self.key(scope, params)
+        if lookup is None:
+            return None, None
+
+        with self.lock:
+            self.counters["lookups"] += 1
+            entry = self._entry(lookup["key"])
+            tier = "exact_hits" if entry else None
+            if entry is None and lookup["grams"] and self.similarity < 1:
+                entry = self._similar(lookup)
+                tier = "similar_hits" if entry else None
+            if entry is None:
+                self.counters["misses"] += 1
+                return lookup, None
+            self.counters[tier] += 1
+            self.counters["replayed_chunks"] += len(entry["chunks"])
+            return None, entry["chunks"]
+
+    def _entry(self, key: str) -> dict | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] < time.time():
+            self._drop(key)
+            self.counters["expirations"] += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def _similar(self, lookup: dict) -> dict | None:
+        best, best_score = None, self.similarity
+        for key in list(self.buckets.get(lookup["prefix"], ())):
+            entry = self._entry(key)
+            if entry is None or entry["salient"] != lookup["salient"]:
+                continue
+            score = cosine(lookup["grams"], entry["grams"])
+            if score >= best_score:
+                best, best_score = key, score
+        if best is None:
+            return None
+        return self.entries[best]
+
+    def _drop(self, key: str):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry["bytes"]
+        bucket = self.buckets.get(entry["prefix"])
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self.buckets[entry["prefix"]]
+
+    def store(self, lookup: dict, chunks: list):
+        chunks = [compact_chunk(chunk) for chunk in chunks if chunk.get("choices")]
+        finish_reason = next((chunk["choices"][0]["finish_reason"] for chunk in reversed(chunks)
+                              if chunk["choices"][0]["finish_reason"]), None)
+        if finish_reason not in CACHEABLE_FINISH_REASONS:
+            return
+
+        entry = {
+            "prefix": lookup["prefix"],
+            "grams": lookup["grams"],
+            "salient": lookup["salient"],
+            "chunks": chunks,
+            "tool_calls": finish_reason == "tool_calls",
+            "bytes": len(json.dumps(chunks)) + len(lookup["text"]),
+            "expires_at": time.time() + self.ttl_seconds
+        }
+        with self.lock:
+            if lookup["key"] in self.entries:
+                self._drop(lookup["key"])
+            self.entries[lookup["key"]] = entry
+            self.total_bytes += entry["bytes"]
+            if lookup["grams"] and not entry["tool_calls"]:
+                bucket = self.buckets.setdefault(lookup["prefix"], OrderedDict())
+                bucket[lookup["key"]] = True
+                if len(bucket) > self.bucket_size:
+                    bucket.popitem(last=False)
+            self.counters["stores"] += 1
+            self._evict()
+
+    def _evict(self):
+        now = time.time()
+        while self.entries:
+            key, entry = next(iter(self.entries.items()))
+            if entry["expires_at"] < now:
+                self._drop(key)
+                self.counters["expirations"] += 1
+            elif len(self.entries) > self.max_entries or (self.total_bytes > self.max_bytes and len(self.entries) > 1):
+                self._drop(key)
+                self.counters["evictions"] += 1
+            else:
+                break
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+            entries, total_bytes = len(self.entries), self.total_bytes
+        hits = counters["exact_hits"] + counters["similar_hits"]
+        return {
+            "enabled": True,
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "similarity": self.similarity,
+            "hit_rate": hits / counters["lookups"] if counters["lookups"] else 0.0,
+            **counters
+        }
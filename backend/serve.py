@@ -0,0 +1,16 @@
+import os
+
+import uvicorn
+
+if __name__ == "__main__":
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    uvicorn.run(
+        "asgi:application",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", 5001)),
+        workers=workers if workers > 1 else None,
+        log_level=os.getenv("LOG_LEVEL", "info"),
+        backlog=int(os.getenv("BACKLOG", 4096)),
+        timeout_keep_alive=int(os.getenv("KEEPALIVE_SECONDS", 5)),
+        access_log=os.getenv("ACCESS_LOG", "off").lower() in ("1", "true", "on")
+    )
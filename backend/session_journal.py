@@ -0,0 +1,222 @@
+import os
+import re
+import time
+import json
+import fcntl
+import atexit
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+SEGMENT_PATTERN = re.compile(r"^(journal|snapshot)-(\d{8})\.log$")
+
+
+def parse_line(line: str) -> tuple | None:
+    parts = line.rstrip("\n").split("\t", 3)
+    if len(parts) != 4 or not line.endswith("\n"):
+        return None
+    op, ts, session_id, payload = parts
+    try:
+        return op, float(ts), json.loads(session_id), payload
+    except (ValueError, json.JSONDecodeError):
+        return None
+
+
+def join_messages(conversation: str | None, appended: list) -> str:
+    if not appended:
+        return conversation
+    if not conversation or conversation == "[]":
+        return "[" + ",".join(appended) + "]"
+    return conversation[:-1] + "," + ",".join(appended) + "]"
+
+
+def merge_versions(versions: dict | None, change: dict | None) -> dict | None:
+    if change is None:
+        return None
+    merged = {}
+    for kind in ("checkpoints", "deltas"):
+        since = change["since"][kind]
+        kept = [] if since is None else [item for item in (versions or {}).get(kind, []) if item[0] >= since]
+        merged[kind] = kept + change[kind]
+    return merged
+
+
+class SessionJournal:
+    def __init__(self, directory: str, flush_interval: float, compact_bytes: int):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        self.pending = deque()
+        self.file = None
+        self.segment_bytes = 0
+        self.compacting = None
+        self.stopped = threading.Event()
+        self.flush_lock = threading.Lock()
+        self.counters = {
+            "records": 0,
+            "bytes_written": 0,
+            "flushes": 0,
+            "fsync_seconds": 0.0,
+            "compactions": 0,
+            "compaction_seconds": 0.0,
+            "recovered_sessions": 0,
+            "recovery_seconds": 0.0
+        }
+        os.makedirs(directory, exist_ok=True)
+        snapshot, segments = self.files()
+        self.segment = max([snapshot or 0, *segments]) + 1
+        self.writer = threading.Thread(target=self.run, name="session-journal", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def files(self) -> tuple[int | None, list]:
+        snapshot, segments = None, []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match and match.group(1) == "snapshot":
+                snapshot = max(snapshot or 0, int(match.group(2)))
+            elif match:
+                segments.append(int(match.group(2)))
+        return snapshot, sorted(segments)
+
+    def path(self, kind: str, number: int) -> str:
+        return os.path.join(self.directory, f"{kind}-{number:08d}.log")
+
+    @contextmanager
+    def locked(self):
+        with open(os.path.join(self.directory, "lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def sources(self, through: int) -> list:
+        snapshot, segments = self.files()
+        paths = [self.path("snapshot", snapshot)] if snapshot is not None else []
+        paths += [self.path("journal", number) for number in segments
+                  if (snapshot is None or number > snapshot) and number <= through]
+        return paths
+
+    def replay(self):
+        with self.locked():
+            for path in self.sources(self.segment - 1):
+                with open(path, encoding="utf-8") as source:
+                    for line in source:
+                        record = parse_line(line)
+                        if record:
+                            yield record
+
+    def start_compaction(self, through: int):
+        self.compacting = threading.Thread(target=self.compact, args=(through,), name="session-journal-compact", daemon=True)
+        self.compacting.start()
+
+    def append(self, op: str, session_id: str, payload: str):
+        self.pending.append(f"{op}\t{time.time():.3f}\t{json.dumps(session_id)}\t{payload}\n")
+
+    def run(self):
+        while not self.stopped.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            lines = []
+            while self.pending:
+                lines.append(self.pending.popleft())
+            if not lines:
+                return
+
+            if self.file is None:
+                self.file = open(self.path("journal", self.segment), "a", encoding="utf-8")
+            data = "".join(lines)
+            started = time.perf_counter()
+            self.file.write(data)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.counters["fsync_seconds"] += time.perf_counter() - started
+            self.counters["records"] += len(lines)
+            self.counters["bytes_written"] += len(data)
+            self.counters["flushes"] += 1
+            self.segment_bytes += len(data)
+
+            if self.segment_bytes >= self.compact_bytes and not (self.compacting and self.compacting.is_alive()):
+                self.file.close()
+                self.file = None
+                self.segment_bytes = 0
+                self.segment += 1
+                self.start_compaction(self.segment - 1)
+
+    def compact(self, through: int):
+        with self.locked():
+            paths = self.sources(through)
+            if any(os.path.basename(path).startswith("journal") for path in paths):
+                self.merge(paths, through)
+
+    def merge(self, paths: list, through: int):
+        started = time.perf_counter()
+        sessions = {}
+        for path in paths:
+            with open(path, encoding="utf-8") as source:
+                for line in source:
+                    op, _, rest = line.partition("\t")
+                    ts, _, rest = rest.partition("\t")
+                    session_id, _, payload = rest.partition("\t")
+                    if not line.endswith("\n") or not payload:
+                        continue
+                    payload = payload[:-1]
+                    if op == "x":
+                        sessions.pop(session_id, None)
+                        continue
+                    state = sessions.pop(session_id, None) or [ts, None, [], None, None]
+                    state[0] = ts
+                    if op == "c":
+                        state[1], state[2] = payload, []
+                    elif op == "a":
+                        state[2].append(payload[1:-1])
+                    elif op == "d":
+                        state[3] = None if payload == "null" else payload
+                        if state[3] is None:
+                            state[4] = None
+                    elif op == "v" and state[3] is not None:
+                        state[4] = merge_versions(state[4], json.loads(payload))
+                    sessions[session_id] = state
+
+        temporary = self.path("snapshot", through) + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as target:
+            for session_id, (ts, conversation, appended, document, versions) in sessions.items():
+                conversation = join_messages(conversation, appended)
+                if conversation is not None:
+                    target.write(f"c\t{ts}\t{session_id}\t{conversation}\n")
+                if document is not None:
+                    target.write(f"d\t{ts}\t{session_id}\t{document}\n")
+                if document is not None and versions is not None:
+                    change = {"since": {"checkpoints": None, "deltas": None}, **versions}
+                    target.write(f"v\t{ts}\t{session_id}\t{json.dumps(change, default=str)}\n")
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(temporary, self.path("snapshot", through))
+
+        for path in paths:
+            os.remove(path)
+        self.counters["compactions"] += 1
+        self.counters["compaction_seconds"] += time.perf_counter() - started
+
+    def close(self):
+        self.stopped.set()
+        self.flush()
+        if self.compacting:
+            self.compacting.join()
+        with self.flush_lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def stats(self) -> dict:
+        return {
+            "directory": self.directory,
+            "flush_interval_seconds": self.flush_interval,
+            "pending": len(self.pending),
+            "segment": self.segment,
+            "segment_bytes": self.segment_bytes,
+            **self.counters
+        }
@@ -0,0 +1,410 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+
+from session_journal import SessionJournal, merge_versions
+
+
+class SessionStore:
+    backend = "base"
+    lock_stripes = 64
+
+    def __init__(self, ttl_seconds: float, max_sessions: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self.counter_lock = threading.Lock()
+        self.session_locks = [threading.RLock() for _ in range(self.lock_stripes)]
+
+    def session_lock(self, session_id: str) -> threading.RLock:
+        return self.session_locks[hash(session_id) % self.lock_stripes]
+
+    def count(self, name: str, amount: int = 1):
+        with self.counter_lock:
+            self.counters[name] += amount
+
+    def claim_turn(self, session_id: str, lease_seconds: float) -> bool:
+        return True
+
+    def release_turn(self, session_id: str):
+        pass
+
+    def get_conversation(self, session_id: str) -> list | None:
+        raise NotImplementedError
+
+    def save_conversation(self, session_id: str, messages: list):
+        raise NotImplementedError
+
+    def get_document(self, session_id: str) -> dict | None:
+        raise NotImplementedError
+
+    def save_document(self, session_id: str, document: dict):
+        raise NotImplementedError
+
+    def delete_document(self, session_id: str):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    backend = "memory"
+
+    def __init__(self, ttl_seconds: float, max_sessions: int, max_bytes: int, journal: SessionJournal | None = None):
+        super().__init__(ttl_seconds, max_sessions)
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+        self.journal = journal
+        if journal:
+            self.recover()
+
+    def _entry(self, session_id: str) -> dict | None:
+        entry = self.entries.get(session_id)
+        if entry is None:
+            return None
+        if entry["expires_at"] < time.time():
+            self._drop(session_id)
+            self.count("expirations")
+            return None
+        entry["expires_at"] = time.time() + self.ttl_seconds
+        self.entries.move_to_end(session_id)
+        return entry
+
+    def _new_entry(self, session_id: str) -> dict:
+        entry = {"conversation": None, "document": None, "conversation_bytes": 0, "document_bytes": 0,
+                 "journaled_messages": 0, "versions": None, "version_sizes": None}
+        self.entries[session_id] = entry
+        return entry
+
+    def _remove(self, session_id: str):
+        entry = self.entries.pop(session_id)
+        self.total_bytes -= entry["conversation_bytes"] + entry["document_bytes"]
+
+    def _drop(self, session_id: str):
+        self._remove(session_id)
+        if self.journal:
+            self.journal.append("x", session_id, "null")
+
+    def _journal(self, session_id: str, key: str, entry: dict, value, payload: str | None):
+        if key == "document":
+            self.journal.append("d", session_id, payload or "null")
+        elif value is not None and value is entry["conversation"] and entry["journaled_messages"] <= len(value):
+            if len(value) > entry["journaled_messages"]:
+                self.journal.append("a", session_id, json.dumps(value[entry["journaled_messages"]:], default=str))
+            entry["journaled_messages"] = len(value)
+        else:
+            self.journal.append("c", session_id, payload or "null")
+            entry["journaled_messages"] = len(value or [])
+
+    def _version_change(self, entry: dict, versions: dict | None) -> str | None:
+        if versions is None:
+            changed = entry["version_sizes"] is not None
+            entry["versions"] = entry["version_sizes"] = None
+            return "null" if changed else None
+        if versions is not entry["versions"] or entry["version_sizes"] is None:
+            entry["versions"] = versions
+            entry["version_sizes"] = {"checkpoints": deque(), "deltas": deque()}
+            changed = True
+        else:
+            changed = False
+
+        since, added = {}, {}
+        for kind, known in entry["version_sizes"].items():
+            items = versions[kind]
+            while known and (not items or known[0][0] < items[0][0]):
+                known.popleft()
+                changed = True
+            since[kind] = known[0][0] if known else None
+            start = len(items)
+            while start and (not known or items[start - 1][0] > known[-1][0]):
+                start -= 1
+            added[kind] = [json.dumps(item, default=str) for item in items[start:]]
+            known.extend((item[0], len(payload)) for item, payload in zip(items[start:], added[kind]))
+            changed = changed or bool(added[kind])
+        if not changed:
+            return None
+        return (f'{{"since": {json.dumps(since)}, "checkpoints": [{",".join(added["checkpoints"])}], '
+                f'"deltas": [{",".join(added["deltas"])}]}}')
+
+    def _document_payload(self, entry: dict, document: dict | None) -> tuple:
+        if document is None:
+            return None, self._version_change(entry, None), 0
+        payload = json.dumps({key: value for key, value in document.items() if key != "versions"}, default=str)
+        change = self._version_change(entry, document.get("versions"))
+        sizes = entry["version_sizes"] or {}
+        return payload, change, len(payload) + sum(size for known in sizes.values() for _, size in known)
+
+    def _store(self, session_id: str, key: str, value):
+        entry = self._entry(session_id) or self._new_entry(session_id)
+        entry["expires_at"] = time.time() + self.ttl_seconds
+
+        if key == "document":
+            payload, change, size = self._document_payload(entry, value)
+        else:
+            payload = json.dumps(value, default=str) if value is not None else None
+            change, size = None, len(payload) if payload is not None else 0
+        if self.journal:
+            self._journal(session_id, key, entry, value, payload)
+            if change is not None and value is not None:
+                self.journal.append("v", session_id, change)
+        self.total_bytes += size - entry[f"{key}_bytes"]
+        entry[key] = value
+        entry[f"{key}_bytes"] = size
+        self._evict()
+
+    def _evict(self):
+        now = time.time()
+        while self.entries:
+            session_id, entry = next(iter(self.entries.items()))
+            if entry["expires_at"] < now:
+                self._drop(session_id)
+                self.count("expirations")
+            elif len(self.entries) > self.max_sessions or (self.total_bytes > self.max_bytes and len(self.entries) > 1):
+                self._drop(session_id)
+                self.count("evictions")
+            else:
+                break
+
+    def _get(self, session_id: str, key: str):
+        with self.lock:
+            entry = self._entry(session_id)
+            value = entry[key] if entry else None
+        self.count("hits" if value is not None else "misses")
+        return value
+
+    def get_conversation(self, session_id: str) -> list | None:
+        return self._get(session_id, "conversation")
+
+    def save_conversation(self, session_id: str, messages: list):
+        with self.lock:
+            self._store(session_id, "conversation", messages)
+
+    def get_document(self, session_id: str) -> dict | None:
+        return self._get(session_id, "document")
+
+    def save_document(self, session_id: str, document: dict):
+        with self.lock:
+            self._store(session_id, "document", document)
+
+    def delete_document(self, session_id: str):
+        with self.lock:
+            if self._entry(session_id):
+                self._store(session_id, "document", None)
+
+    def recover(self):
+        started = time.perf_counter()
+        with self.lock:
+            for op, ts, session_id, payload in self.journal.replay():
+                if op == "x":
+                    if session_id in self.entries:
+                        self._remove(session_id)
+                    continue
+
+                entry = self.entries.get(session_id) or self._new_entry(session_id)
+                self.entries.move_to_end(session_id)
+                entry["expires_at"] = ts + self.ttl_seconds
+                value = json.loads(payload)
+                if op == "a" and entry["conversation"] is not None:
+                    entry["conversation"].extend(value)
+                    entry["journaled_messages"] = len(entry["conversation"])
+                    entry["conversation_bytes"] += len(payload)
+                    self.total_bytes += len(payload)
+                    continue
+                if op == "v":
+                    if entry["document"] is not None:
+                        versions = merge_versions(entry["document"].get("versions"), value)
+                        if versions is None:
+                            entry["document"].pop("versions", None)
+                        else:
+                            entry["document"]["versions"] = versions
+                    continue
+
+                if op == "d":
+                    if value is not None and entry["document"] is not None and "versions" in entry["document"]:
+                        value["versions"] = entry["document"]["versions"]
+                    entry["document"] = value
+                    continue
+                size = len(payload) if value is not None else 0
+                self.total_bytes += size - entry["conversation_bytes"]
+                entry["conversation"] = value
+                entry["conversation_bytes"] = size
+                entry["journaled_messages"] = len(value or [])
+
+            for entry in self.entries.values():
+                _, _, size = self._document_payload(entry, entry["document"])
+                self.total_bytes += size - entry["document_bytes"]
+                entry["document_bytes"] = size
+
+            now = time.time()
+            for session_id in [session_id for session_id, entry in self.entries.items() if entry["expires_at"] < now]:
+                self._remove(session_id)
+            self._evict()
+            self.journal.counters["recovered_sessions"] = len(self.entries)
+        self.journal.counters["recovery_seconds"] = time.perf_counter() - started
+        self.journal.start_compaction(self.journal.segment - 1)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "backend": self.backend,
+                "sessions": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                **self.counters,
+                **({"journal": self.journal.stats()} if self.journal else {})
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    backend = "sqlite"
+    prune_every = 100
+
+    def __init__(self, path: str, ttl_seconds: float, max_sessions: int):
+        super().__init__(ttl_seconds, max_sessions)
+        self.path = path
+        self.local = threading.local()
+        self.writes = 0
+        self.connection().execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, conversation TEXT, document TEXT, updated_at REAL NOT NULL)"
+        )
+        self.connection().execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        self.connection().execute(
+            "CREATE TABLE IF NOT EXISTS turns (session_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    @contextmanager
+    def session_lock(self, session_id: str):
+        with super().session_lock(session_id):
+            conn = self.connection()
+            if conn.in_transaction:
+                yield
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def claim_turn(self, session_id: str, lease_seconds: float) -> bool:
+        now = time.time()
+        return self.connection().execute(
+            "INSERT INTO turns (session_id, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (session_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE turns.expires_at < ?",
+            (session_id, str(os.getpid()), now + lease_seconds, now)
+        ).rowcount == 1
+
+    def release_turn(self, session_id: str):
+        self.connection().execute("DELETE FROM turns WHERE session_id = ? AND owner = ?", (session_id, str(os.getpid())))
+
+    def _get(self, session_id: str, column: str):
+        row = self.connection().execute(
+            f"SELECT {column}, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+
+        if row and row[1] + self.ttl_seconds < time.time():
+            self.connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self.count("expirations")
+            row = None
+
+        if row is None or row[0] is None:
+            self.count("misses")
+            return None
+        self.count("hits")
+        return json.loads(row[0])
+
+    def _store(self, session_id: str, column: str, value):
+        payload = json.dumps(value, default=str) if value is not None else None
+        self.connection().execute(
+            f"INSERT INTO sessions (session_id, {column}, updated_at) VALUES (?, ?, ?) "
+            f"ON CONFLICT (session_id) DO UPDATE SET {column} = excluded.{column}, updated_at = excluded.updated_at",
+            (session_id, payload, time.time())
+        )
+        self.writes += 1
+        if self.writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        conn = self.connection()
+        expired = conn.execute(
+            "DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+        evicted = conn.execute(
+            "DELETE FROM sessions WHERE session_id IN ("
+            "SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,)
+        ).rowcount
+        conn.execute("DELETE FROM turns WHERE expires_at < ?", (time.time(),))
+        self.count("expirations", expired)
+        self.count("evictions", evicted)
+
+    def get_conversation(self, session_id: str) -> list | None:
+        return self._get(session_id, "conversation")
+
+    def save_conversation(self, session_id: str, messages: list):
+        self._store(session_id, "conversation", messages)
+
+    def get_document(self, session_id: str) -> dict | None:
+        return self._get(session_id, "document")
+
+    def save_document(self, session_id: str, document: dict):
+        self._store(session_id, "document", document)
+
+    def delete_document(self, session_id: str):
+        self.connection().execute("UPDATE sessions SET document = NULL WHERE session_id = ?", (session_id,))
+
+    def stats(self) -> dict:
+        sessions, size = self.connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(COALESCE(LENGTH(conversation), 0) + COALESCE(LENGTH(document), 0)), 0) "
+            "FROM sessions"
+        ).fetchone()
+        return {
+            "backend": self.backend,
+            "path": self.path,
+            "sessions": sessions,
+            "bytes": size,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            **self.counters
+        }
+
+
+def create_session_store() -> SessionStore:
+    backend = os.getenv("SESSION_STORE", "memory")
+    ttl_seconds = float(os.getenv("SESSION_TTL_SECONDS", 24 * 60 * 60))
+    max_sessions = int(os.getenv("SESSION_MAX_SESSIONS", 10000))
+
+    if backend == "memory":
+        max_bytes = int(os.getenv("SESSION_MAX_BYTES", 256 * 1024 * 1024))
+        journal_dir = os.getenv("SESSION_JOURNAL_DIR")
+        journal = SessionJournal(
+            journal_dir,
+            flush_interval=float(os.getenv("SESSION_JOURNAL_FLUSH_MS", 50)) / 1000,
+            compact_bytes=int(os.getenv("SESSION_JOURNAL_COMPACT_BYTES", 64 * 1024 * 1024))
+        ) if journal_dir else None
+        return MemorySessionStore(ttl_seconds, max_sessions, max_bytes, journal)
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_DB_PATH", "sessions.db"), ttl_seconds, max_sessions)
+
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
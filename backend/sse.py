@@ -0,0 +1,48 @@
+import json
+import time
+from json.encoder import encode_basestring_ascii
+
+ENCODER = json.JSONEncoder()
+CONTENT_PREFIX = 'data: {"type": "content", "content": '
+EVENT_SUFFIX = "}\n\n"
+
+
+def sse_event(payload: dict) -> str:
+    return f"data: {ENCODER.encode(payload)}\n\n"
+
+
+def content_event(content: str) -> str:
+    return CONTENT_PREFIX + encode_basestring_ascii(content) + EVENT_SUFFIX
+
+
+class ContentCoalescer:
+    def __init__(self, window_seconds: float, max_chars: int):
+        self.window_seconds = window_seconds
+        self.max_chars = max_chars
+        self.parts = []
+        self.size = 0
+        self.flushed_at = time.monotonic()
+
+    def add(self, content: str) -> str | None:
+        if self.window_seconds <= 0:
+            return content_event(content)
+
+        self.parts.append(content)
+        self.size += len(content)
+        if self.size >= self.max_chars:
+            return self.flush()
+        return self.poll()
+
+    def poll(self) -> str | None:
+        if self.parts and time.monotonic() - self.flushed_at >= self.window_seconds:
+            return self.flush()
+        return None
+
+    def flush(self) -> str | None:
+        self.flushed_at = time.monotonic()
+        if not self.parts:
+            return None
+        content = "".join(self.parts)
+        self.parts = []
+        self.size = 0
+        return content_event(content)
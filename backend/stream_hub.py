@@ -0,0 +1,208 @@
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+
+def parse_event_id(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TurnStream:
+    def __init__(self, session_id: str, first_id: int, capacity: int):
+        self.session_id = session_id
+        self.first_id = first_id
+        self.next_id = first_id
+        self.capacity = capacity
+        self.events = []
+        self.readers = 0
+        self.done = False
+        self.finished_at = None
+        self.condition = threading.Condition()
+        self.waiters = set()
+        self.task = None
+
+    def publish(self, data: str):
+        with self.condition:
+            self.events.append((self.next_id, data))
+            self.next_id += 1
+            self.notify()
+
+    def finish(self):
+        with self.condition:
+            self.done = True
+            self.finished_at = time.time()
+            self.trim()
+            self.notify()
+
+    def trim(self):
+        if self.done and not self.readers:
+            self.events = self.events[-self.capacity:]
+
+    def attach(self):
+        with self.condition:
+            self.readers += 1
+
+    def detach(self):
+        with self.condition:
+            self.readers -= 1
+            self.trim()
+
+    def notify(self):
+        self.condition.notify_all()
+        for loop, event in list(self.waiters):
+            loop.call_soon_threadsafe(event.set)
+
+    def pending(self, last_id: int | None) -> tuple[list, bool]:
+        if last_id is None:
+            last_id = self.first_id - 1
+        oldest = self.events[0][0] if self.events else self.next_id
+        events = self.events[max(0, last_id + 1 - oldest):]
+        return events, last_id + 1 < oldest
+
+    def frames(self, last_id: int | None, events: list, gap: bool) -> list:
+        frames = []
+        if gap:
+            frames.append(f"data: {json.dumps({'type': 'stream_gap', 'last_event_id': last_id})}\n\n")
+        frames.extend(f"id: {event_id}\n{data}" for event_id, data in events)
+        return frames
+
+    def iter(self, last_id: int | None, keepalive: float = 15.0):
+        gap_checked = False
+        self.attach()
+        try:
+            while True:
+                with self.condition:
+                    events, gap = self.pending(last_id)
+                    done = self.done
+                    if not events and not done and not self.condition.wait(keepalive):
+                        events = None
+                if events is None:
+                    yield ": keepalive\n\n"
+                    continue
+                if events:
+                    yield "".join(self.frames(last_id, events, gap and not gap_checked))
+                    gap_checked = True
+                    last_id = events[-1][0]
+                elif done:
+                    return
+        finally:
+            self.detach()
+
+    async def aiter(self, last_id: int | None, keepalive: float = 15.0):
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        waiter = (loop, wakeup)
+        self.waiters.add(waiter)
+        gap_checked = False
+        self.attach()
+        try:
+            while True:
+                wakeup.clear()
+                with self.condition:
+                    events, gap = self.pending(last_id)
+                    done = self.done
+                if events:
+                    yield "".join(self.frames(last_id, events, gap and not gap_checked))
+                    gap_checked = True
+                    last_id = events[-1][0]
+                    continue
+                if done:
+                    return
+                try:
+                    await asyncio.wait_for(wakeup.wait(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self.waiters.discard(waiter)
+            self.detach()
+
+
+class StreamHub:
+    def __init__(self, capacity: int, retention_seconds: float, max_sessions: int, guard=None,
+                 lease_seconds: float = 600.0):
+        self.capacity = capacity
+        self.retention_seconds = retention_seconds
+        self.max_sessions = max_sessions
+        self.guard = guard
+        self.lease_seconds = lease_seconds
+        self.streams = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, session_id: str) -> TurnStream | None:
+        with self.lock:
+            return self.streams.get(session_id)
+
+    def resumable(self, session_id: str, last_id: int | None) -> TurnStream | None:
+        stream = self.get(session_id)
+        if stream is None or (stream.done and (last_id or 0) >= stream.next_id - 1):
+            return None
+        return stream
+
+    def create(self, session_id: str) -> TurnStream | None:
+        with self.lock:
+            self.prune()
+            previous = self.streams.get(session_id)
+            if previous and not previous.done:
+                return None
+            if self.guard and not self.guard.claim_turn(session_id, self.lease_seconds):
+                return None
+            stream = TurnStream(session_id, previous.next_id if previous else 1, self.capacity)
+            self.streams[session_id] = stream
+            self.streams.move_to_end(session_id)
+            return stream
+
+    def release(self, stream: TurnStream):
+        stream.finish()
+        if self.guard:
+            self.guard.release_turn(stream.session_id)
+
+    def prune(self):
+        now = time.time()
+        for session_id, stream in list(self.streams.items()):
+            expired = stream.done and now - stream.finished_at > self.retention_seconds
+            if expired or (len(self.streams) > self.max_sessions and stream.done):
+                del self.streams[session_id]
+
+    def start(self, session_id: str, events) -> TurnStream | None:
+        stream = self.create(session_id)
+        if stream is None:
+            return None
+
+        def produce():
+            try:
+                for event in events():
+                    stream.publish(event)
+            finally:
+                self.release(stream)
+
+        threading.Thread(target=produce, name=f"turn-{session_id}", daemon=True).start()
+        return stream
+
+    def start_async(self, session_id: str, events) -> TurnStream | None:
+        stream = self.create(session_id)
+        if stream is None:
+            return None
+
+        async def produce():
+            try:
+                async for event in events():
+                    stream.publish(event)
+            finally:
+                self.release(stream)
+
+        stream.task = asyncio.get_running_loop().create_task(produce())
+        return stream
+
+    def stats(self) -> dict:
+        with self.lock:
+            streams = list(self.streams.values())
+        return {
+            "sessions": len(streams),
+            "running": sum(not stream.done for stream in streams),
+            "buffered_events": sum(len(stream.events) for stream in streams)
+        }
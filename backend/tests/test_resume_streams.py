@@ -0,0 +1,80 @@
+import random
+import asyncio
+
+import pytest
+
+from benchmarks.common import start_mock
+from benchmarks.resume_streams import parse_frames, run_asgi_turn, run_wsgi_turn
+
+import app
+from model_client import build_client
+from stream_hub import TurnStream
+
+SEED = 7
+TURNS = 12
+DROP_RATE = 0.7
+
+
+@pytest.fixture
+def mock(monkeypatch):
+    server = start_mock(tokens=30, token_delay=0.001, first_token_delay=0.005, tool_call_rate=0.5, seed=SEED)
+    monkeypatch.setattr(app, "client", build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT,
+                                                    base_url=server.base_url))
+    monkeypatch.setattr(app, "async_client", build_client("mock", app.MODEL_POOL_LIMITS, app.MODEL_TIMEOUT,
+                                                          asynchronous=True, base_url=server.base_url))
+    return server
+
+
+def check_transcripts(transcripts: list, requests: int):
+    for transcript in transcripts:
+        assert transcript.problems() == []
+    assert requests == sum(transcript.model_requests() for transcript in transcripts)
+    assert sum(transcript.connections for transcript in transcripts) > len(transcripts)
+
+
+def test_wsgi_resume_after_random_drops(mock):
+    rng = random.Random(SEED)
+    client = app.app.test_client()
+    before = mock.requests
+    transcripts = [run_wsgi_turn(client, f"test_resume_wsgi_{turn % 3}", f"Turn {turn}: I need an NDA", rng, DROP_RATE)
+                   for turn in range(TURNS)]
+    check_transcripts(transcripts, mock.requests - before)
+
+
+def test_asgi_resume_after_random_drops(mock):
+    rng = random.Random(SEED)
+
+    async def run() -> list:
+        return [await run_asgi_turn(f"test_resume_asgi_{turn % 3}", f"Turn {turn}: I need an NDA", rng, DROP_RATE)
+                for turn in range(TURNS)]
+
+    before = mock.requests
+    transcripts = asyncio.run(run())
+    check_transcripts(transcripts, mock.requests - before)
+
+
+def test_live_reader_behind_buffer_keeps_every_event():
+    stream = TurnStream("test_live_reader", 1, capacity=4)
+    reader = stream.iter(None)
+    stream.publish("data: {\"type\": \"content\", \"index\": 0}\n\n")
+    events = parse_frames(next(reader))
+    for index in range(1, 10):
+        stream.publish(f"data: {{\"type\": \"content\", \"index\": {index}}}\n\n")
+    stream.finish()
+
+    events += [event for frame in reader for event in parse_frames(frame)]
+
+    assert [event_id for event_id, _ in events] == list(range(1, 11))
+    assert len(stream.events) == 4
+
+
+def test_reconnect_after_turn_reports_trimmed_events():
+    stream = TurnStream("test_trimmed", 1, capacity=4)
+    for index in range(10):
+        stream.publish(f"data: {{\"type\": \"content\", \"index\": {index}}}\n\n")
+    stream.finish()
+
+    events = [event for frame in stream.iter(2) for event in parse_frames(frame)]
+
+    assert events[0] == (None, {"type": "stream_gap", "last_event_id": 2})
+    assert [event_id for event_id, _ in events[1:]] == [7, 8, 9, 10]
@@ -0,0 +1,34 @@
+import os
+import glob
+import time
+
+import pytest
+
+from benchmarks.replay import FIXTURE_DIR, check_message_order, load_fixture, replay
+
+import app
+
+FIXTURES = sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.json")))
+
+
+@pytest.fixture(autouse=True)
+def tool_loop_limits(monkeypatch):
+    monkeypatch.setattr(app, "TOOL_MAX_ROUNDS", app.TOOL_MAX_ROUNDS)
+    monkeypatch.setattr(app, "TOOL_ARGUMENT_RETRIES", app.TOOL_ARGUMENT_RETRIES)
+
+
+def test_fixtures_found():
+    assert FIXTURES
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda path: os.path.splitext(os.path.basename(path))[0])
+def test_replay_matches_expected(path):
+    fixture = load_fixture(path)
+    session_id = f"test_{os.path.basename(path)}_{time.time()}"
+
+    observed = replay(fixture, session_id)
+
+    assert check_message_order(session_id) == []
+    assert set(observed) == set(fixture["expected"])
+    for key, value in observed.items():
+        assert value == fixture["expected"][key], key
@@ -0,0 +1,245 @@
+import re
+import json
+
+TOKEN = re.compile(r"\S")
+STRING_END = re.compile(r"[\"\\]")
+SCALAR_END = re.compile(r"[\s,\]}]")
+LITERALS = {"true": True, "false": False, "null": None}
+JSON_TYPES = {"object": dict, "array": list, "string": str, "boolean": bool, "number": (int, float), "integer": int,
+              "null": type(None)}
+
+
+class ArgumentError(ValueError):
+    pass
+
+
+def schema_types(names) -> tuple | None:
+    kinds = [JSON_TYPES.get(name) for name in ([names] if isinstance(names, str) else names or [])]
+    if not kinds or None in kinds:
+        return None
+    return tuple(kind for group in kinds for kind in (group if isinstance(group, tuple) else (group,)))
+
+
+def compile_schema(schema: dict, path: tuple = (), specs: dict | None = None) -> dict:
+    specs = {} if specs is None else specs
+    specs[path] = (schema_types(schema.get("type")), tuple(schema["enum"]) if "enum" in schema else None)
+    for name, child in schema.get("properties", {}).items():
+        compile_schema(child, path + (name,), specs)
+    if "items" in schema:
+        compile_schema(schema["items"], path + ("*",), specs)
+    return specs
+
+
+def compile_tools(tools: list) -> dict:
+    return {
+        tool["function"]["name"]: (compile_schema(tool["function"]["parameters"]),
+                                   tuple(tool["function"]["parameters"].get("required", ())))
+        for tool in tools
+    }
+
+
+def schema_path(path: tuple) -> tuple:
+    return tuple("*" if isinstance(part, int) else part for part in path)
+
+
+def path_name(path: tuple) -> str:
+    return ".".join(str(part) for part in path) or "arguments"
+
+
+def check_value(specs: dict, path: tuple, value) -> str | None:
+    spec = specs.get(schema_path(path))
+    if spec is None:
+        return None
+    kind, allowed = spec
+    if kind and (not isinstance(value, kind) or (isinstance(value, bool) and bool not in kind)):
+        return f"{path_name(path)} has the wrong type"
+    if allowed and value not in allowed:
+        return f"{path_name(path)} must be one of {', '.join(map(str, allowed))}"
+    return None
+
+
+def validate(specs: dict, value, path: tuple = ()) -> list:
+    problem = check_value(specs, path, value)
+    if problem:
+        return [problem]
+    children = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else ()
+    return [problem for key, child in children for problem in validate(specs, child, path + (key,))]
+
+
+class IncrementalJSON:
+    def __init__(self):
+        self.buffer = ""
+        self.resume = 0
+        self.escaped = False
+        self.stack = []
+        self.root = None
+        self.done = False
+
+    def path(self) -> tuple:
+        return tuple(key if isinstance(container, dict) else len(container) for container, key, _ in self.stack)
+
+    def expect_value(self, frame: list | None):
+        if frame is None:
+            if self.done:
+                raise ArgumentError("unexpected data after the arguments object")
+        elif isinstance(frame[0], dict):
+            if frame[2] != "value":
+                raise ArgumentError("expected a key")
+        elif frame[2] == "first":
+            frame[2] = "value"
+        elif frame[2] != "value":
+            raise ArgumentError("expected ',' or ']'")
+
+    def deliver(self, value, completed: list):
+        if not self.stack:
+            self.root = value
+            self.done = True
+            completed.append(((), value))
+            return
+        frame = self.stack[-1]
+        completed.append((self.path(), value))
+        if isinstance(frame[0], dict):
+            frame[0][frame[1]] = value
+        else:
+            frame[0].append(value)
+        frame[2] = "next"
+
+    def scan_string(self, buffer: str, start: int) -> int:
+        end = start + 1 + self.resume
+        while True:
+            found = STRING_END.search(buffer, end)
+            if found is None:
+                self.resume = len(buffer) - start - 1
+                return -1
+            if found.group() == '"':
+                self.resume = 0
+                return found.end()
+            if found.end() >= len(buffer):
+                self.resume = found.start() - start - 1
+                return -1
+            self.escaped = True
+            end = found.end() + 1
+
+    def decode_string(self, raw: str) -> str:
+        if not self.escaped:
+            return raw[1:-1]
+        self.escaped = False
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            raise ArgumentError("invalid escape in a string") from None
+
+    def feed(self, text: str) -> list:
+        buffer = self.buffer + text if self.buffer else text
+        position = 0
+        completed = []
+        while True:
+            match = TOKEN.search(buffer, position)
+            if match is None:
+                position = len(buffer)
+                break
+            position = match.start()
+            char = buffer[position]
+            frame = self.stack[-1] if self.stack else None
+
+            if char == '"':
+                end = self.scan_string(buffer, position)
+                if end < 0:
+                    break
+                value = self.decode_string(buffer[position:end])
+                position = end
+                if frame and isinstance(frame[0], dict) and frame[2] in ("first", "key"):
+                    frame[1], frame[2] = value, "colon"
+                else:
+                    self.expect_value(frame)
+                    self.deliver(value, completed)
+            elif char == "{" or char == "[":
+                self.expect_value(frame)
+                self.stack.append([{} if char == "{" else [], None, "first"])
+                position += 1
+            elif char == "}" or char == "]":
+                if not frame or isinstance(frame[0], dict) != (char == "}") or frame[2] not in ("first", "next"):
+                    raise ArgumentError(f"unexpected {char!r}")
+                self.stack.pop()
+                position += 1
+                self.deliver(frame[0], completed)
+            elif char == ":":
+                if not frame or frame[2] != "colon":
+                    raise ArgumentError("unexpected ':'")
+                frame[2] = "value"
+                position += 1
+            elif char == ",":
+                if not frame or frame[2] != "next":
+                    raise ArgumentError("unexpected ','")
+                frame[2] = "key" if isinstance(frame[0], dict) else "value"
+                position += 1
+            else:
+                found = SCALAR_END.search(buffer, position)
+                if found is None:
+                    break
+                token = buffer[position:found.start()]
+                if token in LITERALS:
+                    value = LITERALS[token]
+                else:
+                    try:
+                        value = json.loads(token)
+                    except json.JSONDecodeError:
+                        value = None
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        raise ArgumentError(f"invalid value {token[:20]!r}")
+                self.expect_value(frame)
+                position = found.start()
+                self.deliver(value, completed)
+        self.buffer = buffer[position:]
+        return completed
+
+
+class ArgumentStream:
+    def __init__(self, compiled: tuple | None, progress_depth: int = 3):
+        self.specs, self.required = compiled or ({}, ())
+        self.progress_depth = progress_depth
+        self.parser = IncrementalJSON()
+        self.problem = None if compiled else "unknown tool"
+
+    def feed(self, text: str) -> list:
+        if self.problem:
+            return []
+        try:
+            completed = self.parser.feed(text)
+        except ArgumentError as e:
+            self.problem = str(e)
+            return []
+
+        progress = []
+        for path, value in completed:
+            problem = check_value(self.specs, path, value)
+            if problem:
+                self.problem = problem
+                break
+            if 0 < len(path) <= self.progress_depth and (
+                isinstance(path[-1], int) or not isinstance(value, (dict, list))
+            ):
+                progress.append((path, value))
+        if self.parser.done and not self.problem:
+            self.check_required()
+        return progress
+
+    def check_required(self):
+        missing = [field for field in self.required if field not in self.parser.root]
+        if missing:
+            self.problem = f"missing {', '.join(missing)}"
+
+    def finish(self) -> dict | None:
+        if not self.parser.done:
+            self.problem = self.problem or "arguments ended before the JSON object closed"
+            return None
+        if not self.problem:
+            self.check_required()
+        return self.parser.root
+
+
+def check_arguments(compiled: tuple | None, raw: str) -> str | None:
+    stream = ArgumentStream(compiled)
+    stream.feed(raw)
+    stream.finish()
+    return stream.problem
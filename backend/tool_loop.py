@@ -0,0 +1,152 @@
+import json
+
+from tool_arguments import ArgumentStream
+
+
+class ToolLoop:
+    def __init__(self, messages: list, max_rounds: int, schemas: dict | None = None, max_argument_retries: int = 0):
+        self.messages = messages
+        self.max_rounds = max_rounds
+        self.schemas = schemas
+        self.max_argument_retries = max_argument_retries
+        self.argument_retries = 0
+        self.round = 0
+        self.awaiting_model = True
+        self.handled_ids = set()
+        self.content = ""
+        self.tool_calls = {}
+        self.finish_reason = None
+
+    @property
+    def tool_choice(self) -> str:
+        return "none" if self.round > 1 and self.round == self.max_rounds else "auto"
+
+    def start_round(self) -> bool:
+        if not self.awaiting_model or self.round >= self.max_rounds:
+            return False
+
+        self.round += 1
+        self.awaiting_model = False
+        self.argument_retries = 0
+        self.reset_round()
+        return True
+
+    def reset_round(self):
+        self.content = ""
+        self.tool_calls = {}
+        self.finish_reason = None
+        self.streams = {}
+        self.progress = []
+        self.pending = {}
+        self.malformed = None
+
+    def feed(self, chunk: dict) -> str | None:
+        choices = chunk.get("choices")
+        if not choices:
+            return None
+
+        delta = choices[0].get("delta") or {}
+        if choices[0].get("finish_reason"):
+            self.finish_reason = choices[0]["finish_reason"]
+
+        for tool_call in delta.get("tool_calls") or []:
+            index = tool_call.get("index", 0)
+            call = self.tool_calls.setdefault(index, {
+                "id": None,
+                "type": "function",
+                "function": {"name": "", "arguments": ""}
+            })
+            if tool_call.get("id"):
+                call["id"] = tool_call["id"]
+            function = tool_call.get("function") or {}
+            if function.get("name"):
+                call["function"]["name"] = function["name"]
+            if function.get("arguments"):
+                call["function"]["arguments"] += function["arguments"]
+                if self.schemas is not None:
+                    self.feed_arguments(index, call, function["arguments"])
+
+        content = delta.get("content")
+        if content:
+            self.content += content
+        return content
+
+    def argument_stream(self, index: int) -> ArgumentStream:
+        if index not in self.streams:
+            self.streams[index] = ArgumentStream(self.schemas.get(self.tool_calls[index]["function"]["name"]))
+        return self.streams[index]
+
+    def feed_arguments(self, index: int, call: dict, text: str):
+        stream = self.argument_stream(index)
+        pending = self.pending.setdefault(index, [])
+        for path, value in stream.feed(text):
+            pending.append({
+                "type": "tool_call_progress",
+                "function": call["function"]["name"],
+                "index": index,
+                "path": list(path),
+                "value": value
+            })
+        if stream.problem:
+            self.malformed = self.malformed or f"{call['function']['name']}: {stream.problem}"
+        elif stream.parser.done or self.argument_retries >= self.max_argument_retries:
+            self.progress.extend(self.pending.pop(index))
+
+    def check_arguments(self) -> str | None:
+        if self.schemas is None:
+            return None
+        for index in sorted(self.tool_calls):
+            stream = self.argument_stream(index)
+            stream.finish()
+            if stream.problem and not self.malformed:
+                self.malformed = f"{self.tool_calls[index]['function']['name']}: {stream.problem}"
+        return self.malformed
+
+    def parse_arguments(self, index: int, call: dict) -> tuple[dict, str | None]:
+        if self.schemas is not None:
+            stream = self.argument_stream(index)
+            arguments = stream.finish()
+            return arguments if isinstance(arguments, dict) and not stream.problem else {}, stream.problem
+        try:
+            arguments = json.loads(call["function"]["arguments"])
+        except json.JSONDecodeError:
+            return {}, None
+        return arguments if isinstance(arguments, dict) else {}, None
+
+    def finish_round(self) -> list:
+        calls = []
+        for index in sorted(self.tool_calls):
+            call = self.tool_calls[index]
+            if call["id"] is None or call["id"] in self.handled_ids:
+                continue
+
+            arguments, problem = self.parse_arguments(index, call)
+            calls.append({**call, "arguments": arguments, "error": problem} if problem else {**call, "arguments": arguments})
+
+        if calls:
+            self.awaiting_model = True
+            self.messages.append({
+                "role": "assistant",
+                "content": self.content if self.content else None,
+                "tool_calls": [{"id": call["id"], "type": "function", "function": call["function"]} for call in calls]
+            })
+        elif self.content:
+            self.messages.append({"role": "assistant", "content": self.content})
+        return calls
+
+    def finish_locally(self, content: str):
+        self.awaiting_model = False
+        self.messages.append({"role": "assistant", "content": content})
+
+    def tool_call_event(self, call: dict) -> dict:
+        return {"type": "tool_call", "function": call["function"]["name"], "arguments": call["arguments"]}
+
+    def record_result(self, call: dict, result: dict) -> dict:
+        self.handled_ids.add(call["id"])
+        self.messages.append({
+            "role": "tool",
+            "tool_call_id": call["id"],
+            "content": json.dumps(result)
+        })
+
+        return {"type": "tool_result", "function": call["function"]["name"], "result": result}
@@ -1,9 +1,11 @@
+from document_templates import CompiledTemplate, get_compiled_template
+
 TOOLS = [
     {
         "type": "function",
         "function": {
             "name": "extract_information",
-            "description": "Extract and structure information from the conversation for document generation. Call this whenever the user provides new information that should be captured.",
+            "description": "Record information from the conversation for document generation. Call this whenever the user provides new information. Send only fields that are new or changed: they are merged into what earlier calls recorded, and the result reports the merged data, missing_fields and ready_to_generate.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -14,10 +16,10 @@ TOOLS = [
                     },
                     "extracted_data": {
                         "type": "object",
-                        "description": "Structured data extracted from conversation",
+                        "description": "New or changed data only. Parties are matched by name (or by role when unnamed) and updated in place, dates and terms are merged key by key, and additional provisions are appended. Send null for a field, date or term to remove it",
                         "properties": {
                             "parties": {
-                                "type": "array",
+                                "type": ["array", "null"],
                                 "items": {
                                     "type": "object",
                                     "properties": {
@@ -30,33 +32,25 @@ TOOLS = [
                                 "description": "Parties involved in the document"
                             },
                             "dates": {
-                                "type": "object",
+                                "type": ["object", "null"],
                                 "properties": {
-                                    "effective_date": {"type": "string"},
-                                    "end_date": {"type": "string"},
-                                    "duration": {"type": "string"}
+                                    "effective_date": {"type": ["string", "null"]},
+                                    "end_date": {"type": ["string", "null"]},
+                                    "duration": {"type": ["string", "null"]}
                                 },
                                 "description": "Relevant dates and timeframes"
                             },
                             "terms": {
-                                "type": "object",
+                                "type": ["object", "null"],
                                 "description": "Document-specific terms"
                             },
                             "additional_provisions": {
-                                "type": "array",
+                                "type": ["array", "null"],
                                 "items": {"type": "string"},
                                 "description": "Any additional clauses or provisions requested"
-                            }
+                            },
+                            "jurisdiction": {"type": ["string", "null"], "description": "Governing law"}
                         }
-                    },
-                    "missing_fields": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "List of required fields still needed from the user"
-                    },
-                    "ready_to_generate": {
-                        "type": "boolean",
-                        "description": "Whether all required information has been collected"
                     }
                 },
                 "required": ["document_type", "extracted_data"]
@@ -78,7 +72,7 @@ TOOLS = [
                     },
                     "document_data": {
                         "type": "object",
-                        "description": "All structured data for document generation",
+                        "description": "Data for document generation. Fields left out are filled from the information recorded with extract_information",
                         "properties": {
                             "title": {"type": "string"},
                             "parties": {
@@ -128,7 +122,7 @@ TOOLS = [
                     },
                     "original_value": {
                         "type": "string",
-                        "description": "The current/original text or value being changed"
+                        "description": "The exact current text being changed. Required to change part of a section: a modify or replace without it rewrites the whole section as new_value"
                     },
                     "new_value": {
                         "type": "string",
@@ -151,13 +145,5 @@ TOOLS = [
 ]
 
 
-def get_template(document_type: str) -> str:
-    templates = {
-        "nda": "Non-Disclosure Agreement Template",
-        "employment_agreement": "Employment Agreement Template",
-        "board_resolution": "Board Resolution Template",
-        "service_agreement": "Service Agreement Template",
-        "consulting_agreement": "Consulting Agreement Template",
-        "partnership_agreement": "Partnership Agreement Template"
-    }
-    return templates.get(document_type, "Legal Document Template")
+def get_template(document_type: str) -> CompiledTemplate:
+    return get_compiled_template(document_type)
@@ -0,0 +1,48 @@
+import os
+import time
+import threading
+
+
+class Warmup:
+    def __init__(self, steps: dict):
+        self.steps = steps
+        self.reset()
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.ready = threading.Event()
+        self.seconds = {}
+        self.error = None
+
+    def start(self) -> "Warmup":
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+                self.thread.start()
+        return self
+
+    def run(self):
+        for name, step in self.steps.items():
+            if name in self.seconds:
+                continue
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                with self.lock:
+                    self.error = f"{name}: {e}"
+                    self.thread = None
+                return
+            self.seconds[name] = round(time.perf_counter() - started, 4)
+        self.error = None
+        self.ready.set()
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready.is_set(),
+            "started": self.thread is not None or self.ready.is_set(),
+            "error": self.error,
+            "seconds": dict(self.seconds)
+        }